@@ -0,0 +1,111 @@
+"""
+Analytics API endpoints.
+Reports computed from precomputed realized gains and daily snapshots.
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from app.models.schemas import PortfolioReturns, PortfolioRisk, RealizedGainsReport
+from app.services.realized_gain_service import RealizedGainService
+from app.services.returns_service import ReturnsService
+from app.services.risk_service import RiskService
+from typing import Optional
+from datetime import date
+
+router = APIRouter(prefix="/portfolios", tags=["analytics"])
+realized_gain_service = RealizedGainService()
+returns_service = ReturnsService()
+risk_service = RiskService()
+
+
+@router.get("/{portfolio_id}/realized-gains", response_model=RealizedGainsReport)
+async def get_realized_gains(
+    portfolio_id: str,
+    start_date: Optional[date] = Query(None, alias="from", description="Only include sells on or after this date"),
+    end_date: Optional[date] = Query(None, alias="to", description="Only include sells on or before this date"),
+    group_by: str = Query("symbol", pattern="^(symbol|month|year)$", description="Group by symbol, month or year")
+):
+    """
+    Get realized gains and losses for a portfolio.
+    
+    Served from realized gain records written when sells are processed,
+    using the portfolio's cost basis method. Each group splits the gain
+    into short-term and long-term (held more than 365 days) parts; gains
+    under the average cost method have no holding period.
+    
+    **Example request:**
+```bash
+    curl "http://localhost:8000/portfolios/{portfolio_id}/realized-gains?from=2024-01-01&to=2024-12-31&group_by=month"
+```
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    
+    return await realized_gain_service.get_realized_gains(
+        portfolio_id,
+        start_date=start_date,
+        end_date=end_date,
+        group_by=group_by
+    )
+
+
+@router.get("/{portfolio_id}/returns", response_model=PortfolioReturns)
+async def get_returns(
+    portfolio_id: str,
+    period: str = Query("1y", pattern="^(1m|3m|6m|ytd|1y|3y|5y|10y|all)$", description="Period (1m, 3m, 6m, ytd, 1y, 3y, 5y, 10y, all)")
+):
+    """
+    Get time-weighted (TWR) and money-weighted (XIRR) returns.
+    
+    Computed from the daily performance snapshots, with buys, sells and
+    transfers as cash flows into and out of the positions and dividends
+    as income. Returns are fractions (0.05 = 5%).
+    
+    - `time_weighted_return`: Daily returns chained over the period
+    - `annualized_time_weighted_return`: Only for periods of a year or more
+    - `money_weighted_return`: Annual internal rate of return of the flows
+    
+    **Example request:**
+```bash
+    curl "http://localhost:8000/portfolios/{portfolio_id}/returns?period=3y"
+```
+    """
+    return await returns_service.get_returns(portfolio_id, period=period)
+
+
+@router.get("/{portfolio_id}/risk", response_model=PortfolioRisk)
+async def get_risk_metrics(
+    portfolio_id: str,
+    period: str = Query("1y", pattern="^(1m|3m|6m|ytd|1y|3y|5y|10y|all)$", description="Period (1m, 3m, 6m, ytd, 1y, 3y, 5y, 10y, all)"),
+    confidence: float = Query(0.95, gt=0.5, lt=1, description="Confidence level for VaR/CVaR"),
+    risk_free_rate: float = Query(0.0, ge=-1, le=1, description="Annual risk-free rate for Sharpe/Sortino"),
+    benchmark_portfolio_id: Optional[str] = Query(None, description="Portfolio to measure beta against"),
+    benchmark: Optional[str] = Query(None, description="Ticker from the price store to measure beta against (e.g. SPY)")
+):
+    """
+    Get risk metrics computed from the daily return series.
+    
+    Returns:
+    - Annualized return and volatility
+    - Sharpe and Sortino ratios
+    - Maximum drawdown with its peak and trough dates
+    - One-day historical and parametric (normal) VaR and CVaR
+    - Beta against a benchmark portfolio or a benchmark ticker (if given);
+      ticker closes come from the local price store, taken on the
+      snapshot days
+    
+    **Example request:**
+```bash
+    curl "http://localhost:8000/portfolios/{portfolio_id}/risk?period=3y&confidence=0.99&benchmark=SPY"
+```
+    """
+    if benchmark_portfolio_id and benchmark:
+        raise HTTPException(status_code=400, detail="Give either benchmark_portfolio_id or benchmark, not both")
+    
+    return await risk_service.get_risk_metrics(
+        portfolio_id,
+        period=period,
+        confidence=confidence,
+        risk_free_rate=risk_free_rate,
+        benchmark_portfolio_id=benchmark_portfolio_id,
+        benchmark=benchmark
+    )
@@ -4,7 +4,7 @@ Manage stock/crypto metadata like sector, industry, etc.
 """
 
 from fastapi import APIRouter, Query, status
-from app.models.schemas import Asset, AssetCreate, AssetUpdate, SuccessResponse
+from app.models.schemas import Asset, AssetBatchRequest, AssetCreate, AssetUpdate, SuccessResponse
 from app.services.asset_service import AssetService
 from typing import List
 
@@ -36,6 +36,25 @@ def create_asset(asset_data: AssetCreate):
     return asset_service.get_or_create_asset(asset_data.ticker, asset_data)
 
 
+@router.post("/batch", response_model=List[Asset])
+def get_or_create_assets(batch: AssetBatchRequest):
+    """
+    Resolve many tickers at once.
+    
+    Existing assets are returned as they are; unknown tickers are created
+    with minimal data. Takes two database round trips however many tickers
+    are sent.
+    
+    **Example request:**
+```json
+    {
+      "tickers": ["AAPL", "MSFT", "BTC"]
+    }
+```
+    """
+    return asset_service.get_or_create_assets(batch.tickers)
+
+
 @router.get("", response_model=List[Asset])
 def get_all_assets(limit: int = Query(1000, ge=1, le=10000)):
     """
@@ -56,6 +75,16 @@ def search_assets(q: str = Query(..., min_length=1, description="Search query"))
     return asset_service.search_assets(q)
 
 
+@router.get("/cache/stats")
+def get_asset_cache_stats():
+    """
+    Get hit/miss counters for the in-process asset cache.
+    
+    Counters are per API process and reset on restart.
+    """
+    return asset_service.cache_stats()
+
+
 @router.get("/{ticker}", response_model=Asset)
 def get_asset(ticker: str):
     """
@@ -3,10 +3,12 @@ Cash movement API endpoints.
 Track deposits and withdrawals.
 """
 
-from fastapi import APIRouter, Query, status
+from fastapi import APIRouter, Query, Response, status
 from app.models.schemas import CashMovement, CashMovementCreate, SuccessResponse
 from app.services.cash_movement_service import CashMovementService
+from app.utils.pagination import NEXT_CURSOR_HEADER
 from typing import List, Optional
+from datetime import date
 
 router = APIRouter(prefix="/cash", tags=["cash-movements"])
 cash_service = CashMovementService()
@@ -43,10 +45,12 @@ def create_cash_movement(movement_data: CashMovementCreate):
 
 
 @router.get("", response_model=List[CashMovement])
-def get_cash_movements(
+async def get_cash_movements(
+    response: Response,
     portfolio_id: str = Query(..., description="Portfolio UUID"),
     movement_type: Optional[str] = Query(None, description="Filter by type (deposit/withdrawal)"),
-    limit: int = Query(100, ge=1, le=1000, description="Maximum number of results")
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of results"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page")
 ):
     """
     Get cash movements for a portfolio.
@@ -55,14 +59,23 @@ def get_cash_movements(
     - `portfolio_id`: (Required) Portfolio UUID
     - `movement_type`: (Optional) Filter by deposit or withdrawal
     - `limit`: Maximum number of movements to return
+    - `cursor`: Value of the `X-Next-Cursor` header from the previous page
     
-    Returns movements ordered by date (newest first).
+    Returns movements ordered by date (newest first). If more results
+    exist, the `X-Next-Cursor` response header holds the cursor for the
+    next page.
     """
-    return cash_service.get_cash_movements(
+    movements, next_cursor = await cash_service.get_cash_movements_page(
         portfolio_id=portfolio_id,
         movement_type=movement_type,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
+    
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
+    return movements
 
 
 @router.get("/{movement_id}", response_model=CashMovement)
@@ -82,14 +95,25 @@ def delete_cash_movement(movement_id: str):
 
 
 @router.get("/balance/{portfolio_id}")
-def get_cash_balance(portfolio_id: str):
+async def get_cash_balance(
+    portfolio_id: str,
+    start_date: Optional[date] = Query(None, description="Only include movements on or after this date"),
+    end_date: Optional[date] = Query(None, description="Only include movements on or before this date")
+):
     """
     Get current cash balance for a portfolio.
     
     Calculates: Total Deposits - Total Withdrawals
+    (optionally restricted to a date range)
     """
-    balance = cash_service.get_cash_balance(portfolio_id)
+    balance = await cash_service.get_cash_balance(
+        portfolio_id,
+        start_date=start_date,
+        end_date=end_date
+    )
     return {
         "portfolio_id": portfolio_id,
-        "cash_balance": float(balance)
+        "cash_balance": float(balance),
+        "start_date": start_date,
+        "end_date": end_date
     }
\ No newline at end of file
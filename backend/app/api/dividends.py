@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Query, status
+from fastapi import APIRouter, Query, Response, status
 from app.models.schemas import Dividend, DividendCreate, SuccessResponse
 from app.services.dividend_service import DividendService
+from app.utils.pagination import NEXT_CURSOR_HEADER
 from typing import List, Optional
 from datetime import date
 
@@ -17,24 +18,33 @@ def create_dividend(dividend_data: DividendCreate):
 
 
 @router.get("", response_model=List[Dividend])
-def get_dividends(
+async def get_dividends(
+    response: Response,
     portfolio_id: str = Query(...),
     symbol: Optional[str] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None)
 ):
     """
     Get dividend records for a portfolio.
+    Pass the `X-Next-Cursor` response header back as `cursor` for the next page.
     """
-    return dividend_service.get_dividends(
+    dividends, next_cursor = await dividend_service.get_dividends_page(
         portfolio_id=portfolio_id,
         symbol=symbol,
         start_date=start_date,
         end_date=end_date,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
 
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return dividends
+
 
 @router.get("/{dividend_id}", response_model=Dividend)
 def get_dividend(dividend_id: str):
@@ -53,7 +63,7 @@ def delete_dividend(dividend_id: str):
 
 
 @router.get("/total/{portfolio_id}")
-def get_total_dividend_income(
+async def get_total_dividend_income(
     portfolio_id: str,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None)
@@ -61,7 +71,7 @@ def get_total_dividend_income(
     """
     Get total dividend income for a portfolio.
     """
-    total = dividend_service.get_total_dividend_income(
+    total = await dividend_service.get_total_dividend_income(
         portfolio_id=portfolio_id,
         start_date=start_date,
         end_date=end_date
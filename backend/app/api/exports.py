@@ -0,0 +1,100 @@
+"""
+Export API endpoints.
+Download a portfolio ledger or dataset as a streamed file.
+"""
+
+from fastapi import APIRouter, Path, Query
+from fastapi.responses import StreamingResponse
+from app.services.columnar_export_service import ColumnarExportService
+from app.services.export_service import ExportService
+from app.services.portfolio_service import PortfolioService
+
+router = APIRouter(prefix="/portfolios", tags=["exports"])
+export_service = ExportService()
+columnar_export_service = ColumnarExportService()
+portfolio_service = PortfolioService()
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+FILE_EXTENSIONS = {
+    "arrow": "arrows",
+    "parquet": "parquet"
+}
+
+
+@router.get("/{portfolio_id}/export")
+async def export_ledger(
+    portfolio_id: str,
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="Export format (csv, ndjson)")
+):
+    """
+    Export all transactions, cash movements and dividends of a portfolio.
+    
+    The file is streamed while it is read from the database page by page,
+    so downloads start immediately and large ledgers are never held in memory.
+    Records are grouped by type and ordered by date (oldest first).
+    
+    **Formats:**
+    - `csv`: One header row; the `record_type` column tells transactions,
+      cash movements and dividends apart
+    - `ndjson`: One JSON object per line with all columns plus `record_type`
+    
+    **Example:**
+```bash
+    curl -o ledger.ndjson \
+      "http://localhost:8000/portfolios/{portfolio_id}/export?format=ndjson"
+```
+    """
+    # Fail with 404 before the response starts streaming
+    await portfolio_service.get_portfolio(portfolio_id)
+    
+    return StreamingResponse(
+        export_service.stream_ledger(portfolio_id, format),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="portfolio-{portfolio_id}-ledger.{format}"'
+        }
+    )
+
+
+@router.get("/{portfolio_id}/export/{dataset}")
+async def export_dataset(
+    portfolio_id: str,
+    dataset: str = Path(..., pattern="^(transactions|positions|snapshots)$", description="Dataset (transactions, positions, snapshots)"),
+    format: str = Query("parquet", pattern="^(arrow|parquet)$", description="Export format (arrow, parquet)")
+):
+    """
+    Export one dataset of a portfolio in a columnar format for analytics.
+    
+    Rows are typed (floats, UTC timestamps, dates) and written one record
+    batch per database page, streamed as they are produced.
+    
+    **Formats:**
+    - `arrow`: Apache Arrow IPC stream
+    - `parquet`: Parquet file, one row group per page
+    
+    **Example:**
+```python
+    import pyarrow as pa
+    import requests
+    
+    url = "http://localhost:8000/portfolios/{portfolio_id}/export/transactions?format=arrow"
+    with requests.get(url, stream=True) as response:
+        table = pa.ipc.open_stream(response.raw).read_all()
+```
+    """
+    # Fail with 404 before the response starts streaming
+    await portfolio_service.get_portfolio(portfolio_id)
+    
+    return StreamingResponse(
+        columnar_export_service.stream_dataset(portfolio_id, dataset, format),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="portfolio-{portfolio_id}-{dataset}.{FILE_EXTENSIONS[format]}"'
+        }
+    )
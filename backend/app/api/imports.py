@@ -0,0 +1,103 @@
+"""
+CSV import API endpoints.
+Upload broker exports as multipart files; rows are parsed and written in chunks,
+either during the request or as a background job.
+"""
+
+from fastapi import APIRouter, File, Query, UploadFile, status
+from app.models.schemas import CSVImportResponse, ImportJob
+from app.services.csv_import_service import CSVImportService
+from app.services.import_job_service import ImportJobService
+from typing import Optional
+import io
+
+router = APIRouter(tags=["imports"])
+csv_import_service = CSVImportService()
+import_job_service = ImportJobService()
+
+
+@router.post("/portfolios/{portfolio_id}/import", response_model=CSVImportResponse)
+def import_csv(
+    portfolio_id: str,
+    file: UploadFile = File(..., description="CSV file exported from your broker"),
+    broker_format: str = Query("generic", description="Broker format (generic, robinhood, interactivebrokers)"),
+    chunk_size: Optional[int] = Query(None, ge=100, le=10000, description="Rows validated and written per chunk")
+):
+    """
+    Import transactions from an uploaded CSV file.
+    
+    The file is read incrementally from the spooled upload and written in
+    fixed-size chunks, so memory stays bounded for very large exports.
+    Positions are recalculated once after the last chunk.
+    
+    **Example:**
+```bash
+    curl -F "file=@robinhood.csv" \
+      "http://localhost:8000/portfolios/{portfolio_id}/import?broker_format=robinhood"
+```
+    
+    Returns counts, the first row errors and cumulative progress per chunk.
+    """
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    
+    try:
+        return csv_import_service.import_stream(
+            portfolio_id=portfolio_id,
+            broker_format=broker_format,
+            stream=stream,
+            chunk_size=chunk_size
+        )
+    finally:
+        # Leave closing the underlying upload to FastAPI
+        stream.detach()
+
+
+@router.post(
+    "/portfolios/{portfolio_id}/import/jobs",
+    response_model=ImportJob,
+    status_code=status.HTTP_202_ACCEPTED
+)
+def submit_import_job(
+    portfolio_id: str,
+    file: UploadFile = File(..., description="CSV file exported from your broker"),
+    broker_format: str = Query("generic", description="Broker format (generic, robinhood, interactivebrokers)"),
+    chunk_size: Optional[int] = Query(None, ge=100, le=10000, description="Rows validated and written per chunk")
+):
+    """
+    Import transactions from an uploaded CSV file in the background.
+    
+    Returns immediately with a job id (404 if the portfolio does not
+    exist). Poll `GET /imports/jobs/{job_id}` for progress; the import keeps
+    running if the client disconnects.
+    
+    Jobs are tracked in the memory of the worker process that accepted
+    them: job ids are not shared between workers and are lost on restart.
+    """
+    return import_job_service.submit_job(
+        portfolio_id=portfolio_id,
+        broker_format=broker_format,
+        upload=file.file,
+        chunk_size=chunk_size
+    )
+
+
+@router.get("/imports/jobs/{job_id}", response_model=ImportJob)
+def get_import_job(job_id: str):
+    """
+    Get the status of a background import job.
+    
+    Shows rows processed, failed and remaining, plus the first row errors
+    once the job has finished.
+    """
+    return import_job_service.get_job(job_id)
+
+
+@router.post("/imports/jobs/{job_id}/cancel", response_model=ImportJob)
+def cancel_import_job(job_id: str):
+    """
+    Cancel a background import job.
+    
+    The job stops before its next chunk. Rows already imported are kept
+    and positions are recalculated for them.
+    """
+    return import_job_service.cancel_job(job_id)
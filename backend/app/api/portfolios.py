@@ -40,24 +40,24 @@ def create_portfolio(portfolio_data: PortfolioCreate):
 
 
 @router.get("", response_model=List[Portfolio])
-def get_all_portfolios():
+async def get_all_portfolios():
     """
     Get all portfolios for the current user.
     
     Returns a list of all portfolios ordered by creation date (newest first).
     """
-    return portfolio_service.get_all_portfolios()
+    return await portfolio_service.get_all_portfolios()
 
 
 @router.get("/{portfolio_id}", response_model=Portfolio)
-def get_portfolio(portfolio_id: str):
+async def get_portfolio(portfolio_id: str):
     """
     Get a specific portfolio by ID.
     
     **Parameters:**
     - `portfolio_id`: UUID of the portfolio
     """
-    return portfolio_service.get_portfolio(portfolio_id)
+    return await portfolio_service.get_portfolio(portfolio_id)
 
 
 @router.put("/{portfolio_id}", response_model=Portfolio)
@@ -77,6 +77,9 @@ def update_portfolio(portfolio_id: str, portfolio_data: PortfolioUpdate):
 ```
     
     All fields are optional - only include fields you want to update.
+    
+    Changing `cost_basis_method` (average, fifo, lifo, hifo, specific_id)
+    rebuilds positions and realized gains before the response returns.
     """
     return portfolio_service.update_portfolio(portfolio_id, portfolio_data)
 
@@ -99,7 +102,7 @@ def delete_portfolio(portfolio_id: str):
 
 
 @router.get("/{portfolio_id}/summary")
-def get_portfolio_summary(portfolio_id: str):
+async def get_portfolio_summary(portfolio_id: str):
     """
     Get comprehensive summary statistics for a portfolio.
     
@@ -111,12 +114,16 @@ def get_portfolio_summary(portfolio_id: str):
     - Position count
     - Transaction count
     - Total dividend income
+    - Summary version (increases on every write to the portfolio)
+    
+    Transaction writes update the summary together with positions; pass
+    `wait_for_positions=true` on the write to read it back right away.
     """
-    return position_service.get_portfolio_summary(portfolio_id)
+    return await position_service.get_portfolio_summary(portfolio_id)
 
 
 @router.get("/{portfolio_id}/allocation")
-def get_portfolio_allocation(portfolio_id: str):
+async def get_portfolio_allocation(portfolio_id: str):
     """
     Get comprehensive asset allocation breakdown.
     
@@ -129,20 +136,20 @@ def get_portfolio_allocation(portfolio_id: str):
     - Percentage of portfolio
     - Number of positions
     """
-    return position_service.get_comprehensive_allocation(portfolio_id)
+    return await position_service.get_comprehensive_allocation(portfolio_id)
 
 
 @router.get("/{portfolio_id}/allocation/sector")
-def get_sector_allocation(portfolio_id: str):
+async def get_sector_allocation(portfolio_id: str):
     """
     Get allocation breakdown by sector only.
     """
-    return position_service.get_allocation_by_sector(portfolio_id)
+    return await position_service.get_allocation_by_sector(portfolio_id)
 
 
 @router.get("/{portfolio_id}/allocation/industry")
-def get_industry_allocation(portfolio_id: str):
+async def get_industry_allocation(portfolio_id: str):
     """
     Get allocation breakdown by industry only.
     """
-    return position_service.get_allocation_by_industry(portfolio_id)
\ No newline at end of file
+    return await position_service.get_allocation_by_industry(portfolio_id)
\ No newline at end of file
@@ -13,7 +13,7 @@ position_service = PositionService()
 
 
 @router.get("", response_model=List[Position])
-def get_positions(
+async def get_positions(
     portfolio_id: str = Query(..., description="Portfolio UUID"),
     symbol: Optional[str] = Query(None, description="Filter by symbol")
 ):
@@ -31,14 +31,14 @@ def get_positions(
     - Percentage gain/loss
     - Asset metadata (name, sector, industry)
     """
-    return position_service.get_positions(
+    return await position_service.get_positions(
         portfolio_id=portfolio_id,
         symbol=symbol
     )
 
 
 @router.get("/{position_id}", response_model=Position)
-def get_position(position_id: str):
+async def get_position(position_id: str):
     """
     Get a specific position by ID.
     
@@ -47,4 +47,4 @@ def get_position(position_id: str):
     
     Returns position with asset information and calculated values.
     """
-    return position_service.get_position(position_id)
\ No newline at end of file
+    return await position_service.get_position(position_id)
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Price history API endpoints.
+Reads from the local memory-mapped price store (no database round trip)
+and bulk updates of position prices.
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from app.models.schemas import BulkPriceUpdate, BulkPriceUpdateResult, PriceBar, PriceSeries, PriceStoreInfo
+from app.services.price_service import PriceService
+from app.services.price_store import PRICE_FIELDS, price_store
+from typing import Dict, Optional
+from decimal import Decimal
+from datetime import date
+import numpy as np
+
+router = APIRouter(prefix="/prices", tags=["prices"])
+price_service = PriceService()
+
+
+@router.get("/", response_model=PriceStoreInfo)
+def get_price_store_info():
+    """
+    Get the ticker count and date range of the local price store.
+    
+    The store is built offline from CSV files:
+```bash
+    python -m app.services.price_store build ./csv_dir
+```
+    """
+    return price_store.info()
+
+
+@router.post("/reload", response_model=PriceStoreInfo)
+def reload_price_store():
+    """
+    Reopen the price store files after a rebuild.
+    """
+    price_store.reload()
+    return price_store.info()
+
+
+@router.post("/bulk", response_model=BulkPriceUpdateResult)
+def bulk_update_prices(update: BulkPriceUpdate):
+    """
+    Set the current price of every position holding the quoted tickers.
+    
+    All portfolios are updated in one set-based database statement, and
+    the summaries of the affected portfolios are refreshed in the same
+    call, so a market-close refresh is one request however many tickers
+    it carries. Tickers no position holds are returned in
+    unmatched_symbols.
+    
+    **Example request:**
+```json
+    {
+      "quotes": {"AAPL": 189.5, "MSFT": 415.1},
+      "priced_at": "2024-06-28T20:00:00Z"
+    }
+```
+    """
+    return price_service.apply_quotes(update)
+
+
+@router.get("/closes", response_model=Dict[str, Decimal])
+def get_closes(
+    tickers: str = Query(..., description="Comma-separated tickers (e.g. AAPL,MSFT)"),
+    price_date: date = Query(..., alias="date", description="Day to look up")
+):
+    """
+    Get the close of several tickers on a day.
+    
+    Uses the last close on or before the day (weekends and holidays are
+    forward-filled). Tickers without a price are left out.
+    
+    **Example request:**
+```bash
+    curl "http://localhost:8000/prices/closes?tickers=AAPL,MSFT&date=2024-06-28"
+```
+    """
+    symbols = [ticker.strip() for ticker in tickers.split(",") if ticker.strip()]
+    return price_store.get_closes(symbols, price_date)
+
+
+@router.get("/{ticker}", response_model=PriceSeries)
+def get_price_series(
+    ticker: str,
+    start_date: Optional[date] = Query(None, alias="from", description="First day to include"),
+    end_date: Optional[date] = Query(None, alias="to", description="Last day to include")
+):
+    """
+    Get the daily open/high/low/close series of a ticker.
+    
+    **Example request:**
+```bash
+    curl "http://localhost:8000/prices/AAPL?from=2024-01-01&to=2024-03-31"
+```
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    
+    if not price_store.has_ticker(ticker):
+        raise HTTPException(status_code=404, detail=f"No price history for {ticker.upper()}")
+    
+    days, series = price_store.get_series(ticker, start_date, end_date, fields=PRICE_FIELDS)
+    # NaN (no trade that day) -> None
+    columns = {
+        field: np.where(np.isnan(values), None, values).tolist()
+        for field, values in series.items()
+    }
+    
+    return PriceSeries(
+        ticker=ticker.upper(),
+        bars=[
+            PriceBar(price_date=day, **{field: columns[field][i] for field in PRICE_FIELDS})
+            for i, day in enumerate(days.tolist())
+        ]
+    )
@@ -0,0 +1,51 @@
+"""
+Performance snapshot API endpoints.
+Daily snapshot runs and portfolio value history.
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from app.models.schemas import PerformanceSnapshot
+from app.services.snapshot_service import SnapshotService
+from typing import List, Optional
+from datetime import date
+
+router = APIRouter(tags=["snapshots"])
+snapshot_service = SnapshotService()
+
+
+@router.post("/snapshots/run")
+def run_snapshots(
+    through: Optional[date] = Query(None, description="Last day to snapshot (default: today)")
+):
+    """
+    Write daily performance snapshots for all portfolios.
+    
+    Each portfolio is backfilled from the day after its last snapshot, so
+    this can be called once a day by a scheduler and catches up missed days.
+    Rows are upserted in chunks as they are built. A portfolio last
+    snapshotted yesterday is snapshotted from its stored positions; after a
+    longer gap its ledger is replayed to rebuild the missing days.
+    
+    **Example:**
+```bash
+    curl -X POST "http://localhost:8000/snapshots/run"
+```
+    """
+    return snapshot_service.run_snapshots(through=through)
+
+
+@router.get("/portfolios/{portfolio_id}/history", response_model=List[PerformanceSnapshot])
+async def get_portfolio_history(
+    portfolio_id: str,
+    start_date: Optional[date] = Query(None, alias="from", description="First day to include"),
+    end_date: Optional[date] = Query(None, alias="to", description="Last day to include")
+):
+    """
+    Get daily value, cost and P&L points for a portfolio.
+    
+    Returns stored snapshots ordered by date (oldest first).
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    
+    return await snapshot_service.get_history(portfolio_id, start_date=start_date, end_date=end_date)
@@ -3,7 +3,7 @@ Transaction API endpoints.
 Updated to support new transaction types.
 """
 
-from fastapi import APIRouter, Query, status
+from fastapi import APIRouter, Query, Response, status
 from app.models.schemas import (
     Transaction,
     TransactionCreate,
@@ -11,6 +11,7 @@ from app.models.schemas import (
     SuccessResponse
 )
 from app.services.transaction_service import TransactionService
+from app.utils.pagination import NEXT_CURSOR_HEADER
 from typing import List, Optional
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
@@ -18,7 +19,10 @@ transaction_service = TransactionService()
 
 
 @router.post("", response_model=Transaction, status_code=status.HTTP_201_CREATED)
-def create_transaction(transaction_data: TransactionCreate):
+def create_transaction(
+    transaction_data: TransactionCreate,
+    wait_for_positions: bool = Query(False, description="Wait until positions include this transaction")
+):
     """
     Create a new transaction.
     
@@ -26,9 +30,9 @@ def create_transaction(transaction_data: TransactionCreate):
     - `buy`: Purchase assets
     - `sell`: Sell assets
     - `dividend`: Dividend payment (use /dividends endpoint instead)
-    - `split`: Stock split
-    - `transfer_in`: Transfer assets into portfolio
-    - `transfer_out`: Transfer assets out of portfolio
+    - `split`: Stock split (`quantity` is the split ratio, e.g. 2 for 2-for-1)
+    - `transfer_in`: Transfer assets into portfolio (`price` is the carried cost per unit)
+    - `transfer_out`: Transfer assets out of portfolio (removes cost basis, no realized gain)
     
     **Example request (buy):**
 ```json
@@ -46,17 +50,24 @@ def create_transaction(transaction_data: TransactionCreate):
     
     **Note:** 
     - Asset is created automatically if it doesn't exist
-    - Positions are automatically recalculated after transaction
+    - Positions are automatically recalculated after transaction. Writes
+      arriving close together are merged into one recalculation; pass
+      `wait_for_positions=true` to return only once positions are updated.
     """
-    return transaction_service.create_transaction(transaction_data)
+    return transaction_service.create_transaction(
+        transaction_data,
+        wait_for_positions=wait_for_positions
+    )
 
 
 @router.get("", response_model=List[Transaction])
-def get_transactions(
+async def get_transactions(
+    response: Response,
     portfolio_id: Optional[str] = Query(None, description="Filter by portfolio"),
     symbol: Optional[str] = Query(None, description="Filter by symbol"),
     transaction_type: Optional[str] = Query(None, description="Filter by type (buy, sell, etc.)"),
-    limit: int = Query(100, ge=1, le=1000, description="Maximum number of results")
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of results"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page")
 ):
     """
     Get transactions with optional filters.
@@ -66,15 +77,24 @@ def get_transactions(
     - `symbol`: Only show transactions for this symbol
     - `transaction_type`: Filter by type (buy, sell, dividend, etc.)
     - `limit`: Maximum number of transactions to return (default: 100)
+    - `cursor`: Value of the `X-Next-Cursor` header from the previous page
     
-    Returns transactions ordered by date (newest first).
+    Returns transactions ordered by date (newest first). If more results
+    exist, the `X-Next-Cursor` response header holds the cursor for the
+    next page.
     """
-    return transaction_service.get_transactions(
+    transactions, next_cursor = await transaction_service.get_transactions_page(
         portfolio_id=portfolio_id,
         symbol=symbol,
         transaction_type=transaction_type,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
+    
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
+    return transactions
 
 
 @router.get("/{transaction_id}", response_model=Transaction)
@@ -89,7 +109,11 @@ def get_transaction(transaction_id: str):
 
 
 @router.put("/{transaction_id}", response_model=Transaction)
-def update_transaction(transaction_id: str, transaction_data: TransactionUpdate):
+def update_transaction(
+    transaction_id: str,
+    transaction_data: TransactionUpdate,
+    wait_for_positions: bool = Query(False, description="Wait until positions reflect the update")
+):
     """
     Update a transaction.
     
@@ -106,16 +130,28 @@ def update_transaction(transaction_id: str, transaction_data: TransactionUpdate)
     
     All fields are optional - only include fields you want to update.
     
-    **Note:** After updating, positions are automatically recalculated.
+    **Note:** After updating, positions are automatically recalculated
+    (use `wait_for_positions=true` to wait for it).
     """
-    return transaction_service.update_transaction(transaction_id, transaction_data)
+    return transaction_service.update_transaction(
+        transaction_id,
+        transaction_data,
+        wait_for_positions=wait_for_positions
+    )
 
 
 @router.delete("/{transaction_id}", response_model=SuccessResponse)
-def delete_transaction(transaction_id: str):
+def delete_transaction(
+    transaction_id: str,
+    wait_for_positions: bool = Query(False, description="Wait until positions reflect the deletion")
+):
     """
     Delete a transaction.
     
-    **Note:** After deleting, positions are automatically recalculated.
+    **Note:** After deleting, positions are automatically recalculated
+    (use `wait_for_positions=true` to wait for it).
     """
-    return transaction_service.delete_transaction(transaction_id)
\ No newline at end of file
+    return transaction_service.delete_transaction(
+        transaction_id,
+        wait_for_positions=wait_for_positions
+    )
\ No newline at end of file
@@ -21,6 +21,32 @@ class Settings(BaseSettings):
     api_host: str = Field(default="0.0.0.0", description="API host")
     api_port: int = Field(default=8000, description="API port")
     
+    # CSV import settings
+    csv_import_chunk_size: int = Field(default=1000, description="Rows validated and written per CSV import chunk")
+    csv_import_max_errors: int = Field(default=1000, description="Maximum row errors reported per CSV import")
+    import_job_workers: int = Field(default=2, description="Background threads running CSV import jobs")
+    import_job_retention_hours: int = Field(default=24, description="Hours finished import jobs stay queryable")
+    
+    # Position recompute settings
+    position_recompute_delay_ms: int = Field(default=250, description="Window for merging position recomputes per portfolio (0 = recompute immediately)")
+    position_recompute_wait_seconds: float = Field(default=30, description="Maximum time a write waits for its position recompute")
+    
+    # Cache settings
+    asset_cache_size: int = Field(default=10000, description="Maximum assets kept in the in-process asset cache")
+    asset_cache_ttl_seconds: int = Field(default=300, description="Seconds an asset stays in the in-process cache")
+    portfolio_cache_ttl_seconds: int = Field(default=300, description="Seconds a known portfolio id stays in the existence cache")
+    asset_search_refresh_seconds: int = Field(default=600, description="Seconds between full reloads of the in-process asset search index")
+    
+    # Export settings
+    export_page_size: int = Field(default=1000, description="Rows read per database page while streaming an export")
+    
+    # Snapshot settings
+    snapshot_backfill_max_days: int = Field(default=3650, description="Maximum days a snapshot run backfills for one portfolio")
+    returns_cache_ttl_seconds: int = Field(default=300, description="Seconds a loaded return series stays in the in-process cache")
+    
+    # Price store settings
+    price_store_path: str = Field(default="data/prices", description="Directory of the memory-mapped price history store")
+    
     # Environment
     environment: str = Field(default="development", description="Environment name")
     
@@ -3,9 +3,11 @@ Database connection and client setup.
 Provides a Supabase client for the application.
 """
 
-from supabase import create_client, Client
+from supabase import create_client, Client, acreate_client, AsyncClient
 from functools import lru_cache
+from typing import Optional
 from .config import get_settings
+import asyncio
 
 
 @lru_cache()
@@ -37,6 +39,43 @@ def get_supabase_client() -> Client:
         raise
 
 
+_async_client: Optional[AsyncClient] = None
+_async_client_lock = asyncio.Lock()
+
+
+async def get_async_supabase_client() -> AsyncClient:
+    """
+    Create and return an async Supabase client.
+    Used by async endpoints so database round trips don't hold a threadpool
+    thread. Only one client instance is created per process.
+    
+    Returns:
+        Async Supabase client connected to your project
+    
+    Raises:
+        Exception: If connection fails
+    """
+    global _async_client
+    
+    if _async_client is None:
+        async with _async_client_lock:
+            if _async_client is None:
+                settings = get_settings()
+                
+                try:
+                    _async_client = await acreate_client(
+                        supabase_url=settings.supabase_url,
+                        supabase_key=settings.supabase_key
+                    )
+                    print("✅ Successfully created async Supabase client!")
+                    
+                except Exception as e:
+                    print(f"❌ Failed to create async Supabase client: {e}")
+                    raise
+    
+    return _async_client
+
+
 # Test function (we'll use this to verify connection)
 def test_connection():
     """
@@ -6,9 +6,10 @@ Updated for Phase 1 with complete schema support.
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
-from app.database import get_supabase_client
+from app.database import get_supabase_client, get_async_supabase_client
 from app.models.schemas import SuccessResponse
-from typing import Dict
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from typing import Any, Dict
 import logging
 
 # Import all routers
@@ -18,6 +19,11 @@ from app.api.transactions import router as transactions_router
 from app.api.positions import router as positions_router
 from app.api.cash_movements import router as cash_router
 from app.api.dividends import router as dividends_router
+from app.api.imports import router as imports_router
+from app.api.exports import router as exports_router
+from app.api.analytics import router as analytics_router
+from app.api.snapshots import router as snapshots_router
+from app.api.prices import router as prices_router
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -42,6 +48,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include all routers
@@ -51,13 +58,18 @@ app.include_router(transactions_router)
 app.include_router(positions_router)
 app.include_router(cash_router)
 app.include_router(dividends_router)
+app.include_router(imports_router)
+app.include_router(exports_router)
+app.include_router(analytics_router)
+app.include_router(snapshots_router)
+app.include_router(prices_router)
 
 # ================================================
 # HEALTH CHECK ENDPOINTS
 # ================================================
 
 @app.get("/")
-def read_root() -> Dict[str, str]:
+def read_root() -> Dict[str, Any]:
     """
     Root endpoint - confirms API is running.
     """
@@ -72,7 +84,11 @@ def read_root() -> Dict[str, str]:
             "Cash flow management",
             "Dividend tracking",
             "Asset allocation analysis",
-            "CSV import from brokers"
+            "CSV import from brokers",
+            "Streaming ledger export",
+            "Daily performance history",
+            "Returns and risk metrics",
+            "Local price history store"
         ]
     }
 
@@ -108,6 +124,7 @@ async def startup_event():
     
     try:
         supabase = get_supabase_client()
+        await get_async_supabase_client()
         logger.info("✅ Database connection successful!")
         logger.info("✅ All services initialized!")
         logger.info("✅ API endpoints registered!")
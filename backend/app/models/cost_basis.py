@@ -0,0 +1,18 @@
+"""
+Cost basis methods a portfolio can use to match sells against lots.
+Shared by the request schemas and the position engine.
+"""
+
+COST_BASIS_AVERAGE = "average"
+COST_BASIS_FIFO = "fifo"
+COST_BASIS_LIFO = "lifo"
+COST_BASIS_HIFO = "hifo"
+COST_BASIS_SPECIFIC_ID = "specific_id"
+
+COST_BASIS_METHODS = [
+    COST_BASIS_AVERAGE,
+    COST_BASIS_FIFO,
+    COST_BASIS_LIFO,
+    COST_BASIS_HIFO,
+    COST_BASIS_SPECIFIC_ID
+]
@@ -4,20 +4,33 @@ Updated to match new database schema with assets table and additional features.
 """
 
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime, date
 from decimal import Decimal
+from app.models.cost_basis import COST_BASIS_METHODS
 
 
 # ================================================
 # PORTFOLIO SCHEMAS
 # ================================================
 
+def _validate_cost_basis_method(value: Optional[str]) -> Optional[str]:
+    """Lowercase a cost basis method and check that it is a known one"""
+    if value is None:
+        return value
+    if value.lower() not in COST_BASIS_METHODS:
+        raise ValueError(f'cost_basis_method must be one of: {", ".join(COST_BASIS_METHODS)}')
+    return value.lower()
+
+
 class PortfolioBase(BaseModel):
     """Base portfolio schema with common fields"""
     name: str = Field(..., min_length=1, max_length=100, description="Portfolio name")
     description: Optional[str] = Field(None, max_length=500, description="Portfolio description")
     currency: str = Field(default="USD", min_length=3, max_length=3, description="Currency code (USD, EUR, GBP)")
+    cost_basis_method: str = Field(default="average", description="Lot matching for sells: average, fifo, lifo, hifo, specific_id")
+    
+    validate_cost_basis_method = validator('cost_basis_method')(_validate_cost_basis_method)
 
 
 class PortfolioCreate(PortfolioBase):
@@ -34,6 +47,9 @@ class PortfolioUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     description: Optional[str] = Field(None, max_length=500)
     currency: Optional[str] = Field(None, min_length=3, max_length=3)
+    cost_basis_method: Optional[str] = None
+    
+    validate_cost_basis_method = validator('cost_basis_method')(_validate_cost_basis_method)
 
 
 class Portfolio(PortfolioBase):
@@ -77,6 +93,11 @@ class AssetUpdate(BaseModel):
     exchange: Optional[str] = Field(None, max_length=50)
 
 
+class AssetBatchRequest(BaseModel):
+    """Schema for resolving many assets at once"""
+    tickers: List[str] = Field(..., min_length=1, max_length=10000, description="Ticker symbols to resolve")
+
+
 class Asset(AssetBase):
     """Complete asset schema with database fields"""
     created_at: datetime
@@ -90,6 +111,12 @@ class Asset(AssetBase):
 # TRANSACTION SCHEMAS
 # ================================================
 
+class LotSelection(BaseModel):
+    """Lot to sell from, for portfolios using specific-ID cost basis"""
+    transaction_id: str = Field(..., description="ID of the buy transaction that opened the lot")
+    quantity: Decimal = Field(..., gt=0, description="Quantity to sell from this lot")
+
+
 class TransactionBase(BaseModel):
     """
     Base transaction schema.
@@ -102,6 +129,7 @@ class TransactionBase(BaseModel):
     fees: Optional[Decimal] = Field(default=Decimal("0"), ge=0, description="Transaction fees")
     transaction_date: datetime = Field(..., description="Date/time of transaction")
     notes: Optional[str] = Field(None, description="Optional notes")
+    lot_selection: Optional[List[LotSelection]] = Field(None, description="Lots to sell from (sells in specific-ID portfolios)")
     
     @validator('transaction_type')
     def validate_transaction_type(cls, v):
@@ -131,6 +159,7 @@ class TransactionUpdate(BaseModel):
     fees: Optional[Decimal] = Field(None, ge=0)
     transaction_date: Optional[datetime] = None
     notes: Optional[str] = None
+    lot_selection: Optional[List[LotSelection]] = None
     
     @validator('transaction_type')
     def validate_transaction_type(cls, v):
@@ -290,6 +319,14 @@ class CSVImportRequest(BaseModel):
     csv_data: str = Field(..., description="CSV file content as string")
 
 
+class CSVImportChunkProgress(BaseModel):
+    """Progress after one chunk of a streamed CSV import (counts are cumulative)"""
+    chunk: int
+    rows_processed: int
+    imported_count: int
+    failed_count: int
+
+
 class CSVImportResponse(BaseModel):
     """Schema for CSV import response"""
     success: bool
@@ -297,6 +334,25 @@ class CSVImportResponse(BaseModel):
     failed_count: int
     errors: List[str] = []
     transactions: List[Transaction] = []
+    chunks: List[CSVImportChunkProgress] = []
+
+
+class ImportJob(BaseModel):
+    """Status of a background CSV import job"""
+    id: str
+    portfolio_id: str
+    broker_format: str
+    status: str  # queued, running, completed, failed, cancelled
+    total_rows: Optional[int] = None
+    rows_processed: int = 0
+    rows_remaining: Optional[int] = None
+    imported_count: int = 0
+    failed_count: int = 0
+    errors: List[str] = []
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
 
 # ================================================
@@ -316,6 +372,124 @@ class PortfolioSummary(BaseModel):
     transaction_count: int
     dividend_income: Decimal  # NEW: Total dividends
     last_updated: datetime
+    version: Optional[int] = None  # Materialized summary version (None if computed live)
+
+
+class RealizedGainGroup(BaseModel):
+    """Realized gains for one symbol, month or year"""
+    key: str  # symbol, YYYY-MM or YYYY
+    quantity: Decimal
+    cost_basis: Decimal
+    proceeds: Decimal
+    realized_gain: Decimal
+    short_term_gain: Decimal
+    long_term_gain: Decimal
+    sell_count: int
+
+
+class RealizedGainsReport(BaseModel):
+    """Realized P&L report for a portfolio"""
+    portfolio_id: str
+    group_by: str
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    total_cost_basis: Decimal
+    total_proceeds: Decimal
+    total_realized_gain: Decimal
+    groups: List[RealizedGainGroup]
+
+
+class PortfolioReturns(BaseModel):
+    """Time-weighted and money-weighted returns over a period (fractions, 0.05 = 5%)"""
+    portfolio_id: str
+    period: str
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    snapshot_count: int
+    time_weighted_return: Optional[float] = None
+    annualized_time_weighted_return: Optional[float] = None  # Periods of a year or more
+    money_weighted_return: Optional[float] = None  # XIRR, annualized
+
+
+class PortfolioRisk(BaseModel):
+    """Risk metrics over a period (fractions, VaR/CVaR as positive one-day losses)"""
+    portfolio_id: str
+    period: str
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    observation_count: int  # Daily returns used
+    confidence: float
+    risk_free_rate: float
+    benchmark_portfolio_id: Optional[str] = None
+    benchmark: Optional[str] = None  # Benchmark ticker from the price store
+    annualized_return: Optional[float] = None
+    annualized_volatility: Optional[float] = None
+    sharpe_ratio: Optional[float] = None
+    sortino_ratio: Optional[float] = None
+    max_drawdown: Optional[float] = None
+    max_drawdown_peak_date: Optional[date] = None
+    max_drawdown_trough_date: Optional[date] = None
+    var_historical: Optional[float] = None
+    cvar_historical: Optional[float] = None
+    var_parametric: Optional[float] = None
+    cvar_parametric: Optional[float] = None
+    beta: Optional[float] = None
+
+
+# ================================================
+# PRICE HISTORY SCHEMAS
+# ================================================
+
+class PriceStoreInfo(BaseModel):
+    """Contents of the local price store"""
+    available: bool
+    ticker_count: int
+    first_day: Optional[date] = None
+    last_day: Optional[date] = None
+
+
+class PriceBar(BaseModel):
+    """Daily prices of one ticker (close is forward-filled)"""
+    price_date: date
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    close: Optional[float] = None
+
+
+class PriceSeries(BaseModel):
+    """Daily price series of one ticker"""
+    ticker: str
+    bars: List[PriceBar]
+
+
+class BulkPriceUpdate(BaseModel):
+    """Batch of ticker -> price quotes applied to all positions"""
+    quotes: Dict[str, Decimal] = Field(..., description="Ticker -> price (e.g. {\"AAPL\": 189.5})")
+    priced_at: Optional[datetime] = Field(None, description="Quote time stored as last_price_update (default: now)")
+    
+    @validator('quotes')
+    def validate_quotes(cls, v):
+        """Uppercase tickers and require positive prices"""
+        if not v:
+            raise ValueError('quotes must not be empty')
+        quotes = {}
+        for ticker, price in v.items():
+            if not ticker.strip():
+                raise ValueError('tickers must not be empty')
+            if price <= 0:
+                raise ValueError(f'price for {ticker} must be positive')
+            quotes[ticker.upper().strip()] = price
+        return quotes
+
+
+class BulkPriceUpdateResult(BaseModel):
+    """Outcome of a bulk price update"""
+    quote_count: int
+    updated_positions: int
+    portfolio_count: int
+    unmatched_symbols: List[str]
+    priced_at: datetime
 
 
 class AllocationItem(BaseModel):
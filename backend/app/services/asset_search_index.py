@@ -0,0 +1,249 @@
+"""
+Asset search index - in-process index for asset autocomplete.
+Answers ticker/name searches from memory instead of running an
+`ilike '%q%'` scan in the database for every keystroke.
+"""
+
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from app.models.schemas import Asset
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Result ranks, best first
+RANK_TICKER_EXACT = 0
+RANK_TICKER_PREFIX = 1
+RANK_NAME_WORD_PREFIX = 2
+RANK_TICKER_CONTAINS = 3
+RANK_NAME_CONTAINS = 4
+
+
+def _trigrams(text: str) -> Set[str]:
+    """All 3-character substrings of text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class AssetSearchIndex:
+    """
+    Ranked ticker/name search over all assets.
+
+    - Ticker prefixes use a sorted ticker list (binary search, so a prefix
+      lookup is O(log n + matches)).
+    - Name word prefixes use a sorted list of (word, ticker) pairs.
+    - Substring matches of 3+ characters use a trigram index over ticker
+      and name, verified against the text.
+
+    The index is loaded lazily, updated in place on asset writes and fully
+    reloaded after refresh_interval_seconds to pick up writes made by other
+    processes. Reloads build a new index off to the side and swap it in;
+    upserts made while a reload is running are replayed onto the new index
+    so they are not lost.
+    """
+
+    def __init__(self, refresh_interval_seconds: float):
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._loading = False
+        self._pending: Dict[str, Asset] = {}
+        self._assets: Dict[str, Asset] = {}
+        self._texts: Dict[str, str] = {}
+        self._tickers: List[str] = []
+        self._words: List[Tuple[str, str]] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+
+    @property
+    def needs_load(self) -> bool:
+        """True if the index was never loaded or is due for a full reload"""
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > self.refresh_interval_seconds
+        )
+
+    @property
+    def is_loaded(self) -> bool:
+        """True once the index has been loaded (it may be due for a reload)"""
+        return self._loaded_at is not None
+
+    def reload(self, fetch_assets: Callable[[], Iterable[Asset]], background: bool = True) -> bool:
+        """
+        Reload the whole index from fetch_assets.
+
+        Searches keep using the current index until the new one is swapped
+        in. Upserts from the moment the reload starts are recorded and
+        re-applied to the new index, since the fetch may not include them.
+
+        Args:
+            fetch_assets: Returns all assets (called once, in the reload thread)
+            background: Run in a daemon thread instead of the calling one
+
+        Returns:
+            False if a reload was already running (nothing was started)
+        """
+        with self._lock:
+            if self._loading:
+                return False
+            self._loading = True
+            self._pending = {}
+
+        if not background:
+            self._run_reload(fetch_assets)
+            return True
+
+        threading.Thread(
+            target=self._run_reload,
+            args=(fetch_assets,),
+            kwargs={"raise_errors": False},
+            name="asset-search-reload",
+            daemon=True
+        ).start()
+        return True
+
+    def load(self, assets: Iterable[Asset]) -> None:
+        """Replace the whole index with the given assets (plus upserts recorded during a reload)"""
+        index = AssetSearchIndex(self.refresh_interval_seconds)
+        for asset in assets:
+            index._add(asset)
+        index._tickers.sort()
+        index._words.sort()
+
+        with self._lock:
+            for asset in self._pending.values():
+                index._upsert(asset)
+            self._pending = {}
+
+            self._assets = index._assets
+            self._texts = index._texts
+            self._tickers = index._tickers
+            self._words = index._words
+            self._trigrams = index._trigrams
+            self._loaded_at = time.monotonic()
+            self._loading = False
+
+    def upsert(self, asset: Asset) -> None:
+        """Add or replace one asset (only recorded for the reload until the index is loaded)"""
+        with self._lock:
+            if self._loading:
+                self._pending[asset.ticker] = asset
+            if self._loaded_at is not None:
+                self._upsert(asset)
+
+    def search(self, query: str, limit: int = 50) -> List[Asset]:
+        """
+        Search assets by ticker or name.
+
+        Args:
+            query: Search text (case-insensitive)
+            limit: Maximum number of results
+
+        Returns:
+            Matching assets, best matches first
+        """
+        needle = query.strip().lower()
+        if not needle:
+            return []
+
+        ticker_prefix = needle.upper()
+        ranks: Dict[str, int] = {}
+
+        def add(ticker: str, rank: int):
+            if rank < ranks.get(ticker, RANK_NAME_CONTAINS + 1):
+                ranks[ticker] = rank
+
+        with self._lock:
+            # Ticker prefix matches
+            i = bisect_left(self._tickers, ticker_prefix)
+            while i < len(self._tickers) and self._tickers[i].startswith(ticker_prefix):
+                ticker = self._tickers[i]
+                add(ticker, RANK_TICKER_EXACT if ticker == ticker_prefix else RANK_TICKER_PREFIX)
+                i += 1
+
+            # Name word prefix matches (lower ranks can't make the cut once
+            # the limit is already filled by better matches)
+            i = bisect_left(self._words, (needle, ""))
+            while len(ranks) < limit and i < len(self._words) and self._words[i][0].startswith(needle):
+                add(self._words[i][1], RANK_NAME_WORD_PREFIX)
+                i += 1
+
+            # Substring matches through the trigram index
+            if len(ranks) < limit and len(needle) >= 3:
+                candidates = None
+                for trigram in _trigrams(needle):
+                    tickers = self._trigrams.get(trigram, set())
+                    candidates = tickers if candidates is None else candidates & tickers
+                    if not candidates:
+                        break
+
+                for ticker in candidates or ():
+                    if needle in ticker.lower():
+                        add(ticker, RANK_TICKER_CONTAINS)
+                    elif needle in self._texts[ticker]:
+                        add(ticker, RANK_NAME_CONTAINS)
+
+            best = heapq.nsmallest(limit, ranks.items(), key=lambda item: (item[1], len(item[0]), item[0]))
+            return [self._assets[ticker] for ticker, _ in best]
+
+    def _run_reload(self, fetch_assets: Callable[[], Iterable[Asset]], raise_errors: bool = True) -> None:
+        try:
+            self.load(fetch_assets())
+            logger.info(f"Loaded asset search index: {len(self._assets)} assets")
+        except Exception as e:
+            with self._lock:
+                self._loading = False
+                self._pending = {}
+            if raise_errors:
+                raise
+            logger.error(f"Error reloading asset search index: {e}")
+
+    def _upsert(self, asset: Asset) -> None:
+        """Add or replace one asset in the sorted structures (caller holds the lock)"""
+        if asset.ticker in self._assets:
+            self._remove(asset.ticker)
+
+        insort(self._tickers, asset.ticker)
+        for word in self._name_words(asset):
+            insort(self._words, (word, asset.ticker))
+        self._index_text(asset)
+
+    def _add(self, asset: Asset) -> None:
+        """Add an asset to unsorted structures (used while bulk loading)"""
+        self._tickers.append(asset.ticker)
+        self._words.extend((word, asset.ticker) for word in self._name_words(asset))
+        self._index_text(asset)
+
+    def _index_text(self, asset: Asset) -> None:
+        text = f"{asset.ticker.lower()} {(asset.name or '').lower()}"
+        self._assets[asset.ticker] = asset
+        self._texts[asset.ticker] = text
+        for trigram in _trigrams(text):
+            self._trigrams.setdefault(trigram, set()).add(asset.ticker)
+
+    def _remove(self, ticker: str) -> None:
+        old = self._assets.pop(ticker)
+        text = self._texts.pop(ticker)
+
+        i = bisect_left(self._tickers, ticker)
+        if i < len(self._tickers) and self._tickers[i] == ticker:
+            del self._tickers[i]
+
+        for word in self._name_words(old):
+            i = bisect_left(self._words, (word, ticker))
+            if i < len(self._words) and self._words[i] == (word, ticker):
+                del self._words[i]
+
+        for trigram in _trigrams(text):
+            tickers = self._trigrams.get(trigram)
+            if tickers is not None:
+                tickers.discard(ticker)
+                if not tickers:
+                    del self._trigrams[trigram]
+
+    def _name_words(self, asset: Asset) -> Set[str]:
+        return set(TOKEN_PATTERN.findall((asset.name or "").lower()))
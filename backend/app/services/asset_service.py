@@ -3,14 +3,29 @@ Asset service - handles asset (stocks, crypto, etc.) management.
 Assets are stored in a separate lookup table for metadata like sector, industry, etc.
 """
 
+from app.config import get_settings
 from app.database import get_supabase_client
 from app.models.schemas import AssetCreate, AssetUpdate, Asset
+from app.services.asset_search_index import AssetSearchIndex
+from app.utils.cache import TTLCache
 from typing import List, Optional
 from fastapi import HTTPException
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Shared by all AssetService instances: ticker -> Asset, and limit -> List[Asset]
+_settings = get_settings()
+_asset_cache = TTLCache(maxsize=_settings.asset_cache_size, ttl_seconds=_settings.asset_cache_ttl_seconds)
+_asset_list_cache = TTLCache(maxsize=16, ttl_seconds=_settings.asset_cache_ttl_seconds)
+
+_search_index = AssetSearchIndex(refresh_interval_seconds=_settings.asset_search_refresh_seconds)
+_search_index_lock = threading.Lock()
+
+# Tickers per request when resolving assets in batch
+ASSET_BATCH_SIZE = 1000
+
 
 class AssetService:
     """Service class for asset operations"""
@@ -35,6 +50,10 @@ class AssetService:
         try:
             ticker = ticker.upper().strip()
             
+            cached = _asset_cache.get(ticker)
+            if cached is not None:
+                return cached
+            
             # Try to get existing asset
             response = self.supabase.table("assets")\
                 .select("*")\
@@ -42,7 +61,7 @@ class AssetService:
                 .execute()
             
             if response.data:
-                return Asset(**response.data[0])
+                return self._cache_asset(Asset(**response.data[0]))
             
             # Asset doesn't exist, create it
             if asset_data:
@@ -61,7 +80,7 @@ class AssetService:
                 raise HTTPException(status_code=500, detail=f"Failed to create asset: {ticker}")
             
             logger.info(f"Created new asset: {ticker}")
-            return Asset(**create_response.data[0])
+            return self._asset_written(Asset(**create_response.data[0]))
             
         except HTTPException:
             raise
@@ -69,6 +88,62 @@ class AssetService:
             logger.error(f"Error in get_or_create_asset: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
+    def get_or_create_assets(self, tickers: List[str]) -> List[Asset]:
+        """
+        Resolve many tickers at once, creating minimal assets for unknown ones.
+        
+        Known tickers are fetched with one `in` filter and missing ones are
+        created with one bulk insert, so resolving 1,000 tickers takes two
+        round trips (fewer when they are cached).
+        
+        Args:
+            tickers: Stock/crypto ticker symbols (duplicates are ignored)
+            
+        Returns:
+            Assets in the order the tickers were first given
+        """
+        try:
+            tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if t and t.strip()))
+            
+            found = {}
+            for ticker in tickers:
+                cached = _asset_cache.get(ticker)
+                if cached is not None:
+                    found[ticker] = cached
+            
+            to_fetch = [t for t in tickers if t not in found]
+            self._fetch_assets_into(to_fetch, found)
+            
+            missing = [t for t in to_fetch if t not in found]
+            if missing:
+                for start in range(0, len(missing), ASSET_BATCH_SIZE):
+                    chunk = missing[start:start + ASSET_BATCH_SIZE]
+                    
+                    # Ignore tickers created concurrently by someone else
+                    create_response = self.supabase.table("assets")\
+                        .upsert(
+                            [{"ticker": t} for t in chunk],
+                            on_conflict="ticker",
+                            ignore_duplicates=True
+                        )\
+                        .execute()
+                    
+                    for row in create_response.data:
+                        found[row["ticker"]] = self._asset_written(Asset(**row))
+                
+                # Pick up anything that was created concurrently
+                self._fetch_assets_into([t for t in missing if t not in found], found)
+                
+                logger.info(f"Created {len(missing)} new assets")
+            
+            return [found[t] for t in tickers if t in found]
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in get_or_create_assets: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+    
     def get_asset(self, ticker: str) -> Asset:
         """
         Get an asset by ticker symbol.
@@ -85,6 +160,10 @@ class AssetService:
         try:
             ticker = ticker.upper().strip()
             
+            cached = _asset_cache.get(ticker)
+            if cached is not None:
+                return cached
+            
             response = self.supabase.table("assets")\
                 .select("*")\
                 .eq("ticker", ticker)\
@@ -96,7 +175,7 @@ class AssetService:
                     detail=f"Asset '{ticker}' not found"
                 )
             
-            return Asset(**response.data[0])
+            return self._cache_asset(Asset(**response.data[0]))
             
         except HTTPException:
             raise
@@ -115,13 +194,19 @@ class AssetService:
             List of assets
         """
         try:
+            cached = _asset_list_cache.get(limit)
+            if cached is not None:
+                return list(cached)
+            
             response = self.supabase.table("assets")\
                 .select("*")\
                 .order("ticker")\
                 .limit(limit)\
                 .execute()
             
-            return [Asset(**a) for a in response.data]
+            assets = [Asset(**a) for a in response.data]
+            _asset_list_cache.set(limit, assets)
+            return list(assets)
             
         except Exception as e:
             logger.error(f"Error fetching assets: {e}")
@@ -147,6 +232,10 @@ class AssetService:
             # Check asset exists
             self.get_asset(ticker)
             
+            # Drop cached copies before writing so no reader keeps the old one
+            _asset_cache.invalidate(ticker)
+            _asset_list_cache.clear()
+            
             # Only include fields that were provided
             update_data = asset_data.model_dump(exclude_unset=True)
             
@@ -163,7 +252,7 @@ class AssetService:
                 raise HTTPException(status_code=500, detail="Failed to update asset")
             
             logger.info(f"Updated asset: {ticker}")
-            return Asset(**response.data[0])
+            return self._asset_written(Asset(**response.data[0]))
             
         except HTTPException:
             raise
@@ -171,28 +260,87 @@ class AssetService:
             logger.error(f"Error updating asset: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    def search_assets(self, query: str) -> List[Asset]:
+    def search_assets(self, query: str, limit: int = 50) -> List[Asset]:
         """
         Search assets by ticker or name.
         
+        Served from the in-process search index, which is loaded on first
+        use and kept up to date by asset writes. Periodic full reloads run
+        in the background while the current index keeps serving. Results
+        are ranked: exact ticker, ticker prefix, name word prefix, then
+        substring matches.
+        
         Args:
             query: Search query
+            limit: Maximum number of results
             
         Returns:
             List of matching assets
         """
         try:
-            query = query.upper().strip()
+            if not _search_index.is_loaded:
+                with _search_index_lock:
+                    # Another request may have loaded it while we waited
+                    if not _search_index.is_loaded:
+                        _search_index.reload(self._fetch_all_assets, background=False)
+            elif _search_index.needs_load:
+                # No-op if a reload is already running
+                _search_index.reload(self._fetch_all_assets)
+            
+            return _search_index.search(query, limit=limit)
             
-            # Search by ticker or name (case-insensitive)
+        except Exception as e:
+            logger.error(f"Error searching assets: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    def cache_stats(self) -> dict:
+        """
+        Get hit/miss counters for the asset caches.
+        
+        Returns:
+            Statistics for the per-ticker and the asset list caches
+        """
+        return {
+            "assets": _asset_cache.stats(),
+            "asset_lists": _asset_list_cache.stats()
+        }
+    
+    def _cache_asset(self, asset: Asset) -> Asset:
+        """Store an asset in the shared cache and return it"""
+        _asset_cache.set(asset.ticker, asset)
+        return asset
+    
+    def _fetch_assets_into(self, tickers: List[str], found: dict):
+        """Fetch existing assets for tickers with `in` filters, caching them into found"""
+        for start in range(0, len(tickers), ASSET_BATCH_SIZE):
             response = self.supabase.table("assets")\
                 .select("*")\
-                .or_(f"ticker.ilike.%{query}%,name.ilike.%{query}%")\
-                .limit(50)\
+                .in_("ticker", tickers[start:start + ASSET_BATCH_SIZE])\
                 .execute()
             
-            return [Asset(**a) for a in response.data]
+            for row in response.data:
+                found[row["ticker"]] = self._cache_asset(Asset(**row))
+    
+    def _asset_written(self, asset: Asset) -> Asset:
+        """Keep caches and the search index in line with a created/updated asset"""
+        _asset_list_cache.clear()
+        _search_index.upsert(asset)
+        return self._cache_asset(asset)
+    
+    def _fetch_all_assets(self, page_size: int = 1000) -> List[Asset]:
+        """Page through the whole assets table"""
+        assets = []
+        start = 0
+        
+        while True:
+            response = self.supabase.table("assets")\
+                .select("*")\
+                .order("ticker")\
+                .range(start, start + page_size - 1)\
+                .execute()
             
-        except Exception as e:
-            logger.error(f"Error searching assets: {e}")
-            raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+            assets.extend(Asset(**a) for a in response.data)
+            
+            if len(response.data) < page_size:
+                return assets
+            start += page_size
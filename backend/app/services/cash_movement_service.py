@@ -2,12 +2,15 @@
 Cash movement service - handles deposits and withdrawals.
 """
 
-from app.database import get_supabase_client
+from app.database import get_supabase_client, get_async_supabase_client
 from app.models.schemas import CashMovementCreate, CashMovement
-from typing import List, Optional
+from app.services.portfolio_service import PortfolioService
+from app.services.portfolio_summary_service import PortfolioSummaryService
+from app.utils.pagination import apply_keyset, split_page
+from typing import List, Optional, Tuple
 from fastapi import HTTPException
 from decimal import Decimal
-from datetime import datetime
+from datetime import date, datetime
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,6 +21,8 @@ class CashMovementService:
     
     def __init__(self):
         self.supabase = get_supabase_client()
+        self.portfolio_service = PortfolioService()
+        self.summary_service = PortfolioSummaryService()
     
     def create_cash_movement(self, movement_data: CashMovementCreate) -> CashMovement:
         """
@@ -34,16 +39,7 @@ class CashMovementService:
         """
         try:
             # Verify portfolio exists
-            portfolio_check = self.supabase.table("portfolios")\
-                .select("id")\
-                .eq("id", movement_data.portfolio_id)\
-                .execute()
-            
-            if not portfolio_check.data:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Portfolio with id '{movement_data.portfolio_id}' not found"
-                )
+            self.portfolio_service.ensure_portfolio_exists(movement_data.portfolio_id)
             
             # Insert cash movement
             response = self.supabase.table("cash_movements")\
@@ -54,6 +50,7 @@ class CashMovementService:
                 raise HTTPException(status_code=500, detail="Failed to create cash movement")
             
             logger.info(f"Created cash movement: {movement_data.type} - ${movement_data.amount}")
+            self.summary_service.refresh_summary(movement_data.portfolio_id)
             return CashMovement(**response.data[0])
             
         except HTTPException:
@@ -62,14 +59,14 @@ class CashMovementService:
             logger.error(f"Error creating cash movement: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    def get_cash_movements(
+    async def get_cash_movements(
         self,
         portfolio_id: str,
         movement_type: Optional[str] = None,
         limit: int = 100
     ) -> List[CashMovement]:
         """
-        Get cash movements for a portfolio.
+        Get cash movements for a portfolio (first page only).
         
         Args:
             portfolio_id: Portfolio UUID
@@ -79,20 +76,51 @@ class CashMovementService:
         Returns:
             List of cash movements
         """
+        movements, _ = await self.get_cash_movements_page(
+            portfolio_id=portfolio_id,
+            movement_type=movement_type,
+            limit=limit
+        )
+        return movements
+    
+    async def get_cash_movements_page(
+        self,
+        portfolio_id: str,
+        movement_type: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[CashMovement], Optional[str]]:
+        """
+        Get one page of cash movements, newest first, keyed on (date, id).
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            movement_type: Filter by type (deposit/withdrawal)
+            limit: Maximum number of movements to return
+            cursor: Cursor from the previous page (None for the first page)
+            
+        Returns:
+            Tuple of (cash movements, cursor for the next page or None)
+        """
         try:
-            query = self.supabase.table("cash_movements")\
+            supabase = await get_async_supabase_client()
+            
+            query = supabase.table("cash_movements")\
                 .select("*")\
                 .eq("portfolio_id", portfolio_id)
             
             if movement_type:
                 query = query.eq("type", movement_type.lower())
             
-            response = query.order("movement_date", desc=True)\
-                .limit(limit)\
+            response = await apply_keyset(query, "movement_date", cursor)\
+                .limit(limit + 1)\
                 .execute()
             
-            return [CashMovement(**m) for m in response.data]
+            rows, next_cursor = split_page(response.data, limit, "movement_date")
+            return [CashMovement(**m) for m in rows], next_cursor
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error fetching cash movements: {e}")
             raise HTTPException(status_code=500, detail=str(e))
@@ -154,6 +182,7 @@ class CashMovementService:
                 .execute()
             
             logger.info(f"Deleted cash movement: {movement_id}")
+            self.summary_service.refresh_summary(movement.portfolio_id)
             return {
                 "success": True,
                 "message": "Cash movement deleted successfully"
@@ -165,28 +194,36 @@ class CashMovementService:
             logger.error(f"Error deleting cash movement: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    def get_cash_balance(self, portfolio_id: str) -> Decimal:
+    async def get_cash_balance(
+        self,
+        portfolio_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Decimal:
         """
-        Calculate current cash balance for a portfolio.
+        Calculate cash balance for a portfolio.
+        
+        The sum is computed by the database (portfolio_cash_balance RPC),
+        so only the total is transferred regardless of ledger size.
         
         Args:
             portfolio_id: Portfolio UUID
+            start_date: Only include movements on or after this date
+            end_date: Only include movements on or before this date
             
         Returns:
-            Current cash balance (deposits - withdrawals)
+            Cash balance (deposits - withdrawals)
         """
         try:
-            # Get all cash movements
-            movements = self.get_cash_movements(portfolio_id, limit=10000)
+            supabase = await get_async_supabase_client()
             
-            balance = Decimal("0")
-            for movement in movements:
-                if movement.type == "deposit":
-                    balance += movement.amount
-                else:  # withdrawal
-                    balance -= movement.amount
+            response = await supabase.rpc("portfolio_cash_balance", {
+                "p_portfolio_id": portfolio_id,
+                "p_start_date": start_date.isoformat() if start_date else None,
+                "p_end_date": end_date.isoformat() if end_date else None
+            }).execute()
             
-            return balance
+            return Decimal(str(response.data)) if response.data is not None else Decimal("0")
             
         except Exception as e:
             logger.error(f"Error calculating cash balance: {e}")
@@ -0,0 +1,162 @@
+"""
+Columnar export service - streams portfolio datasets as Arrow IPC or Parquet.
+Each database page becomes one record batch (one row group in Parquet) and
+is flushed to the client before the next page is read.
+"""
+
+from app.services.export_service import ExportService
+from app.utils.pagination import SORT_TEXT, SORT_TIMESTAMP
+from typing import AsyncIterator, Dict, List, Tuple
+import io
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+# dataset -> (table, keyset column, keyset sort type, schema)
+DATASETS: Dict[str, Tuple[str, str, str, pa.Schema]] = {
+    "transactions": ("transactions", "transaction_date", SORT_TIMESTAMP, pa.schema([
+        ("id", pa.string()),
+        ("portfolio_id", pa.string()),
+        ("symbol", pa.string()),
+        ("transaction_type", pa.string()),
+        ("quantity", pa.float64()),
+        ("price", pa.float64()),
+        ("fees", pa.float64()),
+        ("transaction_date", TIMESTAMP),
+        ("notes", pa.string()),
+        ("created_at", TIMESTAMP),
+        ("updated_at", TIMESTAMP)
+    ])),
+    "positions": ("positions", "symbol", SORT_TEXT, pa.schema([
+        ("id", pa.string()),
+        ("portfolio_id", pa.string()),
+        ("symbol", pa.string()),
+        ("quantity", pa.float64()),
+        ("average_cost", pa.float64()),
+        ("total_cost", pa.float64()),
+        ("current_price", pa.float64()),
+        ("last_price_update", TIMESTAMP),
+        ("last_transaction_date", TIMESTAMP),
+        ("created_at", TIMESTAMP),
+        ("updated_at", TIMESTAMP)
+    ])),
+    "snapshots": ("performance_snapshots", "snapshot_date", SORT_TIMESTAMP, pa.schema([
+        ("id", pa.string()),
+        ("portfolio_id", pa.string()),
+        ("snapshot_date", pa.date32()),
+        ("total_value", pa.float64()),
+        ("total_cost", pa.float64()),
+        ("pnl", pa.float64()),
+        ("created_at", TIMESTAMP)
+    ]))
+}
+
+
+class _StreamSink(io.RawIOBase):
+    """
+    Write-only file that hands out what was written since the last drain.
+
+    tell() keeps counting across drains, which the Parquet writer relies on
+    for the row group offsets in the footer.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ColumnarExportService:
+    """Service class for Arrow IPC / Parquet exports"""
+    
+    def __init__(self):
+        self.export_service = ExportService()
+    
+    async def stream_dataset(self, portfolio_id: str, dataset: str, export_format: str) -> AsyncIterator[bytes]:
+        """
+        Stream one dataset of a portfolio in a columnar format.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            dataset: "transactions", "positions" or "snapshots"
+            export_format: "arrow" (IPC stream) or "parquet"
+            
+        Yields:
+            Encoded bytes, one chunk per database page
+        """
+        table, keyset_column, sort_type, schema = DATASETS[dataset]
+        sink = _StreamSink()
+        
+        if export_format == "parquet":
+            writer = pq.ParquetWriter(sink, schema)
+            write = lambda batch: writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            writer = pa.ipc.new_stream(sink, schema)
+            write = writer.write_batch
+        
+        try:
+            # Parquet magic bytes go out right away; the Arrow writer only
+            # emits the schema together with the first batch
+            header = sink.drain()
+            if header:
+                yield header
+            
+            async for rows in self.export_service.iter_pages(
+                table,
+                keyset_column,
+                portfolio_id,
+                columns=",".join(schema.names),
+                sort_type=sort_type
+            ):
+                write(self._to_batch(rows, schema))
+                yield sink.drain()
+        finally:
+            writer.close()
+        
+        # Parquet footer / Arrow schema (if no rows) and end-of-stream marker
+        yield sink.drain()
+    
+    def _to_batch(self, rows: List[dict], schema: pa.Schema) -> pa.RecordBatch:
+        """
+        Convert a page of raw rows to a record batch with a fixed schema.
+        
+        Args:
+            rows: Raw rows from database
+            schema: Target Arrow schema
+            
+        Returns:
+            RecordBatch matching the schema
+        """
+        frame = pd.DataFrame.from_records(rows, columns=schema.names)
+        
+        for field in schema:
+            if pa.types.is_timestamp(field.type):
+                frame[field.name] = pd.to_datetime(frame[field.name], utc=True, format="ISO8601")
+            elif pa.types.is_date32(field.type):
+                frame[field.name] = pd.to_datetime(frame[field.name]).dt.date
+            elif pa.types.is_floating(field.type):
+                frame[field.name] = pd.to_numeric(frame[field.name], errors="coerce")
+        
+        return pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False)
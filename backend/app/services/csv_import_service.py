@@ -5,10 +5,17 @@ Updated to work with new schema and asset table.
 
 import csv
 import io
-from typing import List, Dict, Any
+from itertools import islice
+from typing import List, Dict, Any, Callable, Iterator, Optional, TextIO, Tuple
 from datetime import datetime
 from decimal import Decimal
-from app.models.schemas import TransactionCreate, CSVImportResponse, CSVImportRequest
+from app.config import get_settings
+from app.models.schemas import (
+    TransactionCreate,
+    CSVImportResponse,
+    CSVImportRequest,
+    CSVImportChunkProgress
+)
 from app.services.transaction_service import TransactionService
 from app.services.asset_service import AssetService
 from fastapi import HTTPException
@@ -28,6 +35,9 @@ class CSVImportService:
         """
         Import transactions from CSV data.
         
+        All rows are parsed and validated first, then written with batched
+        inserts and a single position recalculation at the end.
+        
         Args:
             request: CSV import request with data and broker format
             
@@ -46,16 +56,25 @@ class CSVImportService:
             
             logger.info(f"Processing {len(rows)} CSV rows")
             
-            # Import based on broker format
-            if request.broker_format.lower() == "robinhood":
-                return self._import_robinhood(request.portfolio_id, rows)
-            elif request.broker_format.lower() == "interactivebrokers":
-                return self._import_ibkr(request.portfolio_id, rows)
-            elif request.broker_format.lower() == "generic":
-                return self._import_generic(request.portfolio_id, rows)
-            else:
-                # Default to generic format
-                return self._import_generic(request.portfolio_id, rows)
+            transactions, errors = self._parse_rows(
+                request.portfolio_id,
+                request.broker_format,
+                rows,
+                csv_reader.fieldnames or []
+            )
+            
+            imported = self.transaction_service.create_transactions_bulk(
+                request.portfolio_id,
+                transactions
+            )
+            
+            return CSVImportResponse(
+                success=True,
+                imported_count=len(imported),
+                failed_count=len(errors),
+                errors=errors,
+                transactions=imported
+            )
                 
         except HTTPException:
             raise
@@ -63,9 +82,210 @@ class CSVImportService:
             logger.error(f"CSV import error: {e}")
             raise HTTPException(status_code=500, detail=f"CSV import failed: {str(e)}")
     
-    def _import_robinhood(self, portfolio_id: str, rows: List[Dict[str, Any]]) -> CSVImportResponse:
+    def import_stream(
+        self,
+        portfolio_id: str,
+        broker_format: str,
+        stream: TextIO,
+        chunk_size: Optional[int] = None,
+        on_progress: Optional[Callable[[CSVImportChunkProgress], None]] = None,
+        should_cancel: Optional[Callable[[], bool]] = None
+    ) -> CSVImportResponse:
         """
-        Import Robinhood CSV format.
+        Import transactions from a CSV text stream in fixed-size chunks.
+        
+        Rows are read incrementally, so only one chunk is held in memory at
+        a time. Each chunk is validated and written with batched inserts;
+        positions are recalculated once at the end for the touched symbols.
+        
+        Args:
+            portfolio_id: Portfolio to import into
+            broker_format: Broker format (generic, robinhood, interactivebrokers)
+            stream: Text stream positioned at the CSV header
+            chunk_size: Rows per chunk (defaults to settings)
+            on_progress: Optional callback invoked after every chunk
+            should_cancel: Optional callback checked before every chunk;
+                returning True stops the import after the chunks written so far
+            
+        Returns:
+            Import results with counts, errors and per-chunk progress
+            (created transactions are not returned to keep memory bounded)
+            
+        Raises:
+            HTTPException: 400 if the file is empty or cannot be decoded/parsed
+                as CSV (chunks written before the bad line are kept)
+        """
+        settings = get_settings()
+        chunk_size = chunk_size or settings.csv_import_chunk_size
+        
+        csv_reader = csv.DictReader(stream)
+        try:
+            fieldnames = csv_reader.fieldnames
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Could not read CSV header: {e}")
+        
+        if not fieldnames:
+            raise HTTPException(status_code=400, detail="CSV file is empty")
+        
+        logger.info(f"Starting streamed CSV import for portfolio: {portfolio_id}")
+        
+        rows_processed = 0
+        imported_count = 0
+        failed_count = 0
+        errors: List[str] = []
+        chunks: List[CSVImportChunkProgress] = []
+        symbols = set()
+        cancelled = False
+        
+        try:
+            for chunk_number, rows in enumerate(self._iter_chunks(csv_reader, chunk_size), 1):
+                if should_cancel and should_cancel():
+                    logger.info(f"CSV import cancelled for portfolio: {portfolio_id} after {rows_processed} rows")
+                    cancelled = True
+                    break
+                
+                transactions, chunk_errors = self._parse_rows(
+                    portfolio_id,
+                    broker_format,
+                    rows,
+                    fieldnames,
+                    first_row_number=rows_processed + 1
+                )
+                
+                write_failed = 0
+                try:
+                    created = self.transaction_service.create_transactions_bulk(
+                        portfolio_id,
+                        transactions,
+                        recompute_positions=False
+                    )
+                except HTTPException as e:
+                    if e.status_code < 500:
+                        raise
+                    # Part of the chunk may have been written - recompute all
+                    # of its symbols and report the chunk instead of aborting
+                    symbols.update(t.symbol for t in transactions)
+                    logger.error(f"CSV import chunk {chunk_number} write failed: {e.detail}")
+                    write_failed = len(transactions)
+                    write_error = e.detail
+                    created = []
+                
+                symbols.update(t.symbol for t in created)
+                failed_count += len(chunk_errors) + write_failed
+                
+                if write_failed:
+                    chunk_errors.append(
+                        f"Rows {rows_processed + 1}-{rows_processed + len(rows)}: "
+                        f"failed to write {write_failed} transactions: {write_error}"
+                    )
+                
+                rows_processed += len(rows)
+                imported_count += len(created)
+                errors.extend(chunk_errors[:max(settings.csv_import_max_errors - len(errors), 0)])
+                
+                progress = CSVImportChunkProgress(
+                    chunk=chunk_number,
+                    rows_processed=rows_processed,
+                    imported_count=imported_count,
+                    failed_count=failed_count
+                )
+                chunks.append(progress)
+                logger.info(
+                    f"CSV import chunk {chunk_number}: {rows_processed} rows processed, "
+                    f"{imported_count} imported, {failed_count} failed"
+                )
+                
+                if on_progress:
+                    on_progress(progress)
+        except (UnicodeDecodeError, csv.Error) as e:
+            # The upload is decoded lazily, so a bad byte or a malformed row
+            # can surface after earlier chunks were already committed.
+            # line_num counts the lines read successfully
+            line = csv_reader.line_num + 1
+            logger.error(f"CSV import for portfolio {portfolio_id} stopped at line {line}: {e}")
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"Could not read CSV at line {line} (after row {rows_processed}): {e}. "
+                    f"{imported_count} transactions from earlier rows were imported"
+                )
+            )
+        finally:
+            # Recalculate positions once for everything that was written
+            if symbols:
+                self.transaction_service.recompute_positions(portfolio_id, symbols)
+        
+        # A cancel before the first chunk is not an empty file
+        if rows_processed == 0 and not cancelled:
+            raise HTTPException(status_code=400, detail="CSV file is empty")
+        
+        return CSVImportResponse(
+            success=True,
+            imported_count=imported_count,
+            failed_count=failed_count,
+            errors=errors,
+            chunks=chunks
+        )
+    
+    def _iter_chunks(self, rows: Iterator[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Yield lists of at most chunk_size rows from a row iterator"""
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+    
+    def _parse_rows(
+        self,
+        portfolio_id: str,
+        broker_format: str,
+        rows: List[Dict[str, Any]],
+        fieldnames: List[str],
+        first_row_number: int = 1
+    ) -> Tuple[List[TransactionCreate], List[str]]:
+        """
+        Parse and validate CSV rows without touching the database.
+        
+        Args:
+            portfolio_id: Portfolio to import into
+            broker_format: Broker format (generic, robinhood, interactivebrokers)
+            rows: CSV rows as dictionaries
+            fieldnames: CSV header columns
+            first_row_number: Row number of the first row (for error messages)
+            
+        Returns:
+            Tuple of (valid transactions, error messages)
+        """
+        broker_format = broker_format.lower()
+        
+        # Import based on broker format
+        if broker_format == "robinhood":
+            parse_row = self._parse_robinhood_row
+        elif broker_format == "interactivebrokers":
+            parse_row = self._parse_ibkr_row
+        else:
+            # Default to generic format
+            column_map = self._build_column_map(fieldnames)
+            parse_row = lambda pid, row, i: self._parse_generic_row(pid, row, i, column_map)
+        
+        transactions = []
+        errors = []
+        
+        for i, row in enumerate(rows, first_row_number):
+            try:
+                transaction = parse_row(portfolio_id, row, i)
+                if transaction is not None:
+                    transactions.append(transaction)
+            except Exception as e:
+                errors.append(f"Row {i}: {str(e)}")
+                logger.warning(f"Row {i} import failed: {e}")
+        
+        return transactions, errors
+    
+    def _parse_robinhood_row(self, portfolio_id: str, row: Dict[str, Any], i: int) -> Optional[TransactionCreate]:
+        """
+        Parse one Robinhood CSV row.
         
         Expected columns:
         - Activity Date
@@ -78,66 +298,42 @@ class CSVImportService:
         - Quantity
         - Price
         - Amount
+        
+        Returns:
+            Transaction data, or None for non-transaction rows
         """
-        imported = []
-        errors = []
+        # Skip non-transaction rows
+        activity_type = row.get("Activity Type", "").lower()
+        if activity_type not in ["buy", "sell"]:
+            return None
         
-        for i, row in enumerate(rows, 1):
-            try:
-                # Skip non-transaction rows
-                activity_type = row.get("Activity Type", "").lower()
-                if activity_type not in ["buy", "sell"]:
-                    continue
-                
-                # Parse data
-                symbol = row.get("Symbol", "").upper().strip()
-                if not symbol:
-                    errors.append(f"Row {i}: Missing symbol")
-                    continue
-                
-                transaction_type = activity_type
-                quantity = abs(float(row.get("Quantity", 0)))
-                price = abs(float(row.get("Price", 0)))
-                
-                # Robinhood uses negative amounts for sells
-                amount = float(row.get("Amount", 0))
-                fees = 0  # Robinhood doesn't show fees in standard export
-                
-                # Parse date - try multiple formats
-                date_str = row.get("Activity Date", row.get("Process Date", ""))
-                transaction_date = self._parse_date(date_str)
-                
-                # Create transaction
-                transaction = TransactionCreate(
-                    portfolio_id=portfolio_id,
-                    symbol=symbol,
-                    transaction_type=transaction_type,
-                    quantity=quantity,
-                    price=price,
-                    fees=fees,
-                    transaction_date=transaction_date,
-                    notes=f"Imported from Robinhood: {row.get('Description', '')}"
-                )
-                
-                # Create in database
-                created = self.transaction_service.create_transaction(transaction)
-                imported.append(created)
-                
-            except Exception as e:
-                errors.append(f"Row {i}: {str(e)}")
-                logger.warning(f"Row {i} import failed: {e}")
+        # Parse data
+        symbol = row.get("Symbol", "").upper().strip()
+        if not symbol:
+            raise ValueError("Missing symbol")
         
-        return CSVImportResponse(
-            success=True,
-            imported_count=len(imported),
-            failed_count=len(errors),
-            errors=errors,
-            transactions=imported
+        quantity = abs(float(row.get("Quantity", 0)))
+        price = abs(float(row.get("Price", 0)))
+        fees = 0  # Robinhood doesn't show fees in standard export
+        
+        # Parse date - try multiple formats
+        date_str = row.get("Activity Date", row.get("Process Date", ""))
+        transaction_date = self._parse_date(date_str)
+        
+        return TransactionCreate(
+            portfolio_id=portfolio_id,
+            symbol=symbol,
+            transaction_type=activity_type,
+            quantity=quantity,
+            price=price,
+            fees=fees,
+            transaction_date=transaction_date,
+            notes=f"Imported from Robinhood: {row.get('Description', '')}"
         )
     
-    def _import_ibkr(self, portfolio_id: str, rows: List[Dict[str, Any]]) -> CSVImportResponse:
+    def _parse_ibkr_row(self, portfolio_id: str, row: Dict[str, Any], i: int) -> Optional[TransactionCreate]:
         """
-        Import Interactive Brokers CSV format.
+        Parse one Interactive Brokers CSV row.
         
         Expected columns:
         - TradeDate
@@ -149,75 +345,54 @@ class CSVImportService:
         - Price
         - Amount
         - Fees
+        
+        Returns:
+            Transaction data, or None for header/non-transaction rows
         """
-        imported = []
-        errors = []
+        # Skip header rows
+        if "header" in str(row).lower():
+            return None
         
-        for i, row in enumerate(rows, 1):
-            try:
-                # Skip header rows
-                if "header" in str(row).lower():
-                    continue
-                
-                # Parse transaction type from description
-                description = row.get("Description", "").lower()
-                if "buy" in description:
-                    transaction_type = "buy"
-                elif "sell" in description:
-                    transaction_type = "sell"
-                else:
-                    continue  # Skip non-transaction rows
-                
-                symbol = row.get("Symbol", "").upper().strip()
-                if not symbol:
-                    errors.append(f"Row {i}: Missing symbol")
-                    continue
-                
-                quantity = abs(float(row.get("Quantity", 0)))
-                price = abs(float(row.get("Price", 0)))
-                fees = abs(float(row.get("Fees", 0)))
-                
-                # Parse date
-                date_str = row.get("TradeDate", "")
-                transaction_date = self._parse_date(date_str)
-                
-                # Create transaction
-                transaction = TransactionCreate(
-                    portfolio_id=portfolio_id,
-                    symbol=symbol,
-                    transaction_type=transaction_type,
-                    quantity=quantity,
-                    price=price,
-                    fees=fees,
-                    transaction_date=transaction_date,
-                    notes=f"Imported from IBKR: {row.get('Description', '')}"
-                )
-                
-                created = self.transaction_service.create_transaction(transaction)
-                imported.append(created)
-                
-            except Exception as e:
-                errors.append(f"Row {i}: {str(e)}")
+        # Parse transaction type from description
+        description = row.get("Description", "").lower()
+        if "buy" in description:
+            transaction_type = "buy"
+        elif "sell" in description:
+            transaction_type = "sell"
+        else:
+            return None  # Skip non-transaction rows
         
-        return CSVImportResponse(
-            success=True,
-            imported_count=len(imported),
-            failed_count=len(errors),
-            errors=errors,
-            transactions=imported
+        symbol = row.get("Symbol", "").upper().strip()
+        if not symbol:
+            raise ValueError("Missing symbol")
+        
+        quantity = abs(float(row.get("Quantity", 0)))
+        price = abs(float(row.get("Price", 0)))
+        fees = abs(float(row.get("Fees", 0)))
+        
+        # Parse date
+        date_str = row.get("TradeDate", "")
+        transaction_date = self._parse_date(date_str)
+        
+        return TransactionCreate(
+            portfolio_id=portfolio_id,
+            symbol=symbol,
+            transaction_type=transaction_type,
+            quantity=quantity,
+            price=price,
+            fees=fees,
+            transaction_date=transaction_date,
+            notes=f"Imported from IBKR: {row.get('Description', '')}"
         )
     
-    def _import_generic(self, portfolio_id: str, rows: List[Dict[str, Any]]) -> CSVImportResponse:
+    def _build_column_map(self, fieldnames: List[str]) -> Dict[str, Optional[str]]:
         """
-        Import generic CSV format.
+        Auto-detect generic CSV column names from the header.
         
         Expected columns (flexible mapping):
         - date, symbol, type, quantity, price, fees (optional)
         - OR: Date, Symbol, Type, Quantity, Price, Fees (optional)
         """
-        imported = []
-        errors = []
-        
         # Column name mapping (case-insensitive)
         column_map = {
             "date": None,
@@ -228,61 +403,51 @@ class CSVImportService:
             "fees": None
         }
         
-        # Auto-detect column names from first row
-        if rows:
-            first_row = {k.lower(): v for k, v in rows[0].items()}
-            for key in column_map:
-                for col in first_row.keys():
-                    if key in col.lower():
-                        column_map[key] = col
-                        break
+        for key in column_map:
+            for col in fieldnames:
+                if key in col.lower():
+                    column_map[key] = col
+                    break
         
-        for i, row in enumerate(rows, 1):
-            try:
-                # Get values using mapped column names
-                row_lower = {k.lower(): v for k, v in row.items()}
-                
-                symbol = self._get_value(row, column_map, "symbol")
-                if not symbol:
-                    errors.append(f"Row {i}: Missing symbol")
-                    continue
-                
-                transaction_type = self._get_value(row, column_map, "type", "").lower()
-                if transaction_type not in ["buy", "sell"]:
-                    errors.append(f"Row {i}: Invalid transaction type '{transaction_type}'")
-                    continue
-                
-                quantity = float(self._get_value(row, column_map, "quantity", 0))
-                price = float(self._get_value(row, column_map, "price", 0))
-                fees = float(self._get_value(row, column_map, "fees", 0))
-                
-                date_str = self._get_value(row, column_map, "date")
-                transaction_date = self._parse_date(date_str)
-                
-                # Create transaction
-                transaction = TransactionCreate(
-                    portfolio_id=portfolio_id,
-                    symbol=symbol.upper(),
-                    transaction_type=transaction_type,
-                    quantity=quantity,
-                    price=price,
-                    fees=fees,
-                    transaction_date=transaction_date,
-                    notes=f"Imported from CSV row {i}"
-                )
-                
-                created = self.transaction_service.create_transaction(transaction)
-                imported.append(created)
-                
-            except Exception as e:
-                errors.append(f"Row {i}: {str(e)}")
+        return column_map
+    
+    def _parse_generic_row(
+        self,
+        portfolio_id: str,
+        row: Dict[str, Any],
+        i: int,
+        column_map: Dict[str, Optional[str]]
+    ) -> Optional[TransactionCreate]:
+        """
+        Parse one generic CSV row using the detected column mapping.
         
-        return CSVImportResponse(
-            success=True,
-            imported_count=len(imported),
-            failed_count=len(errors),
-            errors=errors,
-            transactions=imported
+        Returns:
+            Transaction data
+        """
+        symbol = self._get_value(row, column_map, "symbol")
+        if not symbol:
+            raise ValueError("Missing symbol")
+        
+        transaction_type = self._get_value(row, column_map, "type", "").lower()
+        if transaction_type not in ["buy", "sell"]:
+            raise ValueError(f"Invalid transaction type '{transaction_type}'")
+        
+        quantity = float(self._get_value(row, column_map, "quantity", 0))
+        price = float(self._get_value(row, column_map, "price", 0))
+        fees = float(self._get_value(row, column_map, "fees", 0))
+        
+        date_str = self._get_value(row, column_map, "date")
+        transaction_date = self._parse_date(date_str)
+        
+        return TransactionCreate(
+            portfolio_id=portfolio_id,
+            symbol=symbol.upper(),
+            transaction_type=transaction_type,
+            quantity=quantity,
+            price=price,
+            fees=fees,
+            transaction_date=transaction_date,
+            notes=f"Imported from CSV row {i}"
         )
     
     def _get_value(self, row: Dict[str, Any], column_map: Dict[str, str], key: str, default=None):
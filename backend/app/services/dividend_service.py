@@ -1,7 +1,10 @@
-from app.database import get_supabase_client
+from app.database import get_supabase_client, get_async_supabase_client
 from app.models.schemas import DividendCreate, Dividend
 from app.services.asset_service import AssetService
-from typing import List, Optional
+from app.services.portfolio_service import PortfolioService
+from app.services.portfolio_summary_service import PortfolioSummaryService
+from app.utils.pagination import apply_keyset, split_page
+from typing import List, Optional, Tuple
 from fastapi import HTTPException
 from decimal import Decimal
 from datetime import date
@@ -14,21 +17,12 @@ class DividendService:
     def __init__(self):
         self.supabase = get_supabase_client()
         self.asset_service = AssetService()
+        self.portfolio_service = PortfolioService()
+        self.summary_service = PortfolioSummaryService()
 
     def create_dividend(self, dividend_data: DividendCreate) -> Dividend:
         try:
-            portfolio_check = (
-                self.supabase.table("portfolios")
-                .select("id")
-                .eq("id", dividend_data.portfolio_id)
-                .execute()
-            )
-
-            if not portfolio_check.data:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Portfolio with id '{dividend_data.portfolio_id}' not found"
-                )
+            self.portfolio_service.ensure_portfolio_exists(dividend_data.portfolio_id)
 
             self.asset_service.get_or_create_asset(dividend_data.symbol)
 
@@ -42,6 +36,7 @@ class DividendService:
                 raise HTTPException(status_code=500, detail="Failed to create dividend")
 
             logger.info(f"Created dividend: {dividend_data.symbol} - {dividend_data.amount}")
+            self.summary_service.refresh_summary(dividend_data.portfolio_id)
             return Dividend(**response.data[0])
 
         except HTTPException:
@@ -50,7 +45,7 @@ class DividendService:
             logger.error(f"Error creating dividend: {e}")
             raise HTTPException(status_code=500, detail=str(e))
 
-    def get_dividends(
+    async def get_dividends(
         self,
         portfolio_id: str,
         symbol: Optional[str] = None,
@@ -58,9 +53,29 @@ class DividendService:
         end_date: Optional[date] = None,
         limit: int = 100
     ) -> List[Dividend]:
+        dividends, _ = await self.get_dividends_page(
+            portfolio_id=portfolio_id,
+            symbol=symbol,
+            start_date=start_date,
+            end_date=end_date,
+            limit=limit
+        )
+        return dividends
+
+    async def get_dividends_page(
+        self,
+        portfolio_id: str,
+        symbol: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dividend], Optional[str]]:
         try:
+            supabase = await get_async_supabase_client()
+
             query = (
-                self.supabase.table("dividends")
+                supabase.table("dividends")
                 .select("*")
                 .eq("portfolio_id", portfolio_id)
             )
@@ -74,14 +89,18 @@ class DividendService:
             if end_date:
                 query = query.lte("dividend_date", end_date.isoformat())
 
-            response = (
-                query.order("dividend_date", desc=True)
-                .limit(limit)
+            # Newest first, keyed on (date, id) so later pages cost the same
+            response = await (
+                apply_keyset(query, "dividend_date", cursor)
+                .limit(limit + 1)
                 .execute()
             )
 
-            return [Dividend(**d) for d in response.data]
+            rows, next_cursor = split_page(response.data, limit, "dividend_date")
+            return [Dividend(**d) for d in rows], next_cursor
 
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error fetching dividends: {e}")
             raise HTTPException(status_code=500, detail=str(e))
@@ -111,7 +130,7 @@ class DividendService:
 
     def delete_dividend(self, dividend_id: str) -> dict:
         try:
-            self.get_dividend(dividend_id)
+            dividend = self.get_dividend(dividend_id)
 
             self.supabase.table("dividends")\
                 .delete()\
@@ -119,6 +138,7 @@ class DividendService:
                 .execute()
 
             logger.info(f"Deleted dividend: {dividend_id}")
+            self.summary_service.refresh_summary(dividend.portfolio_id)
 
             return {"success": True, "message": "Dividend deleted successfully"}
 
@@ -128,22 +148,23 @@ class DividendService:
             logger.error(f"Error deleting dividend: {e}")
             raise HTTPException(status_code=500, detail=str(e))
 
-    def get_total_dividend_income(
+    async def get_total_dividend_income(
         self,
         portfolio_id: str,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None
     ) -> Decimal:
         try:
-            dividends = self.get_dividends(
-                portfolio_id=portfolio_id,
-                start_date=start_date,
-                end_date=end_date,
-                limit=10000
-            )
+            # Summed by the database so only one value is transferred
+            supabase = await get_async_supabase_client()
+
+            response = await supabase.rpc("portfolio_dividend_income", {
+                "p_portfolio_id": portfolio_id,
+                "p_start_date": start_date.isoformat() if start_date else None,
+                "p_end_date": end_date.isoformat() if end_date else None
+            }).execute()
 
-            total = sum(d.amount for d in dividends)
-            return Decimal(total)
+            return Decimal(str(response.data)) if response.data is not None else Decimal("0")
 
         except Exception as e:
             logger.error(f"Error calculating dividend income: {e}")
@@ -0,0 +1,132 @@
+"""
+Export service - streams a portfolio ledger as CSV or NDJSON.
+Rows are read page by page with keyset pagination and written out as each
+page arrives, so memory use does not grow with the size of the ledger.
+"""
+
+from app.config import get_settings
+from app.database import get_async_supabase_client
+from app.utils.pagination import SORT_TIMESTAMP, apply_keyset, split_page
+from typing import AsyncIterator, List, Optional
+import csv
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (record_type, table, date column) in export order
+LEDGER_TABLES = [
+    ("transaction", "transactions", "transaction_date"),
+    ("cash_movement", "cash_movements", "movement_date"),
+    ("dividend", "dividends", "dividend_date")
+]
+
+# CSV has one row layout shared by all record types
+CSV_COLUMNS = ["record_type", "id", "date", "symbol", "type", "quantity", "price", "fees", "amount", "notes"]
+
+
+class ExportService:
+    """Service class for streaming ledger exports"""
+    
+    def __init__(self):
+        self.page_size = get_settings().export_page_size
+    
+    async def stream_ledger(self, portfolio_id: str, export_format: str) -> AsyncIterator[str]:
+        """
+        Stream every transaction, cash movement and dividend of a portfolio.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            export_format: "csv" or "ndjson"
+            
+        Yields:
+            Encoded text, one chunk per database page
+        """
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(CSV_COLUMNS)
+            # Header goes out before the first query so the client gets bytes immediately
+            yield self._drain(buffer)
+        
+        for record_type, table, date_column in LEDGER_TABLES:
+            async for rows in self.iter_pages(table, date_column, portfolio_id):
+                if export_format == "csv":
+                    for row in rows:
+                        writer.writerow(self._to_csv_row(record_type, date_column, row))
+                    yield self._drain(buffer)
+                else:
+                    yield "".join(
+                        json.dumps({"record_type": record_type, **row}, default=str) + "\n"
+                        for row in rows
+                    )
+    
+    async def iter_pages(
+        self,
+        table: str,
+        date_column: str,
+        portfolio_id: str,
+        columns: str = "*",
+        sort_type: str = SORT_TIMESTAMP
+    ) -> AsyncIterator[List[dict]]:
+        """
+        Read all rows of a portfolio from a ledger table, oldest first.
+        
+        Args:
+            table: Table name
+            date_column: Date column the table is ordered by
+            portfolio_id: Portfolio UUID
+            columns: Columns to select
+            sort_type: Kind of values in date_column (SORT_TEXT for e.g. symbol)
+            
+        Yields:
+            Pages of raw rows
+        """
+        supabase = await get_async_supabase_client()
+        cursor: Optional[str] = None
+        
+        while True:
+            query = supabase.table(table)\
+                .select(columns)\
+                .eq("portfolio_id", portfolio_id)
+            
+            response = await apply_keyset(query, date_column, cursor, ascending=True, sort_type=sort_type)\
+                .limit(self.page_size + 1)\
+                .execute()
+            
+            rows, cursor = split_page(response.data, self.page_size, date_column)
+            if rows:
+                yield rows
+            
+            if cursor is None:
+                return
+    
+    def _to_csv_row(self, record_type: str, date_column: str, row: dict) -> list:
+        """Map a raw row onto CSV_COLUMNS"""
+        if record_type == "transaction":
+            row_type = row.get("transaction_type")
+        elif record_type == "dividend":
+            row_type = row.get("dividend_type")
+        else:
+            row_type = row.get("type")
+        
+        return [
+            record_type,
+            row["id"],
+            row[date_column],
+            row.get("symbol"),
+            row_type,
+            row.get("quantity"),
+            row.get("price"),
+            row.get("fees"),
+            row.get("amount"),
+            row.get("notes")
+        ]
+    
+    def _drain(self, buffer: io.StringIO) -> str:
+        """Return buffered text and empty the buffer"""
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return text
@@ -0,0 +1,240 @@
+"""
+Import job service - runs CSV imports as background jobs.
+Jobs are kept in an in-process store, so the request returns immediately
+and the import keeps running even if the client disconnects.
+
+The store is per worker process: a job id is only known to the worker that
+accepted it (route polling to the same worker, or run a single worker), and
+queued or running jobs are lost when the process restarts.
+"""
+
+import csv
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import BinaryIO, Dict, Optional
+from app.config import get_settings
+from app.models.schemas import CSVImportChunkProgress, ImportJob
+from app.services.csv_import_service import CSVImportService
+from app.services.portfolio_service import PortfolioService
+from fastapi import HTTPException
+import logging
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = {"completed", "failed", "cancelled"}
+
+# Shared job store and worker pool (one per process)
+_jobs: Dict[str, dict] = {}
+_jobs_lock = threading.Lock()
+_executor = ThreadPoolExecutor(
+    max_workers=get_settings().import_job_workers,
+    thread_name_prefix="csv-import"
+)
+
+
+class ImportJobService:
+    """Service class for background CSV import jobs"""
+    
+    def __init__(self):
+        self.csv_import_service = CSVImportService()
+        self.portfolio_service = PortfolioService()
+    
+    def submit_job(
+        self,
+        portfolio_id: str,
+        broker_format: str,
+        upload: BinaryIO,
+        chunk_size: Optional[int] = None
+    ) -> ImportJob:
+        """
+        Queue a CSV import.
+        
+        The portfolio is checked up front, so an unknown id is rejected
+        before anything is queued. The upload is copied to a temporary file
+        (the request's spooled file is gone once the request ends) and
+        imported by a worker thread.
+        
+        Args:
+            portfolio_id: Portfolio to import into
+            broker_format: Broker format (generic, robinhood, interactivebrokers)
+            upload: Binary file object with the CSV content
+            chunk_size: Rows per chunk (defaults to settings)
+            
+        Returns:
+            The queued job
+            
+        Raises:
+            HTTPException: If portfolio not found
+        """
+        self.portfolio_service.ensure_portfolio_exists(portfolio_id)
+        self._prune_jobs()
+        
+        with tempfile.NamedTemporaryFile(prefix="import-", suffix=".csv", delete=False) as tmp:
+            shutil.copyfileobj(upload, tmp)
+            path = tmp.name
+        
+        job_id = str(uuid.uuid4())
+        job = {
+            "id": job_id,
+            "portfolio_id": portfolio_id,
+            "broker_format": broker_format,
+            "status": "queued",
+            "total_rows": None,
+            "rows_processed": 0,
+            "imported_count": 0,
+            "failed_count": 0,
+            "errors": [],
+            "error": None,
+            "created_at": datetime.now(),
+            "started_at": None,
+            "finished_at": None,
+            "cancel_requested": False
+        }
+        
+        with _jobs_lock:
+            _jobs[job_id] = job
+        
+        _executor.submit(self._run_job, job_id, path, chunk_size)
+        
+        logger.info(f"Queued import job {job_id} for portfolio: {portfolio_id}")
+        return self.get_job(job_id)
+    
+    def get_job(self, job_id: str) -> ImportJob:
+        """
+        Get the current status of an import job.
+        
+        Raises:
+            HTTPException: If job not found
+        """
+        with _jobs_lock:
+            job = _jobs.get(job_id)
+            
+            if job is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Import job with id '{job_id}' not found"
+                )
+            
+            return self._to_model(job)
+    
+    def cancel_job(self, job_id: str) -> ImportJob:
+        """
+        Request cancellation of an import job.
+        
+        A queued job never starts; a running job stops before its next
+        chunk. Rows already written are kept and positions are updated.
+        
+        Raises:
+            HTTPException: If job not found or already finished
+        """
+        with _jobs_lock:
+            job = _jobs.get(job_id)
+            
+            if job is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Import job with id '{job_id}' not found"
+                )
+            
+            if job["status"] in FINISHED_STATUSES:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Import job '{job_id}' already {job['status']}"
+                )
+            
+            job["cancel_requested"] = True
+            if job["status"] == "queued":
+                job["status"] = "cancelled"
+                job["finished_at"] = datetime.now()
+            
+            logger.info(f"Cancellation requested for import job: {job_id}")
+            return self._to_model(job)
+    
+    def _run_job(self, job_id: str, path: str, chunk_size: Optional[int]):
+        """Worker entry point - runs one import job to completion"""
+        try:
+            with _jobs_lock:
+                job = _jobs[job_id]
+                if job["cancel_requested"]:
+                    return
+                job["status"] = "running"
+                job["started_at"] = datetime.now()
+            
+            # Count rows first so progress can report what is remaining
+            # (DictReader skips blank lines, like the import itself)
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                total_rows = sum(1 for _ in csv.DictReader(f))
+            self._update_job(job_id, total_rows=total_rows)
+            
+            if self._is_cancel_requested(job_id):
+                self._update_job(job_id, status="cancelled", finished_at=datetime.now())
+                logger.info(f"Import job {job_id} cancelled before its first chunk")
+                return
+            
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                result = self.csv_import_service.import_stream(
+                    portfolio_id=job["portfolio_id"],
+                    broker_format=job["broker_format"],
+                    stream=f,
+                    chunk_size=chunk_size,
+                    on_progress=lambda progress: self._record_progress(job_id, progress),
+                    should_cancel=lambda: self._is_cancel_requested(job_id)
+                )
+            
+            status = "cancelled" if self._is_cancel_requested(job_id) else "completed"
+            self._update_job(job_id, status=status, errors=result.errors, finished_at=datetime.now())
+            logger.info(f"Import job {job_id} {status}: {result.imported_count} imported, {result.failed_count} failed")
+            
+        except HTTPException as e:
+            logger.error(f"Import job {job_id} failed: {e.detail}")
+            self._update_job(job_id, status="failed", error=str(e.detail), finished_at=datetime.now())
+        except Exception as e:
+            logger.error(f"Import job {job_id} failed: {e}")
+            self._update_job(job_id, status="failed", error=str(e), finished_at=datetime.now())
+        finally:
+            os.remove(path)
+    
+    def _record_progress(self, job_id: str, progress: CSVImportChunkProgress):
+        """Store per-chunk progress on the job"""
+        self._update_job(
+            job_id,
+            rows_processed=progress.rows_processed,
+            imported_count=progress.imported_count,
+            failed_count=progress.failed_count
+        )
+    
+    def _is_cancel_requested(self, job_id: str) -> bool:
+        with _jobs_lock:
+            return _jobs[job_id]["cancel_requested"]
+    
+    def _update_job(self, job_id: str, **fields):
+        with _jobs_lock:
+            _jobs[job_id].update(fields)
+    
+    def _prune_jobs(self):
+        """Forget finished jobs older than the retention period"""
+        cutoff = datetime.now() - timedelta(hours=get_settings().import_job_retention_hours)
+        
+        with _jobs_lock:
+            expired = [
+                job_id for job_id, job in _jobs.items()
+                if job["status"] in FINISHED_STATUSES and job["finished_at"] and job["finished_at"] < cutoff
+            ]
+            for job_id in expired:
+                del _jobs[job_id]
+    
+    def _to_model(self, job: dict) -> ImportJob:
+        """Build the API model from the stored job (caller holds the lock)"""
+        rows_remaining = None
+        if job["total_rows"] is not None:
+            rows_remaining = max(job["total_rows"] - job["rows_processed"], 0)
+        
+        return ImportJob(
+            **{k: v for k, v in job.items() if k != "cancel_requested"},
+            rows_remaining=rows_remaining
+        )
@@ -3,15 +3,23 @@ Portfolio service - handles all portfolio-related business logic.
 Updated to work with user_id and new schema.
 """
 
-from app.database import get_supabase_client
+from app.database import get_supabase_client, get_async_supabase_client
+from app.models.cost_basis import COST_BASIS_AVERAGE
 from app.models.schemas import PortfolioCreate, PortfolioUpdate, Portfolio
-from app.config import TEST_USER_ID
-from typing import List, Optional
+from app.config import TEST_USER_ID, get_settings
+from app.utils.cache import TTLCache
+from typing import Iterable, List, Optional
 from fastapi import HTTPException
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Known portfolios (portfolio_id -> user_id), shared by all services that
+# validate ledger writes. Only existing portfolios are cached, so a new
+# portfolio is never reported missing; deletes made by another process are
+# picked up after the TTL (the foreign keys still reject such writes).
+_portfolio_cache = TTLCache(maxsize=10000, ttl_seconds=get_settings().portfolio_cache_ttl_seconds)
+
 
 class PortfolioService:
     """Service class for portfolio operations"""
@@ -64,7 +72,9 @@ class PortfolioService:
                 raise HTTPException(status_code=500, detail="Failed to create portfolio")
             
             logger.info(f"Created portfolio: {portfolio_data.name} for user: {user_id}")
-            return Portfolio(**response.data[0])
+            portfolio = Portfolio(**response.data[0])
+            _portfolio_cache.set(portfolio.id, portfolio.user_id)
+            return portfolio
             
         except HTTPException:
             raise
@@ -72,7 +82,7 @@ class PortfolioService:
             logger.error(f"Error creating portfolio: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    def get_all_portfolios(self, user_id: Optional[str] = None) -> List[Portfolio]:
+    async def get_all_portfolios(self, user_id: Optional[str] = None) -> List[Portfolio]:
         """
         Get all portfolios for a user.
         
@@ -86,7 +96,9 @@ class PortfolioService:
             if user_id is None:
                 user_id = TEST_USER_ID
             
-            response = self.supabase.table("portfolios")\
+            supabase = await get_async_supabase_client()
+            
+            response = await supabase.table("portfolios")\
                 .select("*")\
                 .eq("user_id", user_id)\
                 .order("created_at", desc=True)\
@@ -98,7 +110,7 @@ class PortfolioService:
             logger.error(f"Error fetching portfolios: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    def get_portfolio(self, portfolio_id: str, user_id: Optional[str] = None) -> Portfolio:
+    async def get_portfolio(self, portfolio_id: str, user_id: Optional[str] = None) -> Portfolio:
         """
         Get a specific portfolio by ID.
         
@@ -116,7 +128,9 @@ class PortfolioService:
             if user_id is None:
                 user_id = TEST_USER_ID
             
-            response = self.supabase.table("portfolios")\
+            supabase = await get_async_supabase_client()
+            
+            response = await supabase.table("portfolios")\
                 .select("*")\
                 .eq("id", portfolio_id)\
                 .eq("user_id", user_id)\
@@ -136,6 +150,113 @@ class PortfolioService:
             logger.error(f"Error fetching portfolio: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
+    def ensure_portfolio_exists(self, portfolio_id: str, user_id: Optional[str] = None):
+        """
+        Check that a portfolio exists before writing ledger data to it.
+        Answered from the shared portfolio cache when possible.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            user_id: Also require the portfolio to belong to this user
+            
+        Raises:
+            HTTPException: If portfolio not found
+        """
+        self.ensure_portfolios_exist([portfolio_id], user_id)
+    
+    def ensure_portfolios_exist(self, portfolio_ids: Iterable[str], user_id: Optional[str] = None):
+        """
+        Check many portfolios with at most one query, e.g. for bulk writes.
+        
+        Args:
+            portfolio_ids: Portfolio UUIDs
+            user_id: Also require the portfolios to belong to this user
+            
+        Raises:
+            HTTPException: If any portfolio is not found
+        """
+        owners = {}
+        to_fetch = []
+        
+        for portfolio_id in set(portfolio_ids):
+            owner = _portfolio_cache.get(portfolio_id)
+            if owner is None:
+                to_fetch.append(portfolio_id)
+            else:
+                owners[portfolio_id] = owner
+        
+        if to_fetch:
+            try:
+                response = self.supabase.table("portfolios")\
+                    .select("id, user_id")\
+                    .in_("id", to_fetch)\
+                    .execute()
+            except Exception as e:
+                logger.error(f"Error checking portfolios: {e}")
+                raise HTTPException(status_code=500, detail=str(e))
+            
+            for row in response.data:
+                owners[row["id"]] = row["user_id"]
+                _portfolio_cache.set(row["id"], row["user_id"])
+        
+        missing = sorted(
+            portfolio_id for portfolio_id in set(portfolio_ids)
+            if portfolio_id not in owners or (user_id is not None and owners[portfolio_id] != user_id)
+        )
+        
+        if len(missing) == 1:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Portfolio with id '{missing[0]}' not found"
+            )
+        if missing:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Portfolios not found: {', '.join(missing)}"
+            )
+    
+    def get_cost_basis_method(self, portfolio_id: str) -> str:
+        """
+        Get the cost basis method a portfolio uses for its positions.
+        
+        Always read from the database, never cached: the method can be
+        changed through any worker, and a recompute using a stale method
+        would overwrite lots and realized gains with the wrong cost basis.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            
+        Returns:
+            Cost basis method (average, fifo, lifo, hifo, specific_id)
+        """
+        response = self.supabase.table("portfolios")\
+            .select("cost_basis_method")\
+            .eq("id", portfolio_id)\
+            .execute()
+        
+        return (response.data[0].get("cost_basis_method") if response.data else None) or COST_BASIS_AVERAGE
+    
+    def _get_owned_portfolio(self, portfolio_id: str, user_id: str) -> Portfolio:
+        """
+        Get a portfolio for a write operation (blocking client).
+        
+        Raises:
+            HTTPException: If portfolio not found or not owned by user
+        """
+        response = self.supabase.table("portfolios")\
+            .select("*")\
+            .eq("id", portfolio_id)\
+            .eq("user_id", user_id)\
+            .execute()
+        
+        if not response.data:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Portfolio with id '{portfolio_id}' not found"
+            )
+        
+        return Portfolio(**response.data[0])
+    
     def update_portfolio(
         self,
         portfolio_id: str,
@@ -161,7 +282,7 @@ class PortfolioService:
                 user_id = TEST_USER_ID
             
             # Check portfolio exists and belongs to user
-            self.get_portfolio(portfolio_id, user_id)
+            existing = self._get_owned_portfolio(portfolio_id, user_id)
             
             # Only include fields that were actually provided
             update_data = portfolio_data.model_dump(exclude_unset=True)
@@ -195,7 +316,15 @@ class PortfolioService:
                 raise HTTPException(status_code=500, detail="Failed to update portfolio")
             
             logger.info(f"Updated portfolio: {portfolio_id}")
-            return Portfolio(**response.data[0])
+            portfolio = Portfolio(**response.data[0])
+            
+            # Lots and realized gains depend on the method - rebuild them
+            if portfolio.cost_basis_method != existing.cost_basis_method:
+                # Imported here: the transaction service depends on this module
+                from app.services.transaction_service import TransactionService
+                TransactionService().recompute_positions(portfolio_id)
+            
+            return portfolio
             
         except HTTPException:
             raise
@@ -222,7 +351,10 @@ class PortfolioService:
                 user_id = TEST_USER_ID
             
             # Check portfolio exists and belongs to user
-            portfolio = self.get_portfolio(portfolio_id, user_id)
+            portfolio = self._get_owned_portfolio(portfolio_id, user_id)
+            
+            # Stop vouching for the portfolio before it disappears
+            _portfolio_cache.invalidate(portfolio_id)
             
             # Delete portfolio (CASCADE will delete related data)
             response = self.supabase.table("portfolios")\
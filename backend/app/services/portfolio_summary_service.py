@@ -0,0 +1,86 @@
+"""
+Portfolio summary service - materialized per-portfolio summary rows.
+Write paths refresh the row; summary reads are a single-row fetch.
+"""
+
+from app.database import get_supabase_client, get_async_supabase_client
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = [
+    "total_value",
+    "total_cost",
+    "total_gain_loss",
+    "total_gain_loss_percent",
+    "cash_balance",
+    "dividend_income"
+]
+
+
+class PortfolioSummaryService:
+    """Service class for materialized portfolio summaries"""
+    
+    def __init__(self):
+        self.supabase = get_supabase_client()
+    
+    def refresh_summary(self, portfolio_id: str):
+        """
+        Recompute and store the summary row for a portfolio.
+        Called after transactions, cash movements or dividends change.
+        
+        The aggregation runs in the database (refresh_portfolio_summary RPC)
+        and bumps the row's version.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+        """
+        try:
+            self.supabase.rpc("refresh_portfolio_summary", {
+                "p_portfolio_id": portfolio_id
+            }).execute()
+            
+        except Exception as e:
+            logger.error(f"Error refreshing portfolio summary: {e}")
+            # Don't raise exception - the write itself succeeded
+    
+    async def get_stored_summary(self, portfolio_id: str) -> Optional[dict]:
+        """
+        Get the materialized summary for a portfolio.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            
+        Returns:
+            Summary statistics with version, or None if not materialized yet
+        """
+        supabase = await get_async_supabase_client()
+        
+        response = await supabase.table("portfolio_summaries")\
+            .select("*, portfolios(name)")\
+            .eq("portfolio_id", portfolio_id)\
+            .execute()
+        
+        if not response.data:
+            return None
+        
+        row = response.data[0]
+        portfolio_name = (row.get("portfolios") or {}).get("name")
+        
+        return self._to_summary(row, portfolio_name)
+    
+    def _to_summary(self, row: dict, portfolio_name: Optional[str]) -> dict:
+        """Convert a summary row to the summary response shape"""
+        summary = {
+            "portfolio_id": row["portfolio_id"],
+            "portfolio_name": portfolio_name
+        }
+        summary.update({field: float(row[field]) for field in SUMMARY_FIELDS})
+        summary.update({
+            "position_count": row["position_count"],
+            "transaction_count": row["transaction_count"],
+            "last_updated": row["last_updated"],
+            "version": row["version"]
+        })
+        return summary
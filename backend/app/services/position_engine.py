@@ -0,0 +1,439 @@
+"""
+Position engine - keeps a running position state per symbol.
+Transactions are applied one at a time, so a new trade at the end of the
+timeline only touches the stored state of its own symbol instead of
+replaying the whole portfolio history.
+
+Besides the average cost method, positions can track individual tax lots
+(FIFO, LIFO, HIFO or specific-ID matching); every sell then produces
+realized gain records per lot consumed.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Deque, Dict, Iterable, List, Optional
+from app.models.cost_basis import (
+    COST_BASIS_AVERAGE,
+    COST_BASIS_FIFO,
+    COST_BASIS_HIFO,
+    COST_BASIS_SPECIFIC_ID
+)
+
+# Transaction types that change the quantity or cost basis of a position
+POSITION_TRANSACTION_TYPES = ["buy", "sell", "split", "transfer_in", "transfer_out"]
+
+# Gains on lots held longer than this are long-term
+LONG_TERM_HOLDING_DAYS = 365
+
+
+def to_decimal(value: Any) -> Decimal:
+    """Convert a database value to Decimal, treating None/empty as zero"""
+    return Decimal(str(value)) if value else Decimal("0")
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """
+    Parse a timestamp coming from the database or a pydantic model.
+    Naive values are treated as UTC so they can be compared with aware ones.
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+
+    return parsed
+
+
+def transaction_sort_key(tx: dict):
+    """Sort key ordering transactions along the timeline"""
+    return (parse_timestamp(tx["transaction_date"]), str(tx.get("id", "")))
+
+
+@dataclass
+class Lot:
+    """
+    An open tax lot - what is left of one buy.
+
+    Stored compactly as [lot_id, acquired_at, quantity, unit_cost] in the
+    lots column of the positions table.
+    """
+    lot_id: str
+    acquired_at: Optional[datetime]
+    quantity: Decimal
+    unit_cost: Decimal
+
+    @classmethod
+    def from_json(cls, value: list) -> "Lot":
+        lot_id, acquired_at, quantity, unit_cost = value
+        return cls(
+            lot_id=lot_id,
+            acquired_at=parse_timestamp(acquired_at),
+            quantity=to_decimal(quantity),
+            unit_cost=to_decimal(unit_cost)
+        )
+
+    def to_json(self) -> list:
+        # Decimals as strings so no precision is lost in jsonb
+        return [
+            self.lot_id,
+            self.acquired_at.isoformat() if self.acquired_at else None,
+            str(self.quantity),
+            str(self.unit_cost)
+        ]
+
+
+@dataclass
+class RealizedGain:
+    """Gain realized by a sell on one lot (or on the average cost position)"""
+    sell_transaction_id: str
+    lot_transaction_id: Optional[str]
+    quantity: Decimal
+    acquired_at: Optional[datetime]
+    sold_at: datetime
+    cost_basis: Decimal
+    proceeds: Decimal
+
+    @property
+    def realized_gain(self) -> Decimal:
+        return self.proceeds - self.cost_basis
+
+    @property
+    def holding_period(self) -> Optional[str]:
+        """'short' or 'long', None when the acquisition date is unknown"""
+        if self.acquired_at is None:
+            return None
+        held_days = (self.sold_at - self.acquired_at).days
+        return "long" if held_days > LONG_TERM_HOLDING_DAYS else "short"
+
+    def to_row(self, portfolio_id: str, symbol: str, method: str) -> dict:
+        """
+        Convert to a realized_gains table row.
+
+        Args:
+            portfolio_id: Portfolio UUID
+            symbol: Position symbol
+            method: Cost basis method that produced the gain
+
+        Returns:
+            Dictionary ready for insert
+        """
+        return {
+            "portfolio_id": portfolio_id,
+            "symbol": symbol,
+            "sell_transaction_id": self.sell_transaction_id,
+            "lot_transaction_id": self.lot_transaction_id,
+            "cost_basis_method": method,
+            "quantity": float(self.quantity),
+            "acquired_at": self.acquired_at.isoformat() if self.acquired_at else None,
+            "sold_at": self.sold_at.isoformat(),
+            "cost_basis": float(self.cost_basis),
+            "proceeds": float(self.proceeds),
+            "realized_gain": float(self.realized_gain),
+            "holding_period": self.holding_period
+        }
+
+
+@dataclass
+class PositionState:
+    """
+    Running state of a single position (one symbol in one portfolio).
+
+    This is what gets persisted in the positions table, so applying a new
+    transaction only needs the stored row, not the transaction history.
+    """
+    quantity: Decimal = Decimal("0")
+    total_cost: Decimal = Decimal("0")
+    last_transaction_date: Optional[datetime] = None
+    # Id of the last applied transaction - with the date, the replay order key
+    last_transaction_id: Optional[str] = None
+    method: str = COST_BASIS_AVERAGE
+    # Open lots (None for the average method). Kept in acquisition order,
+    # or by unit cost for HIFO, so a sell only touches the lots it consumes.
+    lots: Optional[Deque[Lot]] = None
+    # Gains realized by transactions applied to this state (not persisted
+    # with the position - written to realized_gains)
+    realized: List[RealizedGain] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.method != COST_BASIS_AVERAGE and self.lots is None:
+            self.lots = deque()
+
+    @classmethod
+    def from_row(cls, row: dict) -> "PositionState":
+        """
+        Build state from a positions table row.
+
+        Args:
+            row: Raw position row from database
+
+        Returns:
+            PositionState
+        """
+        quantity = to_decimal(row.get("quantity"))
+        # Rows written before lots were tracked use the average method
+        method = row.get("cost_basis_method") or COST_BASIS_AVERAGE
+        lots = None
+        if method != COST_BASIS_AVERAGE:
+            lots = deque(Lot.from_json(value) for value in row.get("lots") or [])
+
+        if row.get("total_cost") is not None:
+            total_cost = to_decimal(row["total_cost"])
+        else:
+            # Rows written before total_cost was stored
+            total_cost = quantity * to_decimal(row.get("average_cost"))
+
+        return cls(
+            quantity=quantity,
+            total_cost=total_cost,
+            last_transaction_date=parse_timestamp(row.get("last_transaction_date")),
+            last_transaction_id=row.get("last_transaction_id"),
+            method=method,
+            lots=lots
+        )
+
+    @property
+    def is_open(self) -> bool:
+        """True if the position still holds a quantity"""
+        return self.quantity > 0
+
+    @property
+    def average_cost(self) -> Decimal:
+        """Average cost per unit"""
+        if self.quantity <= 0:
+            return Decimal("0")
+        return self.total_cost / self.quantity
+
+    def can_append(self, tx: dict) -> bool:
+        """
+        Check if a transaction can be applied on top of this state.
+
+        Only transactions after the last applied one in replay order
+        (transaction date, then id) can; anything earlier changes history
+        and needs the symbol to be replayed.
+        """
+        if self.last_transaction_date is None:
+            return self.quantity == 0
+        tx_key = transaction_sort_key(tx)
+        if self.last_transaction_id is None:
+            # Rows stored without the id - only a later timestamp is safe
+            return tx_key[0] > self.last_transaction_date
+        return tx_key > (self.last_transaction_date, self.last_transaction_id)
+
+    def apply(self, tx: dict) -> None:
+        """
+        Apply one transaction to the running state.
+
+        Buys and transfers in add quantity at quantity * price + fees (for
+        a transfer, price is the carried unit cost basis). Sells and
+        transfers out remove quantity; only sells realize a gain. A split
+        multiplies the quantity by its ratio (the quantity field, e.g. 2 for
+        a 2-for-1 split) and keeps the total cost.
+
+        Args:
+            tx: Raw transaction row
+        """
+        quantity = to_decimal(tx.get("quantity"))
+        price = to_decimal(tx.get("price"))
+        fees = to_decimal(tx.get("fees"))
+        tx_type = tx["transaction_type"]
+        tx_date = parse_timestamp(tx["transaction_date"])
+
+        if tx_type in ("buy", "transfer_in"):
+            # Add to position
+            self.quantity += quantity
+            self.total_cost += (quantity * price) + fees
+            if self.lots is not None and quantity > 0:
+                self._add_lot(Lot(
+                    lot_id=str(tx.get("id", "")),
+                    acquired_at=tx_date,
+                    quantity=quantity,
+                    unit_cost=((quantity * price) + fees) / quantity
+                ))
+        elif tx_type == "sell":
+            # Reduce position
+            if self.lots is not None:
+                self._sell_lots(tx, quantity, price, fees, tx_date)
+            else:
+                self._sell_average(tx, quantity, price, fees, tx_date)
+            self.quantity -= quantity
+        elif tx_type == "transfer_out":
+            # Move quantity out with its share of the cost basis, no gain
+            if self.lots is not None:
+                self._sell_lots(tx, quantity, price, fees, tx_date, realize=False)
+            elif self.quantity > 0:
+                self.total_cost -= self.total_cost * (quantity / self.quantity)
+            self.quantity -= quantity
+        elif tx_type == "split":
+            if quantity > 0:
+                self._split(quantity)
+
+        self.last_transaction_date = tx_date
+        self.last_transaction_id = str(tx.get("id", "")) or None
+
+    def _sell_average(self, tx: dict, quantity: Decimal, price: Decimal, fees: Decimal, sold_at: datetime) -> None:
+        """Reduce an average cost position"""
+        if self.quantity > 0:
+            # Reduce cost basis by the proportion being sold
+            sell_proportion = quantity / self.quantity
+            cost_sold = self.total_cost * sell_proportion
+            self.total_cost -= cost_sold
+            # Subtract fees from remaining cost
+            self.total_cost -= fees
+
+            self.realized.append(RealizedGain(
+                sell_transaction_id=str(tx.get("id", "")),
+                lot_transaction_id=None,
+                quantity=quantity,
+                acquired_at=None,
+                sold_at=sold_at,
+                cost_basis=cost_sold,
+                proceeds=(quantity * price) - fees
+            ))
+
+    def _sell_lots(
+        self,
+        tx: dict,
+        quantity: Decimal,
+        price: Decimal,
+        fees: Decimal,
+        sold_at: datetime,
+        realize: bool = True
+    ) -> None:
+        """
+        Consume open lots for a sell and record the gain on each of them.
+
+        Specific-ID sells take the lots named in lot_selection first; any
+        remainder (and every other method) is matched from the end of the
+        lot deque the method dictates. Selling more than is held leaves the
+        unmatched quantity without a realized gain. Transfers out consume
+        lots the same way with realize=False.
+        """
+        if quantity <= 0:
+            return
+
+        remaining = quantity
+
+        def consume(index: int, wanted: Decimal) -> Decimal:
+            lot = self.lots[index]
+            taken = min(lot.quantity, wanted)
+            cost = taken * lot.unit_cost
+            if realize:
+                self.realized.append(RealizedGain(
+                    sell_transaction_id=str(tx.get("id", "")),
+                    lot_transaction_id=lot.lot_id or None,
+                    quantity=taken,
+                    acquired_at=lot.acquired_at,
+                    sold_at=sold_at,
+                    cost_basis=cost,
+                    # Sell fees are spread over the lots in proportion to quantity
+                    proceeds=(taken * price) - (fees * taken / quantity)
+                ))
+            self.total_cost -= cost
+            lot.quantity -= taken
+            if lot.quantity <= 0:
+                del self.lots[index]
+            return taken
+
+        if self.method == COST_BASIS_SPECIFIC_ID:
+            for selection in tx.get("lot_selection") or []:
+                if remaining <= 0:
+                    break
+                lot_id = str(selection["transaction_id"])
+                for index, lot in enumerate(self.lots):
+                    if lot.lot_id == lot_id:
+                        remaining -= consume(index, min(to_decimal(selection.get("quantity")), remaining))
+                        break
+
+        # FIFO (and the specific-ID fallback) take the oldest lot, LIFO the
+        # newest and HIFO the most expensive, which the sort puts last
+        from_front = self.method in (COST_BASIS_FIFO, COST_BASIS_SPECIFIC_ID)
+        while remaining > 0 and self.lots:
+            remaining -= consume(0 if from_front else len(self.lots) - 1, remaining)
+
+        if not self.lots:
+            # Nothing left to carry - drop rounding residue
+            self.total_cost = Decimal("0")
+
+    def _split(self, ratio: Decimal) -> None:
+        """
+        Apply a stock split to the running state.
+
+        The total cost is unchanged, so the average method only rescales the
+        quantity. Open lots are rescaled in place, which keeps HIFO order.
+        """
+        self.quantity *= ratio
+        for lot in self.lots or ():
+            lot.quantity *= ratio
+            lot.unit_cost /= ratio
+
+    def _add_lot(self, lot: Lot) -> None:
+        """Append a lot, keeping HIFO lots sorted by unit cost"""
+        if self.method != COST_BASIS_HIFO:
+            self.lots.append(lot)
+            return
+
+        # Binary search for the first lot costing at least as much, so among
+        # equally priced lots the oldest sits last and is sold first
+        low, high = 0, len(self.lots)
+        while low < high:
+            middle = (low + high) // 2
+            if self.lots[middle].unit_cost < lot.unit_cost:
+                low = middle + 1
+            else:
+                high = middle
+        self.lots.insert(low, lot)
+
+    def to_row(self, portfolio_id: str, symbol: str) -> dict:
+        """
+        Convert state to a positions table row.
+
+        Args:
+            portfolio_id: Portfolio UUID
+            symbol: Position symbol
+
+        Returns:
+            Dictionary ready for insert
+        """
+        return {
+            "portfolio_id": portfolio_id,
+            "symbol": symbol,
+            "quantity": float(self.quantity),
+            "average_cost": float(self.average_cost),
+            "total_cost": float(self.total_cost),
+            "last_transaction_date": self.last_transaction_date.isoformat() if self.last_transaction_date else None,
+            "last_transaction_id": self.last_transaction_id,
+            "cost_basis_method": self.method,
+            "lots": [lot.to_json() for lot in self.lots] if self.lots is not None else None
+        }
+
+
+def replay(transactions: Iterable[dict], method: str = COST_BASIS_AVERAGE) -> Dict[str, PositionState]:
+    """
+    Rebuild position state from scratch.
+
+    Args:
+        transactions: Raw transaction rows, ordered by transaction date
+        method: Cost basis method of the portfolio
+
+    Returns:
+        Dictionary of symbol -> PositionState
+    """
+    states: Dict[str, PositionState] = {}
+
+    for tx in transactions:
+        if tx["transaction_type"] not in POSITION_TRANSACTION_TYPES:
+            continue
+        state = states.get(tx["symbol"])
+        if state is None:
+            state = states[tx["symbol"]] = PositionState(method=method)
+        state.apply(tx)
+
+    return states
@@ -0,0 +1,129 @@
+"""
+Position recompute queue - coalesces position updates per portfolio.
+Writes arriving within a short window are merged into one recompute,
+so a burst of transactions costs one position pass instead of one each.
+"""
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# flush(portfolio_id, appended, dirty_symbols, rebuild_all)
+FlushFunction = Callable[[str, List[dict], List[str], bool], None]
+
+
+class PositionRecomputeQueue:
+    """
+    Queue of pending position recomputes, keyed by portfolio.
+
+    The first request for a portfolio opens a window of delay_seconds; every
+    request arriving before it closes is merged into the same recompute.
+    Recomputes for one portfolio never run concurrently.
+    """
+
+    def __init__(self, flush: FlushFunction, delay_seconds: float):
+        self._flush = flush
+        self._delay_seconds = delay_seconds
+        self._lock = threading.Lock()
+        self._pending: Dict[str, dict] = {}
+        self._running: Dict[str, dict] = {}
+        self._portfolio_locks: Dict[str, threading.Lock] = {}
+
+    def schedule(
+        self,
+        portfolio_id: str,
+        appended: Optional[List[dict]] = None,
+        dirty_symbols: Optional[Iterable[str]] = None,
+        rebuild_all: bool = False
+    ) -> threading.Event:
+        """
+        Request a position recompute for a portfolio.
+
+        Args:
+            portfolio_id: Portfolio UUID
+            appended: Newly inserted transaction rows
+            dirty_symbols: Symbols that need a full replay
+            rebuild_all: Rebuild every position in the portfolio
+
+        Returns:
+            Event that is set once the merged recompute has finished
+        """
+        with self._lock:
+            entry = self._pending.get(portfolio_id)
+            is_new = entry is None
+
+            if is_new:
+                entry = {
+                    "appended": [],
+                    "dirty_symbols": set(),
+                    "rebuild_all": False,
+                    "done": threading.Event()
+                }
+                self._pending[portfolio_id] = entry
+
+            entry["appended"].extend(appended or [])
+            entry["dirty_symbols"].update(dirty_symbols or [])
+            entry["rebuild_all"] = entry["rebuild_all"] or rebuild_all
+
+        if is_new:
+            if self._delay_seconds > 0:
+                timer = threading.Timer(self._delay_seconds, self._run, args=(portfolio_id,))
+                timer.daemon = True
+                timer.start()
+            else:
+                # Coalescing disabled - recompute in the caller's thread
+                self._run(portfolio_id)
+
+        return entry["done"]
+
+    def wait(self, portfolio_id: str, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until pending and running recomputes for a portfolio finish.
+
+        Args:
+            portfolio_id: Portfolio UUID
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if nothing is left pending, False on timeout
+        """
+        with self._lock:
+            events = [
+                entry["done"]
+                for entry in (self._running.get(portfolio_id), self._pending.get(portfolio_id))
+                if entry is not None
+            ]
+
+        return all(event.wait(timeout) for event in events)
+
+    def _run(self, portfolio_id: str):
+        """Close the window for a portfolio and run its merged recompute"""
+        with self._lock:
+            portfolio_lock = self._portfolio_locks.setdefault(portfolio_id, threading.Lock())
+
+        with portfolio_lock:
+            with self._lock:
+                entry = self._pending.pop(portfolio_id, None)
+                if entry is None:
+                    return
+                self._running[portfolio_id] = entry
+
+            try:
+                logger.info(
+                    f"Recomputing positions for portfolio: {portfolio_id} "
+                    f"({len(entry['appended'])} appended, {len(entry['dirty_symbols'])} dirty symbols)"
+                )
+                self._flush(
+                    portfolio_id,
+                    entry["appended"],
+                    list(entry["dirty_symbols"]),
+                    entry["rebuild_all"]
+                )
+            except Exception as e:
+                logger.error(f"Error recomputing positions for portfolio {portfolio_id}: {e}")
+            finally:
+                with self._lock:
+                    self._running.pop(portfolio_id, None)
+                entry["done"].set()
@@ -3,13 +3,15 @@ Position service - handles position calculations and queries.
 Updated to join with assets table for sector/industry information.
 """
 
-from app.database import get_supabase_client
+from app.database import get_async_supabase_client
 from app.models.schemas import Position
 from app.services.cash_movement_service import CashMovementService
 from app.services.dividend_service import DividendService
+from app.services.portfolio_summary_service import PortfolioSummaryService
 from typing import List, Optional
 from fastapi import HTTPException
 from decimal import Decimal
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,11 +21,11 @@ class PositionService:
     """Service class for position operations"""
     
     def __init__(self):
-        self.supabase = get_supabase_client()
         self.cash_service = CashMovementService()
         self.dividend_service = DividendService()
+        self.summary_service = PortfolioSummaryService()
     
-    def get_positions(
+    async def get_positions(
         self,
         portfolio_id: str,
         symbol: Optional[str] = None
@@ -39,14 +41,16 @@ class PositionService:
             List of positions with calculated values and asset metadata
         """
         try:
-            query = self.supabase.table("positions")\
+            supabase = await get_async_supabase_client()
+            
+            query = supabase.table("positions")\
                 .select("*, assets(name, sector, industry)")\
                 .eq("portfolio_id", portfolio_id)
             
             if symbol:
                 query = query.eq("symbol", symbol.upper())
             
-            response = query.execute()
+            response = await query.execute()
             
             # Enhance positions with calculated fields and asset data
             positions = []
@@ -60,7 +64,7 @@ class PositionService:
             logger.error(f"Error fetching positions: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    def get_position(self, position_id: str) -> Position:
+    async def get_position(self, position_id: str) -> Position:
         """
         Get a specific position by ID.
         
@@ -74,7 +78,9 @@ class PositionService:
             HTTPException: If position not found
         """
         try:
-            response = self.supabase.table("positions")\
+            supabase = await get_async_supabase_client()
+            
+            response = await supabase.table("positions")\
                 .select("*, assets(name, sector, industry)")\
                 .eq("id", position_id)\
                 .execute()
@@ -155,10 +161,37 @@ class PositionService:
         
         return Position(**enhanced_data)
     
-    def get_portfolio_summary(self, portfolio_id: str) -> dict:
+    async def get_portfolio_summary(self, portfolio_id: str) -> dict:
         """
         Get comprehensive summary statistics for a portfolio.
         
+        Served from the materialized portfolio_summaries row, which write
+        paths keep up to date. Falls back to computing it live if the
+        portfolio has no summary row yet.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            
+        Returns:
+            Summary statistics including positions, cash, dividends
+        """
+        try:
+            summary = await self.summary_service.get_stored_summary(portfolio_id)
+            if summary is not None:
+                return summary
+            
+            return await self._compute_portfolio_summary(portfolio_id)
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching portfolio summary: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    async def _compute_portfolio_summary(self, portfolio_id: str) -> dict:
+        """
+        Compute summary statistics live from positions, cash and dividends.
+        
         Args:
             portfolio_id: Portfolio UUID
             
@@ -166,12 +199,36 @@ class PositionService:
             Summary statistics including positions, cash, dividends
         """
         try:
-            # Get portfolio name
-            portfolio_response = self.supabase.table("portfolios")\
+            supabase = await get_async_supabase_client()
+            
+            # The five reads are independent - issue them concurrently so
+            # latency is that of the slowest query, not the sum of all five
+            portfolio_query = supabase.table("portfolios")\
                 .select("name")\
                 .eq("id", portfolio_id)\
                 .execute()
             
+            # Only the exact count is needed, not the rows themselves
+            tx_count_query = supabase.table("transactions")\
+                .select("id", count="exact")\
+                .eq("portfolio_id", portfolio_id)\
+                .limit(1)\
+                .execute()
+            
+            (
+                portfolio_response,
+                positions,
+                cash_balance,
+                dividend_income,
+                tx_response
+            ) = await asyncio.gather(
+                portfolio_query,
+                self.get_positions(portfolio_id),
+                self.cash_service.get_cash_balance(portfolio_id),
+                self.dividend_service.get_total_dividend_income(portfolio_id),
+                tx_count_query
+            )
+            
             if not portfolio_response.data:
                 raise HTTPException(
                     status_code=404,
@@ -180,9 +237,6 @@ class PositionService:
             
             portfolio_name = portfolio_response.data[0]["name"]
             
-            # Get all positions
-            positions = self.get_positions(portfolio_id)
-            
             # Calculate position totals
             total_value = Decimal("0")
             total_cost = Decimal("0")
@@ -200,19 +254,7 @@ class PositionService:
             total_gain_loss = total_value - total_cost
             total_gain_loss_percent = (total_gain_loss / total_cost * 100) if total_cost > 0 else Decimal("0")
             
-            # Get cash balance
-            cash_balance = self.cash_service.get_cash_balance(portfolio_id)
-            
-            # Get total dividend income
-            dividend_income = self.dividend_service.get_total_dividend_income(portfolio_id)
-            
-            # Get transaction count
-            tx_response = self.supabase.table("transactions")\
-                .select("id", count="exact")\
-                .eq("portfolio_id", portfolio_id)\
-                .execute()
-            
-            transaction_count = tx_response.count if hasattr(tx_response, 'count') else len(tx_response.data)
+            transaction_count = tx_response.count if tx_response.count is not None else len(tx_response.data)
             
             # Add cash to total value
             total_value += cash_balance
@@ -230,7 +272,8 @@ class PositionService:
                 "position_count": position_count,
                 "transaction_count": transaction_count,
                 "dividend_income": float(dividend_income),
-                "last_updated": datetime.now()
+                "last_updated": datetime.now(),
+                "version": None
             }
             
         except HTTPException:
@@ -239,7 +282,7 @@ class PositionService:
             logger.error(f"Error calculating portfolio summary: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    def get_allocation_by_sector(self, portfolio_id: str) -> List[dict]:
+    async def get_allocation_by_sector(self, portfolio_id: str) -> List[dict]:
         """
         Get portfolio allocation breakdown by sector.
         
@@ -250,7 +293,7 @@ class PositionService:
             List of allocations by sector
         """
         try:
-            positions = self.get_positions(portfolio_id)
+            positions = await self.get_positions(portfolio_id)
             
             # Group by sector
             allocations = {}
@@ -290,7 +333,7 @@ class PositionService:
             logger.error(f"Error calculating sector allocation: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    def get_allocation_by_industry(self, portfolio_id: str) -> List[dict]:
+    async def get_allocation_by_industry(self, portfolio_id: str) -> List[dict]:
         """
         Get portfolio allocation breakdown by industry.
         
@@ -301,7 +344,7 @@ class PositionService:
             List of allocations by industry
         """
         try:
-            positions = self.get_positions(portfolio_id)
+            positions = await self.get_positions(portfolio_id)
             
             # Group by industry
             allocations = {}
@@ -341,7 +384,7 @@ class PositionService:
             logger.error(f"Error calculating industry allocation: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    def get_comprehensive_allocation(self, portfolio_id: str) -> dict:
+    async def get_comprehensive_allocation(self, portfolio_id: str) -> dict:
         """
         Get comprehensive allocation breakdown by sector, industry, and country.
         
@@ -353,8 +396,8 @@ class PositionService:
         """
         try:
             return {
-                "by_sector": self.get_allocation_by_sector(portfolio_id),
-                "by_industry": self.get_allocation_by_industry(portfolio_id)
+                "by_sector": await self.get_allocation_by_sector(portfolio_id),
+                "by_industry": await self.get_allocation_by_industry(portfolio_id)
             }
             
         except Exception as e:
@@ -0,0 +1,66 @@
+"""
+Price service - applies batches of price quotes to positions.
+One RPC updates current_price on every position holding a quoted symbol
+and refreshes the summaries of the affected portfolios.
+"""
+
+from app.database import get_supabase_client
+from app.models.schemas import BulkPriceUpdate, BulkPriceUpdateResult
+from fastapi import HTTPException
+from datetime import datetime, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PriceService:
+    """Service class for position price updates"""
+    
+    def __init__(self):
+        self.supabase = get_supabase_client()
+    
+    def apply_quotes(self, update: BulkPriceUpdate) -> BulkPriceUpdateResult:
+        """
+        Set current_price and last_price_update on all positions of the quoted symbols.
+        
+        The update is a single set-based statement in the database
+        (apply_position_prices RPC); the materialized summaries of every
+        portfolio it touched are refreshed in the same call.
+        
+        Args:
+            update: Ticker -> price quotes and optional quote time
+            
+        Returns:
+            Counts of updated positions and portfolios, and symbols no position holds
+        """
+        try:
+            priced_at = update.priced_at or datetime.now(timezone.utc)
+            quotes = [
+                {"symbol": symbol, "price": str(price)}
+                for symbol, price in update.quotes.items()
+            ]
+            
+            response = self.supabase.rpc("apply_position_prices", {
+                "p_quotes": quotes,
+                "p_priced_at": priced_at.isoformat()
+            }).execute()
+            
+            result = response.data or {}
+            portfolio_ids = result.get("portfolio_ids") or []
+            
+            logger.info(
+                f"Applied {len(quotes)} quotes to {result.get('updated_positions', 0)} positions "
+                f"in {len(portfolio_ids)} portfolios"
+            )
+            
+            return BulkPriceUpdateResult(
+                quote_count=len(quotes),
+                updated_positions=result.get("updated_positions", 0),
+                portfolio_count=len(portfolio_ids),
+                unmatched_symbols=result.get("unmatched_symbols") or [],
+                priced_at=priced_at
+            )
+            
+        except Exception as e:
+            logger.error(f"Error applying price quotes: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
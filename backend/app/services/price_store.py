@@ -0,0 +1,345 @@
+"""
+Price store - local daily price history in memory-mapped NumPy arrays.
+
+One [ticker x calendar day] float64 array per field (open, high, low,
+close) is stored as .npy files and opened with mmap_mode="r", so only the
+pages that are read are loaded. Row = ticker index, column = days since
+the first day, which makes "closes of N tickers on day D" one column slice
+and "series of ticker T" one row slice, without a database round trip.
+Close prices are forward-filled over weekends and holidays.
+
+Built offline from CSV files (one <TICKER>.csv per ticker with date, open,
+high, low and close columns):
+
+    python -m app.services.price_store build ./csv_dir [--out data/prices]
+"""
+
+from app.config import get_settings
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from decimal import Decimal
+from datetime import date
+import argparse
+import csv
+import json
+import logging
+import os
+import shutil
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PRICE_FIELDS = ["open", "high", "low", "close"]
+MANIFEST_FILE = "manifest.json"
+
+
+def _read_csv(path: str) -> List[Tuple[date, Dict[str, float]]]:
+    """Read (day, {field: price}) rows from a price CSV (Yahoo-style headers work)"""
+    rows = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+        if "date" not in columns or "close" not in columns:
+            raise ValueError(f"{path}: needs at least date and close columns")
+
+        for row in reader:
+            day = date.fromisoformat(row[columns["date"]].strip()[:10])
+            prices = {}
+            for field in PRICE_FIELDS:
+                value = row.get(columns.get(field, ""), "")
+                if value not in (None, "", "null"):
+                    prices[field] = float(value)
+            if "close" in prices:
+                rows.append((day, prices))
+    return rows
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Replace NaNs with the last earlier value in the same row (in place)"""
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    values[:] = np.take_along_axis(values, index, axis=1)
+    # Days before a ticker's first price stay NaN
+    values[np.maximum.accumulate(valid, axis=1) == 0] = np.nan
+    return values
+
+
+def build_price_store(csv_dir: str, out_dir: str) -> dict:
+    """
+    Build the memory-mapped store from a directory of <TICKER>.csv files.
+
+    The new store is written next to out_dir and swapped in when complete,
+    so readers never see a half-written store.
+
+    Args:
+        csv_dir: Directory with one CSV per ticker
+        out_dir: Store directory
+
+    Returns:
+        The store manifest
+    """
+    files = sorted(name for name in os.listdir(csv_dir) if name.lower().endswith(".csv"))
+    if not files:
+        raise ValueError(f"No CSV files in {csv_dir}")
+
+    # First pass: tickers and the date range
+    data = {}
+    for name in files:
+        rows = _read_csv(os.path.join(csv_dir, name))
+        if rows:
+            data[os.path.splitext(name)[0].upper()] = rows
+
+    if not data:
+        raise ValueError(f"No price rows in {csv_dir}")
+
+    tickers = sorted(data)
+    first_day = min(day for rows in data.values() for day, _ in rows)
+    last_day = max(day for rows in data.values() for day, _ in rows)
+    day_count = (last_day - first_day).days + 1
+
+    tmp_dir = out_dir.rstrip("/") + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    # Second pass: fill the arrays one ticker row at a time
+    for field in PRICE_FIELDS:
+        array = np.lib.format.open_memmap(
+            os.path.join(tmp_dir, f"{field}.npy"),
+            mode="w+",
+            dtype=np.float64,
+            shape=(len(tickers), day_count)
+        )
+        array[:] = np.nan
+
+        for row_index, ticker in enumerate(tickers):
+            points = [(day, prices[field]) for day, prices in data[ticker] if field in prices]
+            if points:
+                columns = np.fromiter(((day - first_day).days for day, _ in points), dtype=np.int64, count=len(points))
+                array[row_index, columns] = np.fromiter((value for _, value in points), dtype=np.float64, count=len(points))
+
+        if field == "close":
+            forward_fill(array)
+
+        array.flush()
+        del array
+
+    manifest = {
+        "first_day": first_day.isoformat(),
+        "day_count": day_count,
+        "tickers": tickers
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f)
+
+    old_dir = out_dir.rstrip("/") + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.rename(out_dir, old_dir)
+    os.rename(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    logger.info(f"Built price store: {len(tickers)} tickers, {day_count} days ({first_day} - {last_day})")
+    return manifest
+
+
+@dataclass(frozen=True)
+class _StoreState:
+    """One opened version of the store; replaced as a whole on reload"""
+    arrays: Dict[str, np.ndarray]
+    ticker_index: Dict[str, int]
+    first_day: Optional[np.datetime64]
+    day_count: int
+
+    def offset(self, day: date) -> int:
+        return int((np.datetime64(day, "D") - self.first_day).astype(int))
+
+    def day_column(self, day: date) -> Optional[int]:
+        """Column of a day, clamped to the last stored day (None before the first)"""
+        if not self.arrays:
+            return None
+        offset = self.offset(day)
+        if offset < 0:
+            return None
+        return min(offset, self.day_count - 1)
+
+
+class PriceStore:
+    """
+    Read access to a built price store.
+
+    Arrays are opened lazily on first use; reload() picks up a rebuilt store.
+    Every read takes one reference to the current state, so a reload that
+    swaps in a new state never mixes old and new arrays within a read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state: Optional[_StoreState] = None
+
+    @property
+    def available(self) -> bool:
+        """True if a store has been built at the path"""
+        return bool(self._load_state().arrays)
+
+    def has_ticker(self, ticker: str) -> bool:
+        """True if the store has prices for a ticker"""
+        return ticker.upper() in self._load_state().ticker_index
+
+    def reload(self):
+        """Reopen the store files (after a rebuild)"""
+        state = self._open()
+        with self._lock:
+            self._state = state
+
+    def info(self) -> dict:
+        """Tickers and date range of the store"""
+        state = self._load_state()
+        if not state.arrays:
+            return {"available": False, "ticker_count": 0, "first_day": None, "last_day": None}
+        return {
+            "available": True,
+            "ticker_count": len(state.ticker_index),
+            "first_day": state.first_day.item(),
+            "last_day": (state.first_day + state.day_count - 1).item()
+        }
+
+    def get_closes(self, tickers: Iterable[str], day: date) -> Dict[str, Decimal]:
+        """
+        Close price of each ticker on a day (last close on or before it).
+
+        Args:
+            tickers: Ticker symbols
+            day: Day to look up
+
+        Returns:
+            Dictionary of ticker -> close; tickers without a price are left out
+        """
+        state = self._load_state()
+        column = state.day_column(day)
+        if column is None:
+            return {}
+
+        tickers = [ticker.upper() for ticker in tickers]
+        rows = [state.ticker_index.get(ticker, -1) for ticker in tickers]
+        known = [(ticker, row) for ticker, row in zip(tickers, rows) if row >= 0]
+        if not known:
+            return {}
+
+        closes = state.arrays["close"][[row for _, row in known], column]
+        return {
+            ticker: Decimal(str(value))
+            for (ticker, _), value in zip(known, closes.tolist())
+            if value == value  # skip NaN
+        }
+
+    def get_closes_on(self, ticker: str, days: np.ndarray) -> np.ndarray:
+        """
+        Close of one ticker on each of the given days (last close on or before it).
+
+        Args:
+            ticker: Ticker symbol
+            days: datetime64[D] array of days
+
+        Returns:
+            Float array aligned with days (NaN where there is no price)
+        """
+        state = self._load_state()
+        closes = np.full(len(days), np.nan)
+        row = state.ticker_index.get(ticker.upper())
+        if row is None or len(days) == 0:
+            return closes
+
+        offsets = (days.astype("datetime64[D]") - state.first_day).astype(np.int64)
+        known = offsets >= 0
+        closes[known] = state.arrays["close"][row, np.minimum(offsets[known], state.day_count - 1)]
+        return closes
+
+    def get_series(
+        self,
+        ticker: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        fields: Iterable[str] = ("close",)
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Daily series of one ticker.
+
+        Args:
+            ticker: Ticker symbol
+            start: First day (default: first day of the store)
+            end: Last day (default: last day of the store)
+            fields: Price fields to return
+
+        Returns:
+            Tuple of (datetime64[D] days, {field: read-only array view})
+        """
+        state = self._load_state()
+        row = state.ticker_index.get(ticker.upper())
+        if row is None:
+            return np.array([], dtype="datetime64[D]"), {field: np.array([]) for field in fields}
+
+        first = 0 if start is None else max(0, state.offset(start))
+        last = state.day_count - 1 if end is None else min(state.day_count - 1, state.offset(end))
+        if first > last:
+            return np.array([], dtype="datetime64[D]"), {field: np.array([]) for field in fields}
+
+        days = state.first_day + np.arange(first, last + 1)
+        return days, {field: state.arrays[field][row, first:last + 1] for field in fields}
+
+    def _load_state(self) -> _StoreState:
+        """Current state, opening the store on first use"""
+        state = self._state
+        if state is not None:
+            return state
+
+        with self._lock:
+            if self._state is None:
+                self._state = self._open()
+            return self._state
+
+    def _open(self) -> _StoreState:
+        """Open the store files into a new state (empty if no store is built)"""
+        manifest_path = os.path.join(self.path, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return _StoreState(arrays={}, ticker_index={}, first_day=None, day_count=0)
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        state = _StoreState(
+            arrays={
+                field: np.load(os.path.join(self.path, f"{field}.npy"), mmap_mode="r")
+                for field in PRICE_FIELDS
+            },
+            ticker_index={ticker: i for i, ticker in enumerate(manifest["tickers"])},
+            first_day=np.datetime64(manifest["first_day"], "D"),
+            day_count=manifest["day_count"]
+        )
+        logger.info(f"Opened price store: {len(state.ticker_index)} tickers, {state.day_count} days")
+        return state
+
+
+# Shared by all services in the process
+price_store = PriceStore(get_settings().price_store_path)
+
+
+def lookup_closes(symbols: List[str], day: date) -> Dict[str, Decimal]:
+    """Price lookup for snapshots: closes from the local store (empty if not built)"""
+    return price_store.get_closes(symbols, day)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Local price history store")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build = subcommands.add_parser("build", help="Build the store from <TICKER>.csv files")
+    build.add_argument("csv_dir", help="Directory with one CSV per ticker")
+    build.add_argument("--out", default=get_settings().price_store_path, help="Store directory")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        manifest = build_price_store(args.csv_dir, args.out)
+        print(f"✅ Built price store with {len(manifest['tickers'])} tickers in {args.out}")
@@ -0,0 +1,90 @@
+"""
+Realized gain service - realized P&L reports.
+Reads the realized_gains rows written by the position engine when sells
+are processed; totals are aggregated by the database.
+"""
+
+from app.database import get_async_supabase_client
+from app.models.schemas import RealizedGainGroup, RealizedGainsReport
+from app.services.portfolio_service import PortfolioService
+from typing import Optional
+from fastapi import HTTPException
+from decimal import Decimal
+from datetime import date
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RealizedGainService:
+    """Service class for realized gain reports"""
+    
+    def __init__(self):
+        self.portfolio_service = PortfolioService()
+    
+    async def get_realized_gains(
+        self,
+        portfolio_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        group_by: str = "symbol"
+    ) -> RealizedGainsReport:
+        """
+        Get realized gains of a portfolio, grouped by symbol, month or year.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            start_date: Only include sells on or after this date
+            end_date: Only include sells on or before this date
+            group_by: "symbol", "month" or "year"
+            
+        Returns:
+            Report with one group per key plus totals
+            
+        Raises:
+            HTTPException: If portfolio not found
+        """
+        try:
+            supabase = await get_async_supabase_client()
+            
+            _, response = await asyncio.gather(
+                self.portfolio_service.get_portfolio(portfolio_id),
+                supabase.rpc("portfolio_realized_gains", {
+                    "p_portfolio_id": portfolio_id,
+                    "p_start_date": start_date.isoformat() if start_date else None,
+                    "p_end_date": end_date.isoformat() if end_date else None,
+                    "p_group_by": group_by
+                }).execute()
+            )
+            
+            groups = [
+                RealizedGainGroup(
+                    key=row["group_key"],
+                    quantity=Decimal(str(row["quantity"])),
+                    cost_basis=Decimal(str(row["cost_basis"])),
+                    proceeds=Decimal(str(row["proceeds"])),
+                    realized_gain=Decimal(str(row["realized_gain"])),
+                    short_term_gain=Decimal(str(row["short_term_gain"])),
+                    long_term_gain=Decimal(str(row["long_term_gain"])),
+                    sell_count=row["sell_count"]
+                )
+                for row in response.data or []
+            ]
+            
+            return RealizedGainsReport(
+                portfolio_id=portfolio_id,
+                group_by=group_by,
+                start_date=start_date,
+                end_date=end_date,
+                total_cost_basis=sum((g.cost_basis for g in groups), Decimal("0")),
+                total_proceeds=sum((g.proceeds for g in groups), Decimal("0")),
+                total_realized_gain=sum((g.realized_gain for g in groups), Decimal("0")),
+                groups=groups
+            )
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching realized gains: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
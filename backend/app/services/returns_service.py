@@ -0,0 +1,296 @@
+"""
+Returns service - time-weighted and money-weighted portfolio returns.
+Snapshot values, cash flows and dividends are loaded once into NumPy
+arrays; TWR and XIRR are computed with array operations instead of
+per-day Python loops.
+
+Returns are measured on the invested positions: the value series is the
+snapshot position value (without cash) and flows are the money moved into
+or out of positions by trades and transfers. Inflows are invested at the
+start of their day, outflows are taken out at the end of it.
+"""
+
+from app.config import get_settings
+from app.database import get_async_supabase_client
+from app.services.portfolio_service import PortfolioService
+from app.utils.cache import TTLCache
+from dataclasses import dataclass
+from dateutil.relativedelta import relativedelta
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from datetime import date, datetime, timezone
+import asyncio
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DAYS_PER_YEAR = 365.0
+
+# period -> start date relative to the end date (None = since inception)
+RETURN_PERIODS = {
+    "1m": relativedelta(months=1),
+    "3m": relativedelta(months=3),
+    "6m": relativedelta(months=6),
+    "ytd": None,
+    "1y": relativedelta(years=1),
+    "3y": relativedelta(years=3),
+    "5y": relativedelta(years=5),
+    "10y": relativedelta(years=10),
+    "all": None
+}
+
+# Loaded series per (portfolio_id, start, end). Snapshot runs clear it, and
+# end is today's date so entries never outlive the day they were built for.
+_series_cache = TTLCache(maxsize=1000, ttl_seconds=get_settings().returns_cache_ttl_seconds)
+
+
+def clear_return_series_cache():
+    """Drop cached series (called after snapshots are written)"""
+    _series_cache.clear()
+
+
+@dataclass
+class ReturnSeries:
+    """
+    Daily series aligned on snapshot days.
+
+    inflows[i], outflows[i] and dividends[i] hold everything dated after
+    day i-1 up to and including day i; index 0 is the starting value only.
+    All amounts are positive.
+    """
+    dates: np.ndarray  # datetime64[D]
+    values: np.ndarray
+    inflows: np.ndarray
+    outflows: np.ndarray
+    dividends: np.ndarray
+
+    def __post_init__(self):
+        self._daily_returns = None
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def daily_returns(self) -> np.ndarray:
+        """
+        Return of each day after the first. Money put in during the day is
+        invested from its start; sell proceeds and transfers out count at
+        its end, so closing a position is not a -100% day. Days with
+        nothing invested count as 0.
+        """
+        if self._daily_returns is None:
+            invested = self.values[:-1] + self.inflows[1:]
+            ending = self.values[1:] + self.dividends[1:] + self.outflows[1:]
+            returns = np.zeros(len(invested))
+            np.divide(ending, invested, out=returns, where=invested > 0)
+            returns[invested > 0] -= 1.0
+            self._daily_returns = returns
+        return self._daily_returns
+
+
+def time_weighted_return(series: ReturnSeries) -> float:
+    """Chain the daily sub-period returns"""
+    if len(series) < 2:
+        return 0.0
+    return float(np.prod(1.0 + series.daily_returns) - 1.0)
+
+
+def annualize(total_return: float, days: float) -> Optional[float]:
+    """Annualize a return over a number of days (None below one year)"""
+    if days < DAYS_PER_YEAR or total_return <= -1.0:
+        return None
+    return float((1.0 + total_return) ** (DAYS_PER_YEAR / days) - 1.0)
+
+
+def xirr(
+    amounts: np.ndarray,
+    years: np.ndarray,
+    guesses: Tuple[float, ...] = (0.1, 0.0, -0.5, 0.5, 1.0, 3.0),
+    tolerance: float = 1e-9,
+    max_iterations: int = 100
+) -> Optional[float]:
+    """
+    Annual rate at which the discounted cash flows sum to zero.
+
+    Newton's method runs for several starting guesses at once: each
+    iteration evaluates the NPV and its derivative for all guesses in one
+    [guesses x flows] array operation.
+
+    Args:
+        amounts: Cash flows (negative = paid in, positive = paid out)
+        years: Time of each flow in years from the first one
+        guesses: Starting rates
+        tolerance: Convergence threshold on the rate step
+        max_iterations: Iteration cap
+
+    Returns:
+        Rate, or None if the flows have no sign change or nothing converged
+    """
+    if len(amounts) < 2 or not (np.any(amounts > 0) and np.any(amounts < 0)):
+        return None
+
+    rates = np.array(guesses, dtype=float)[:, None]
+    scale = np.abs(amounts).sum()
+
+    with np.errstate(all="ignore"):
+        for _ in range(max_iterations):
+            base = 1.0 + rates
+            discount = base ** -years
+            npv = (amounts * discount).sum(axis=1, keepdims=True)
+            slope = (-years * amounts * discount / base).sum(axis=1, keepdims=True)
+            step = np.where(slope != 0, npv / slope, 0.0)
+            # Keep rates above -100% where the discount factor is defined
+            rates = np.maximum(rates - step, -0.999999)
+            if not np.any(np.abs(step) >= tolerance):
+                break
+
+        npv = (amounts * (1.0 + rates) ** -years).sum(axis=1)
+
+    converged = np.isfinite(npv) & (np.abs(npv) <= scale * 1e-7)
+    if not converged.any():
+        return None
+
+    # Guesses are in order of preference - take the first that converged
+    return float(rates[np.argmax(converged), 0])
+
+
+def money_weighted_return(series: ReturnSeries) -> Optional[float]:
+    """
+    XIRR of the series: the starting value and every inflow are paid in,
+    outflows, dividends and the ending value are paid out.
+    """
+    if len(series) < 2:
+        return None
+
+    amounts = series.dividends + series.outflows - series.inflows
+    amounts[0] = -series.values[0]
+    amounts[-1] += series.values[-1]
+
+    nonzero = amounts != 0
+    years = (series.dates - series.dates[0]).astype(float) / DAYS_PER_YEAR
+    return xirr(amounts[nonzero], years[nonzero])
+
+
+def resolve_period(period: str, end: date) -> Optional[date]:
+    """Start date of a period ending on end (None = since inception)"""
+    if period == "ytd":
+        return date(end.year, 1, 1)
+    offset = RETURN_PERIODS[period]
+    return end - offset if offset is not None else None
+
+
+class ReturnsService:
+    """Service class for portfolio return calculations"""
+
+    def __init__(self):
+        self.portfolio_service = PortfolioService()
+
+    async def get_returns(self, portfolio_id: str, period: str = "1y") -> dict:
+        """
+        Get time-weighted and money-weighted returns for a period.
+
+        Args:
+            portfolio_id: Portfolio UUID
+            period: 1m, 3m, 6m, ytd, 1y, 3y, 5y, 10y or all
+
+        Returns:
+            TWR (total and annualized), XIRR and the period covered
+
+        Raises:
+            HTTPException: If portfolio not found
+        """
+        try:
+            end = datetime.now(timezone.utc).date()
+            start = resolve_period(period, end)
+
+            _, series = await asyncio.gather(
+                self.portfolio_service.get_portfolio(portfolio_id),
+                self.load_series(portfolio_id, start, end)
+            )
+
+            if len(series) == 0:
+                return {
+                    "portfolio_id": portfolio_id,
+                    "period": period,
+                    "start_date": None,
+                    "end_date": None,
+                    "snapshot_count": 0,
+                    "time_weighted_return": None,
+                    "annualized_time_weighted_return": None,
+                    "money_weighted_return": None
+                }
+
+            days = float((series.dates[-1] - series.dates[0]).astype(int))
+            twr = time_weighted_return(series)
+
+            return {
+                "portfolio_id": portfolio_id,
+                "period": period,
+                "start_date": series.dates[0].item(),
+                "end_date": series.dates[-1].item(),
+                "snapshot_count": len(series),
+                "time_weighted_return": twr,
+                "annualized_time_weighted_return": annualize(twr, days),
+                "money_weighted_return": money_weighted_return(series)
+            }
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error calculating returns: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def load_series(self, portfolio_id: str, start: Optional[date], end: date) -> ReturnSeries:
+        """
+        Load the daily series of a portfolio (cached per portfolio and dates).
+
+        Args:
+            portfolio_id: Portfolio UUID
+            start: First day (None = first snapshot)
+            end: Last day
+
+        Returns:
+            ReturnSeries aligned on snapshot days
+        """
+        key = (portfolio_id, start, end)
+        series = _series_cache.get(key)
+        if series is not None:
+            return series
+
+        supabase = await get_async_supabase_client()
+        response = await supabase.rpc("portfolio_return_inputs", {
+            "p_portfolio_id": portfolio_id,
+            "p_start_date": start.isoformat() if start else None,
+            "p_end_date": end.isoformat()
+        }).execute()
+
+        series = self._to_series(response.data or {})
+        _series_cache.set(key, series)
+        return series
+
+    def _to_series(self, data: dict) -> ReturnSeries:
+        """Align flow and dividend days onto the snapshot days"""
+        dates = np.array(data.get("snapshot_dates", []), dtype="datetime64[D]")
+        values = np.array(data.get("values", []), dtype=float)
+
+        def align(day_key: str, amount_key: str) -> np.ndarray:
+            aligned = np.zeros(len(dates))
+            days = np.array(data.get(day_key, []), dtype="datetime64[D]")
+            if len(dates) == 0 or len(days) == 0:
+                return aligned
+            amounts = np.array(data.get(amount_key, []), dtype=float)
+            # Each amount belongs to the first snapshot on or after its day;
+            # anything up to the first snapshot is part of the starting value
+            index = np.searchsorted(dates, days, side="left")
+            keep = (index > 0) & (index < len(dates))
+            np.add.at(aligned, index[keep], amounts[keep])
+            return aligned
+
+        return ReturnSeries(
+            dates=dates,
+            values=values,
+            inflows=align("flow_dates", "inflows"),
+            outflows=align("flow_dates", "outflows"),
+            dividends=align("dividend_dates", "dividends")
+        )
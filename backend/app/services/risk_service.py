@@ -0,0 +1,224 @@
+"""
+Risk service - volatility, drawdown, risk-adjusted return, VaR and beta.
+All metrics are NumPy operations over the daily return series of the
+returns service, which caches the loaded series per portfolio and date.
+Beta is measured against another portfolio or a benchmark ticker from the
+local price store.
+"""
+
+from app.services.portfolio_service import PortfolioService
+from app.services.price_store import price_store
+from app.services.returns_service import ReturnSeries, ReturnsService, resolve_period
+from statistics import NormalDist
+from typing import Optional
+from fastapi import HTTPException
+from datetime import datetime, timezone
+import asyncio
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Snapshots are taken every calendar day
+PERIODS_PER_YEAR = 365
+
+
+def max_drawdown(returns: np.ndarray) -> tuple:
+    """
+    Largest peak-to-trough fall of the wealth index.
+
+    Returns:
+        Tuple of (drawdown as a negative fraction, peak index, trough index)
+        with indexes into the wealth index (0 = start of the series)
+    """
+    wealth = np.concatenate(([1.0], np.cumprod(1.0 + returns)))
+    peaks = np.maximum.accumulate(wealth)
+    drawdowns = wealth / peaks - 1.0
+    trough = int(np.argmin(drawdowns))
+    peak = int(np.argmax(wealth[:trough + 1]))
+    return float(drawdowns[trough]), peak, trough
+
+
+def historical_var(returns: np.ndarray, confidence: float) -> tuple:
+    """
+    One-day value at risk and expected shortfall from the empirical distribution.
+
+    Returns:
+        Tuple of (VaR, CVaR) as positive loss fractions
+    """
+    cutoff = np.quantile(returns, 1.0 - confidence)
+    tail = returns[returns <= cutoff]
+    return float(-cutoff), float(-tail.mean())
+
+
+def parametric_var(returns: np.ndarray, confidence: float) -> tuple:
+    """
+    One-day value at risk and expected shortfall assuming normal returns.
+
+    Returns:
+        Tuple of (VaR, CVaR) as positive loss fractions
+    """
+    mean = returns.mean()
+    std = returns.std(ddof=1)
+    normal = NormalDist()
+    z = normal.inv_cdf(1.0 - confidence)
+    var = -(mean + z * std)
+    cvar = -(mean - std * normal.pdf(z) / (1.0 - confidence))
+    return float(var), float(cvar)
+
+
+def beta(returns: np.ndarray, benchmark_returns: np.ndarray) -> Optional[float]:
+    """Sensitivity of the returns to the benchmark returns"""
+    if len(returns) < 2:
+        return None
+    benchmark_variance = benchmark_returns.var(ddof=1)
+    if benchmark_variance == 0:
+        return None
+    covariance = np.cov(returns, benchmark_returns, ddof=1)[0, 1]
+    return float(covariance / benchmark_variance)
+
+
+def aligned_returns(series: ReturnSeries, benchmark: ReturnSeries) -> tuple:
+    """Daily returns of two series on the days both have a return for"""
+    # daily_returns[i] is the return of dates[i + 1]
+    _, index, benchmark_index = np.intersect1d(
+        series.dates[1:],
+        benchmark.dates[1:],
+        assume_unique=True,
+        return_indices=True
+    )
+    return series.daily_returns[index], benchmark.daily_returns[benchmark_index]
+
+
+def closes_aligned_returns(series: ReturnSeries, closes: np.ndarray) -> tuple:
+    """
+    Daily returns of a series and close-to-close returns of benchmark closes
+    taken on the same snapshot days, on the days both are defined.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        benchmark_returns = closes[1:] / closes[:-1] - 1.0
+    valid = np.isfinite(benchmark_returns)
+    return series.daily_returns[valid], benchmark_returns[valid]
+
+
+class RiskService:
+    """Service class for portfolio risk metrics"""
+
+    def __init__(self):
+        self.portfolio_service = PortfolioService()
+        self.returns_service = ReturnsService()
+
+    async def get_risk_metrics(
+        self,
+        portfolio_id: str,
+        period: str = "1y",
+        confidence: float = 0.95,
+        risk_free_rate: float = 0.0,
+        benchmark_portfolio_id: Optional[str] = None,
+        benchmark: Optional[str] = None
+    ) -> dict:
+        """
+        Get risk metrics of a portfolio over a period.
+
+        Args:
+            portfolio_id: Portfolio UUID
+            period: 1m, 3m, 6m, ytd, 1y, 3y, 5y, 10y or all
+            confidence: Confidence level for VaR/CVaR (e.g. 0.95)
+            risk_free_rate: Annual risk-free rate for Sharpe/Sortino
+            benchmark_portfolio_id: Portfolio whose returns beta is measured against
+            benchmark: Ticker whose closes beta is measured against
+
+        Returns:
+            Risk metrics (fractions, annualized where noted)
+
+        Raises:
+            HTTPException: If a portfolio or the benchmark ticker is not found
+        """
+        try:
+            if benchmark:
+                benchmark = benchmark.upper().strip()
+                if not price_store.has_ticker(benchmark):
+                    raise HTTPException(status_code=404, detail=f"No price history for {benchmark}")
+
+            end = datetime.now(timezone.utc).date()
+            start = resolve_period(period, end)
+
+            lookups = [
+                self.portfolio_service.get_portfolio(portfolio_id),
+                self.returns_service.load_series(portfolio_id, start, end)
+            ]
+            if benchmark_portfolio_id:
+                lookups.append(self.portfolio_service.get_portfolio(benchmark_portfolio_id))
+                lookups.append(self.returns_service.load_series(benchmark_portfolio_id, start, end))
+
+            results = await asyncio.gather(*lookups)
+            series = results[1]
+            benchmark_series = results[3] if benchmark_portfolio_id else None
+
+            metrics = {
+                "portfolio_id": portfolio_id,
+                "period": period,
+                "start_date": series.dates[0].item() if len(series) else None,
+                "end_date": series.dates[-1].item() if len(series) else None,
+                "observation_count": max(len(series) - 1, 0),
+                "confidence": confidence,
+                "risk_free_rate": risk_free_rate,
+                "benchmark_portfolio_id": benchmark_portfolio_id,
+                "benchmark": benchmark,
+                "annualized_return": None,
+                "annualized_volatility": None,
+                "sharpe_ratio": None,
+                "sortino_ratio": None,
+                "max_drawdown": None,
+                "max_drawdown_peak_date": None,
+                "max_drawdown_trough_date": None,
+                "var_historical": None,
+                "cvar_historical": None,
+                "var_parametric": None,
+                "cvar_parametric": None,
+                "beta": None
+            }
+
+            # Standard deviations need at least two returns
+            if len(series) < 3:
+                return metrics
+
+            returns = series.daily_returns
+            daily_risk_free = (1.0 + risk_free_rate) ** (1.0 / PERIODS_PER_YEAR) - 1.0
+            excess = returns - daily_risk_free
+
+            volatility = float(returns.std(ddof=1) * np.sqrt(PERIODS_PER_YEAR))
+            downside = float(np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2)) * np.sqrt(PERIODS_PER_YEAR))
+            annual_excess = float(excess.mean() * PERIODS_PER_YEAR)
+
+            drawdown, peak, trough = max_drawdown(returns)
+            var_historical, cvar_historical = historical_var(returns, confidence)
+            var_parametric, cvar_parametric = parametric_var(returns, confidence)
+
+            metrics.update({
+                "annualized_return": float(np.prod(1.0 + returns) ** (PERIODS_PER_YEAR / len(returns)) - 1.0),
+                "annualized_volatility": volatility,
+                "sharpe_ratio": annual_excess / volatility if volatility > 0 else None,
+                "sortino_ratio": annual_excess / downside if downside > 0 else None,
+                "max_drawdown": drawdown,
+                "max_drawdown_peak_date": series.dates[peak].item(),
+                "max_drawdown_trough_date": series.dates[trough].item(),
+                "var_historical": var_historical,
+                "cvar_historical": cvar_historical,
+                "var_parametric": var_parametric,
+                "cvar_parametric": cvar_parametric
+            })
+
+            if benchmark_series is not None and len(benchmark_series) >= 3:
+                metrics["beta"] = beta(*aligned_returns(series, benchmark_series))
+            elif benchmark:
+                closes = price_store.get_closes_on(benchmark, series.dates)
+                metrics["beta"] = beta(*closes_aligned_returns(series, closes))
+
+            return metrics
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error calculating risk metrics: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,367 @@
+"""
+Snapshot service - daily performance snapshots per portfolio.
+A run writes every missing day since each portfolio's last snapshot, for
+all portfolios, upserting the rows in chunks as they are built. History
+reads the stored points.
+"""
+
+from app.config import get_settings
+from app.database import get_supabase_client, get_async_supabase_client
+from app.models.schemas import PerformanceSnapshot
+from app.services.portfolio_service import PortfolioService
+from app.services.price_store import lookup_closes
+from app.services.position_engine import PositionState, parse_timestamp, to_decimal
+from app.services.returns_service import clear_return_series_cache
+from app.services.transaction_service import TransactionService
+from typing import Callable, Dict, Iterator, List, Optional
+from fastapi import HTTPException
+from decimal import Decimal
+from datetime import date, datetime, timedelta, timezone
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# price_lookup(symbols, day) -> {symbol: close price}; symbols without a
+# price are valued at cost. Defaults to the local price store.
+PriceLookup = Callable[[List[str], date], Dict[str, Decimal]]
+
+
+class SnapshotService:
+    """Service class for performance snapshots"""
+
+    def __init__(self, price_lookup: Optional[PriceLookup] = None):
+        self.supabase = get_supabase_client()
+        self.portfolio_service = PortfolioService()
+        self.transaction_service = TransactionService()
+        self.price_lookup = price_lookup or lookup_closes
+
+    def run_snapshots(self, through: Optional[date] = None, chunk_size: int = 1000) -> dict:
+        """
+        Write snapshots for every portfolio up to and including a day.
+
+        Portfolios are backfilled from the day after their last snapshot
+        (or their first ledger entry), so a missed run is caught up by the
+        next one.
+
+        Only a portfolio whose last snapshot is yesterday (with through being
+        today) is snapshotted from its stored positions. Stored positions
+        describe the present, so any larger gap, or a through day in the
+        past, replays the portfolio's whole ledger to rebuild the missing
+        days (at most snapshot_backfill_max_days of them).
+
+        Args:
+            through: Last day to snapshot (today, UTC, if None)
+            chunk_size: Rows per upsert request (rows are written as they are built)
+
+        Returns:
+            Counts of portfolios and snapshot rows written
+        """
+        try:
+            today = datetime.now(timezone.utc).date()
+            through = through or today
+
+            latest = self.supabase.rpc("latest_snapshot_dates", {}).execute()
+            last_dates = {
+                portfolio_id: date.fromisoformat(last_date)
+                for portfolio_id, last_date in (latest.data or {}).items()
+            }
+
+            # Rows are written per chunk as portfolios are processed, so a
+            # long backfill never holds every portfolio's history at once
+            pending: List[dict] = []
+            snapshot_count = 0
+            portfolio_count = 0
+
+            for portfolio_id in self._fetch_portfolio_ids():
+                last_date = last_dates.get(portfolio_id)
+
+                if last_date is not None and last_date >= through:
+                    continue
+
+                if through == today and last_date == through - timedelta(days=1):
+                    # Daily run - today's state is the stored positions. Older
+                    # missing days have no stored state and need the replay
+                    new_rows = [self._current_snapshot(portfolio_id, through)]
+                else:
+                    new_rows = self._backfill_snapshots(portfolio_id, last_date, through)
+
+                if new_rows:
+                    pending.extend(new_rows)
+                    portfolio_count += 1
+
+                while len(pending) >= chunk_size:
+                    self._write_snapshots(pending[:chunk_size])
+                    snapshot_count += chunk_size
+                    del pending[:chunk_size]
+
+            if pending:
+                self._write_snapshots(pending)
+                snapshot_count += len(pending)
+
+            if snapshot_count:
+                clear_return_series_cache()
+
+            logger.info(f"Wrote {snapshot_count} snapshots for {portfolio_count} portfolios through {through}")
+
+            return {
+                "through": through,
+                "portfolio_count": portfolio_count,
+                "snapshot_count": snapshot_count
+            }
+
+        except Exception as e:
+            logger.error(f"Error running snapshots: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def get_history(
+        self,
+        portfolio_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[PerformanceSnapshot]:
+        """
+        Get the stored daily snapshots of a portfolio.
+
+        Args:
+            portfolio_id: Portfolio UUID
+            start_date: Only include days on or after this date
+            end_date: Only include days on or before this date
+
+        Returns:
+            Snapshots ordered by date (oldest first)
+
+        Raises:
+            HTTPException: If portfolio not found
+        """
+        try:
+            _, rows = await asyncio.gather(
+                self.portfolio_service.get_portfolio(portfolio_id),
+                self._fetch_history_rows(portfolio_id, start_date, end_date)
+            )
+
+            return [PerformanceSnapshot(**s) for s in rows]
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching snapshot history: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def _fetch_history_rows(
+        self,
+        portfolio_id: str,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        page_size: int = 1000
+    ) -> List[dict]:
+        """Read snapshot rows page by page so long histories are not truncated"""
+        supabase = await get_async_supabase_client()
+        rows = []
+        start = 0
+
+        while True:
+            query = supabase.table("performance_snapshots")\
+                .select("*")\
+                .eq("portfolio_id", portfolio_id)
+
+            if start_date:
+                query = query.gte("snapshot_date", start_date.isoformat())
+
+            if end_date:
+                query = query.lte("snapshot_date", end_date.isoformat())
+
+            response = await query.order("snapshot_date", desc=False)\
+                .range(start, start + page_size - 1)\
+                .execute()
+
+            rows.extend(response.data)
+
+            if len(response.data) < page_size:
+                break
+            start += page_size
+
+        return rows
+
+    def _current_snapshot(self, portfolio_id: str, day: date) -> dict:
+        """
+        Build today's snapshot from the stored positions and cash balance.
+
+        Args:
+            portfolio_id: Portfolio UUID
+            day: Snapshot day
+
+        Returns:
+            performance_snapshots row
+        """
+        positions = self.supabase.table("positions")\
+            .select("symbol, quantity, total_cost, average_cost, current_price")\
+            .eq("portfolio_id", portfolio_id)\
+            .execute()
+
+        cash = self.supabase.rpc("portfolio_cash_balance", {"p_portfolio_id": portfolio_id}).execute()
+
+        prices = self._lookup_prices([row["symbol"] for row in positions.data], day)
+
+        states = {}
+        for row in positions.data:
+            states[row["symbol"]] = PositionState.from_row(row)
+            if row["symbol"] not in prices and row.get("current_price"):
+                prices[row["symbol"]] = to_decimal(row["current_price"])
+
+        return self._to_row(portfolio_id, day, states, prices, to_decimal(cash.data))
+
+    def _backfill_snapshots(self, portfolio_id: str, last_date: Optional[date], through: date) -> List[dict]:
+        """
+        Build snapshots for every day after last_date by replaying the ledger.
+
+        Args:
+            portfolio_id: Portfolio UUID
+            last_date: Last day already snapshotted (None if never)
+            through: Last day to snapshot
+
+        Returns:
+            performance_snapshots rows, oldest first
+        """
+        method = self.portfolio_service.get_cost_basis_method(portfolio_id)
+        transactions = self.transaction_service.fetch_position_transactions(portfolio_id)
+        movements = self._fetch_cash_movements(portfolio_id)
+
+        if last_date is not None:
+            start = last_date + timedelta(days=1)
+        else:
+            first_dates = [
+                parse_timestamp(rows[0][column]).date()
+                for rows, column in ((transactions, "transaction_date"), (movements, "movement_date"))
+                if rows
+            ]
+            if not first_dates:
+                # Empty ledger - nothing to snapshot yet
+                return []
+            start = min(first_dates)
+
+        start = max(start, through - timedelta(days=get_settings().snapshot_backfill_max_days))
+
+        states: Dict[str, PositionState] = {}
+        cash_balance = Decimal("0")
+        tx_index = 0
+        movement_index = 0
+        rows = []
+
+        # Apply everything before the first missing day, then one day at a time
+        day = start - timedelta(days=1)
+        while day <= through:
+            while tx_index < len(transactions) and parse_timestamp(transactions[tx_index]["transaction_date"]).date() <= day:
+                tx = transactions[tx_index]
+                state = states.get(tx["symbol"])
+                if state is None:
+                    state = states[tx["symbol"]] = PositionState(method=method)
+                state.apply(tx)
+                tx_index += 1
+
+            while movement_index < len(movements) and parse_timestamp(movements[movement_index]["movement_date"]).date() <= day:
+                movement = movements[movement_index]
+                amount = to_decimal(movement["amount"])
+                cash_balance += amount if movement["type"] == "deposit" else -amount
+                movement_index += 1
+
+            if day >= start:
+                open_states = {symbol: state for symbol, state in states.items() if state.is_open}
+                prices = self._lookup_prices(list(open_states), day)
+                rows.append(self._to_row(portfolio_id, day, open_states, prices, cash_balance))
+
+            day += timedelta(days=1)
+
+        return rows
+
+    def _fetch_portfolio_ids(self, page_size: int = 1000) -> Iterator[str]:
+        """Yield every portfolio id, reading the table page by page"""
+        start = 0
+
+        while True:
+            response = self.supabase.table("portfolios")\
+                .select("id")\
+                .order("id", desc=False)\
+                .range(start, start + page_size - 1)\
+                .execute()
+
+            for row in response.data:
+                yield row["id"]
+
+            if len(response.data) < page_size:
+                break
+            start += page_size
+
+    def _write_snapshots(self, rows: List[dict]):
+        """Upsert one chunk of snapshot rows"""
+        self.supabase.table("performance_snapshots")\
+            .upsert(rows, on_conflict="portfolio_id,snapshot_date")\
+            .execute()
+
+    def _fetch_cash_movements(self, portfolio_id: str, page_size: int = 1000) -> List[dict]:
+        """
+        Get all cash movements of a portfolio in date order (paged).
+
+        Returns:
+            List of raw cash movement rows
+        """
+        rows = []
+        start = 0
+
+        while True:
+            response = self.supabase.table("cash_movements")\
+                .select("id, type, amount, movement_date")\
+                .eq("portfolio_id", portfolio_id)\
+                .order("movement_date", desc=False)\
+                .order("id", desc=False)\
+                .range(start, start + page_size - 1)\
+                .execute()
+
+            rows.extend(response.data)
+
+            if len(response.data) < page_size:
+                break
+            start += page_size
+
+        return rows
+
+    def _lookup_prices(self, symbols: List[str], day: date) -> Dict[str, Decimal]:
+        """Closing prices for a day from the configured price lookup"""
+        if self.price_lookup is None or not symbols:
+            return {}
+        return dict(self.price_lookup(symbols, day))
+
+    def _to_row(
+        self,
+        portfolio_id: str,
+        day: date,
+        states: Dict[str, PositionState],
+        prices: Dict[str, Decimal],
+        cash_balance: Decimal
+    ) -> dict:
+        """
+        Value positions for one day, with the same rules as the portfolio
+        summary: positions without a price count at cost, cash is added to
+        the total value and pnl covers the positions only.
+        """
+        positions_value = Decimal("0")
+        total_cost = Decimal("0")
+
+        for symbol, state in states.items():
+            total_cost += state.total_cost
+            price = prices.get(symbol)
+            positions_value += state.quantity * price if price else state.total_cost
+
+        return {
+            "portfolio_id": portfolio_id,
+            "snapshot_date": day.isoformat(),
+            "total_value": float(positions_value + cash_balance),
+            "total_cost": float(total_cost),
+            "pnl": float(positions_value - total_cost)
+        }
+
+
+# Run from a daily scheduler (cron etc.): python -m app.services.snapshot_service
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(SnapshotService().run_snapshots())
@@ -3,16 +3,31 @@ Transaction service - handles all transaction-related business logic.
 Updated to work with assets table and new schema.
 """
 
-from app.database import get_supabase_client
+from app.config import get_settings
+from app.database import get_supabase_client, get_async_supabase_client
+from app.models.cost_basis import COST_BASIS_AVERAGE
 from app.models.schemas import TransactionCreate, TransactionUpdate, Transaction
 from app.services.asset_service import AssetService
-from typing import List, Optional
+from app.services.portfolio_service import PortfolioService
+from app.services.portfolio_summary_service import PortfolioSummaryService
+from app.services.position_recompute_queue import PositionRecomputeQueue
+from app.services.position_engine import (
+    POSITION_TRANSACTION_TYPES,
+    PositionState,
+    replay,
+    transaction_sort_key
+)
+from app.utils.pagination import apply_keyset, split_page
+from typing import Dict, Iterable, List, Optional, Tuple
 from fastapi import HTTPException
-from decimal import Decimal
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Version-checked position writes retried before the rows are left for the
+# next update to replay
+POSITION_WRITE_ATTEMPTS = 3
+
 
 class TransactionService:
     """Service class for transaction operations"""
@@ -20,13 +35,20 @@ class TransactionService:
     def __init__(self):
         self.supabase = get_supabase_client()
         self.asset_service = AssetService()
+        self.portfolio_service = PortfolioService()
+        self.summary_service = PortfolioSummaryService()
     
-    def create_transaction(self, transaction_data: TransactionCreate) -> Transaction:
+    def create_transaction(
+        self,
+        transaction_data: TransactionCreate,
+        wait_for_positions: bool = False
+    ) -> Transaction:
         """
         Create a new transaction.
         
         Args:
             transaction_data: Transaction creation data
+            wait_for_positions: Wait until positions reflect this transaction
             
         Returns:
             Created transaction
@@ -36,16 +58,7 @@ class TransactionService:
         """
         try:
             # Verify portfolio exists
-            portfolio_check = self.supabase.table("portfolios")\
-                .select("id")\
-                .eq("id", transaction_data.portfolio_id)\
-                .execute()
-            
-            if not portfolio_check.data:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Portfolio with id '{transaction_data.portfolio_id}' not found"
-                )
+            self.portfolio_service.ensure_portfolio_exists(transaction_data.portfolio_id)
             
             # Ensure asset exists (database trigger also handles this)
             # This gives us a chance to add metadata if provided
@@ -61,8 +74,12 @@ class TransactionService:
             
             logger.info(f"Created transaction: {transaction_data.symbol} - {transaction_data.transaction_type}")
             
-            # After creating transaction, update positions
-            self._update_positions(transaction_data.portfolio_id)
+            # Apply the new transaction on top of the stored position state
+            self._schedule_positions(
+                transaction_data.portfolio_id,
+                appended=response.data,
+                wait=wait_for_positions
+            )
             
             return Transaction(**response.data[0])
             
@@ -72,7 +89,91 @@ class TransactionService:
             logger.error(f"Error creating transaction: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    def get_transactions(
+    def create_transactions_bulk(
+        self,
+        portfolio_id: str,
+        transactions: List[TransactionCreate],
+        chunk_size: int = 500,
+        recompute_positions: bool = True
+    ) -> List[Transaction]:
+        """
+        Create many transactions for one portfolio in batched inserts.
+        
+        The portfolio is checked once, each distinct ticker is resolved once
+        and positions are recalculated once after all rows are written,
+        instead of once per transaction.
+        
+        Args:
+            portfolio_id: Portfolio UUID all transactions belong to
+            transactions: Validated transaction data
+            chunk_size: Number of rows per insert request
+            recompute_positions: Update positions after inserting (set False
+                when the caller recomputes once after several batches)
+            
+        Returns:
+            Created transactions
+            
+        Raises:
+            HTTPException: If portfolio not found or creation fails
+        """
+        if not transactions:
+            return []
+        
+        if any(t.portfolio_id != portfolio_id for t in transactions):
+            raise HTTPException(
+                status_code=400,
+                detail="All transactions must belong to the same portfolio"
+            )
+        
+        inserted: List[dict] = []
+        
+        try:
+            # Verify portfolios once for the whole batch
+            self.portfolio_service.ensure_portfolios_exist({t.portfolio_id for t in transactions})
+            
+            # Resolve every distinct ticker in one batch
+            self.asset_service.get_or_create_assets([t.symbol for t in transactions])
+            
+            for start in range(0, len(transactions), chunk_size):
+                chunk = transactions[start:start + chunk_size]
+                
+                response = self.supabase.table("transactions")\
+                    .insert([t.model_dump() for t in chunk])\
+                    .execute()
+                
+                if not response.data:
+                    raise HTTPException(status_code=500, detail="Failed to create transactions")
+                
+                inserted.extend(response.data)
+            
+            logger.info(f"Created {len(inserted)} transactions for portfolio: {portfolio_id}")
+            
+            return [Transaction(**t) for t in inserted]
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error creating transactions: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            # Keep positions consistent with whatever was written
+            if recompute_positions and inserted:
+                self._schedule_positions(portfolio_id, appended=inserted, wait=True)
+    
+    def recompute_positions(self, portfolio_id: str, symbols: Optional[Iterable[str]] = None):
+        """
+        Recalculate positions after transactions were written in bulk.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            symbols: Only recalculate these symbols (all positions if None)
+        """
+        if symbols is None:
+            self._schedule_positions(portfolio_id, rebuild_all=True, wait=True)
+        else:
+            self._schedule_positions(portfolio_id, dirty_symbols=symbols, wait=True)
+    
+    async def get_transactions(
         self,
         portfolio_id: Optional[str] = None,
         symbol: Optional[str] = None,
@@ -80,7 +181,7 @@ class TransactionService:
         limit: int = 100
     ) -> List[Transaction]:
         """
-        Get transactions with optional filters.
+        Get transactions with optional filters (first page only).
         
         Args:
             portfolio_id: Filter by portfolio
@@ -91,8 +192,39 @@ class TransactionService:
         Returns:
             List of transactions
         """
+        transactions, _ = await self.get_transactions_page(
+            portfolio_id=portfolio_id,
+            symbol=symbol,
+            transaction_type=transaction_type,
+            limit=limit
+        )
+        return transactions
+    
+    async def get_transactions_page(
+        self,
+        portfolio_id: Optional[str] = None,
+        symbol: Optional[str] = None,
+        transaction_type: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Transaction], Optional[str]]:
+        """
+        Get one page of transactions, newest first, keyed on (date, id).
+        
+        Args:
+            portfolio_id: Filter by portfolio
+            symbol: Filter by symbol
+            transaction_type: Filter by type (buy, sell, dividend, etc.)
+            limit: Maximum number of transactions to return
+            cursor: Cursor from the previous page (None for the first page)
+            
+        Returns:
+            Tuple of (transactions, cursor for the next page or None)
+        """
         try:
-            query = self.supabase.table("transactions").select("*")
+            supabase = await get_async_supabase_client()
+            
+            query = supabase.table("transactions").select("*")
             
             if portfolio_id:
                 query = query.eq("portfolio_id", portfolio_id)
@@ -103,12 +235,15 @@ class TransactionService:
             if transaction_type:
                 query = query.eq("transaction_type", transaction_type.lower())
             
-            response = query.order("transaction_date", desc=True)\
-                .limit(limit)\
+            response = await apply_keyset(query, "transaction_date", cursor)\
+                .limit(limit + 1)\
                 .execute()
             
-            return [Transaction(**t) for t in response.data]
+            rows, next_cursor = split_page(response.data, limit, "transaction_date")
+            return [Transaction(**t) for t in rows], next_cursor
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error fetching transactions: {e}")
             raise HTTPException(status_code=500, detail=str(e))
@@ -149,7 +284,8 @@ class TransactionService:
     def update_transaction(
         self,
         transaction_id: str,
-        transaction_data: TransactionUpdate
+        transaction_data: TransactionUpdate,
+        wait_for_positions: bool = False
     ) -> Transaction:
         """
         Update a transaction.
@@ -157,6 +293,7 @@ class TransactionService:
         Args:
             transaction_id: Transaction UUID
             transaction_data: Fields to update
+            wait_for_positions: Wait until positions reflect the update
             
         Returns:
             Updated transaction
@@ -189,8 +326,12 @@ class TransactionService:
             
             logger.info(f"Updated transaction: {transaction_id}")
             
-            # Recalculate positions after update
-            self._update_positions(existing.portfolio_id)
+            # Recalculate the affected symbols (old and new symbol if it changed)
+            self._schedule_positions(
+                existing.portfolio_id,
+                dirty_symbols={existing.symbol, response.data[0]["symbol"]},
+                wait=wait_for_positions
+            )
             
             return Transaction(**response.data[0])
             
@@ -200,12 +341,13 @@ class TransactionService:
             logger.error(f"Error updating transaction: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    def delete_transaction(self, transaction_id: str) -> dict:
+    def delete_transaction(self, transaction_id: str, wait_for_positions: bool = False) -> dict:
         """
         Delete a transaction.
         
         Args:
             transaction_id: Transaction UUID
+            wait_for_positions: Wait until positions reflect the deletion
             
         Returns:
             Success message
@@ -225,8 +367,12 @@ class TransactionService:
             
             logger.info(f"Deleted transaction: {transaction_id}")
             
-            # Recalculate positions after deletion
-            self._update_positions(transaction.portfolio_id)
+            # Recalculate positions for the deleted transaction's symbol
+            self._schedule_positions(
+                transaction.portfolio_id,
+                dirty_symbols={transaction.symbol},
+                wait=wait_for_positions
+            )
             
             return {
                 "success": True,
@@ -239,82 +385,387 @@ class TransactionService:
             logger.error(f"Error deleting transaction: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    def _update_positions(self, portfolio_id: str):
+    def _schedule_positions(
+        self,
+        portfolio_id: str,
+        appended: Optional[List[dict]] = None,
+        dirty_symbols: Optional[Iterable[str]] = None,
+        rebuild_all: bool = False,
+        wait: bool = False
+    ):
+        """
+        Queue a position update for a portfolio.
+        
+        Requests arriving within position_recompute_delay_ms are merged, so
+        a burst of writes results in a single recompute.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            appended: Newly inserted transaction rows
+            dirty_symbols: Symbols that need a full replay
+            rebuild_all: Rebuild every position in the portfolio
+            wait: Block until the merged recompute has finished
+        """
+        done = position_recompute_queue.schedule(
+            portfolio_id,
+            appended=appended,
+            dirty_symbols=dirty_symbols,
+            rebuild_all=rebuild_all
+        )
+        
+        if wait and not done.wait(get_settings().position_recompute_wait_seconds):
+            logger.warning(f"Timed out waiting for position recompute of portfolio: {portfolio_id}")
+    
+    def _flush_positions(
+        self,
+        portfolio_id: str,
+        appended: List[dict],
+        dirty_symbols: List[str],
+        rebuild_all: bool
+    ):
+        """
+        Run a merged position recompute (called by the recompute queue).
+        
+        The cost basis method is read fresh and checked again once the
+        rows are written. A method change that commits in between may have
+        had its rebuild (run by the request that changed it) land before
+        these writes, so everything is rebuilt with the new method.
+        """
+        method = self.portfolio_service.get_cost_basis_method(portfolio_id)
+        
+        if rebuild_all:
+            self._update_positions(portfolio_id, method=method)
+        else:
+            self._sync_positions(portfolio_id, appended=appended, dirty_symbols=dirty_symbols, method=method)
+        
+        for _ in range(POSITION_WRITE_ATTEMPTS):
+            current = self.portfolio_service.get_cost_basis_method(portfolio_id)
+            if current == method:
+                return
+            
+            logger.info(f"Cost basis method of portfolio {portfolio_id} changed to {current} during recompute, rebuilding")
+            method = current
+            self._update_positions(portfolio_id, method=method)
+        
+        logger.warning(f"Cost basis method of portfolio {portfolio_id} kept changing during recompute")
+    
+    def _sync_positions(
+        self,
+        portfolio_id: str,
+        appended: Optional[List[dict]] = None,
+        dirty_symbols: Optional[Iterable[str]] = None,
+        method: str = COST_BASIS_AVERAGE
+    ):
         """
-        Recalculate positions for a portfolio based on transactions.
-        This is called after any transaction is added, updated, or deleted.
+        Incrementally update positions after transactions change.
+        
+        Transactions appended at the end of a symbol's timeline are applied
+        on top of the stored position state. Symbols whose history changed
+        (updates, deletes, back-dated inserts) are replayed on their own,
+        the rest of the portfolio is left untouched.
         
-        Only processes 'buy' and 'sell' transactions.
-        Dividends, splits, etc. are tracked separately.
+        Rows are only written if they still have the version they were
+        read with; symbols changed meanwhile by another writer (another
+        request or worker) are replayed. If the write fails, the symbols
+        are marked so the next update replays them.
         
         Args:
             portfolio_id: Portfolio UUID
+            appended: Newly inserted transaction rows
+            dirty_symbols: Symbols that need a full replay
+            method: Cost basis method of the portfolio
         """
+        dirty = set(dirty_symbols or [])
+        states: Dict[str, PositionState] = {}
+        versions: Dict[str, Optional[int]] = {}
+        
         try:
-            # Get all buy/sell transactions for this portfolio
-            transactions = self.supabase.table("transactions")\
-                .select("*")\
+            # Group appended buy/sell transactions by symbol
+            appended_by_symbol: Dict[str, List[dict]] = {}
+            for tx in appended or []:
+                if tx["transaction_type"] in POSITION_TRANSACTION_TYPES and tx["symbol"] not in dirty:
+                    appended_by_symbol.setdefault(tx["symbol"], []).append(tx)
+            
+            if appended_by_symbol:
+                existing = self._fetch_position_rows(portfolio_id, list(appended_by_symbol))
+                
+                for symbol, txs in appended_by_symbol.items():
+                    txs.sort(key=transaction_sort_key)
+                    row = existing.get(symbol)
+                    
+                    # No stored state (new or closed position) or a failed
+                    # earlier write - replay the symbol
+                    if row is None or row.get("needs_replay"):
+                        dirty.add(symbol)
+                        continue
+                    
+                    state = PositionState.from_row(row)
+                    # Stored under another cost basis method - replay the symbol
+                    if state.method != method or not state.can_append(txs[0]):
+                        dirty.add(symbol)
+                        continue
+                    
+                    for tx in txs:
+                        state.apply(tx)
+                    states[symbol] = state
+                    versions[symbol] = row.get("version")
+            
+            for _ in range(POSITION_WRITE_ATTEMPTS):
+                if dirty:
+                    # Versions are read before the ledger, so a write that
+                    # lands in between is caught by the version check
+                    rows = self._fetch_position_rows(portfolio_id, list(dirty))
+                    replayed = replay(self.fetch_position_transactions(portfolio_id, list(dirty)), method)
+                    for symbol in dirty:
+                        states[symbol] = replayed.get(symbol, PositionState(method=method))
+                        versions[symbol] = rows[symbol].get("version") if symbol in rows else None
+                
+                conflicts = set(self._write_positions_checked(portfolio_id, states, versions))
+                written = {symbol: state for symbol, state in states.items() if symbol not in conflicts}
+                self._write_realized_gains(
+                    portfolio_id,
+                    written,
+                    replaced_symbols=[symbol for symbol in dirty if symbol not in conflicts]
+                )
+                
+                if not conflicts:
+                    break
+                
+                logger.info(f"Position rows changed concurrently, replaying: {sorted(conflicts)}")
+                dirty, states, versions = conflicts, {}, {}
+            else:
+                logger.warning(f"Positions still conflicting after {POSITION_WRITE_ATTEMPTS} attempts: {sorted(dirty)}")
+                self._mark_needs_replay(portfolio_id, dirty)
+            
+            logger.info(f"Updated positions for portfolio: {portfolio_id}")
+            
+        except Exception as e:
+            logger.error(f"Error updating positions: {e}")
+            # Don't raise exception - this is a background operation, but
+            # make sure the next update does not build on a stale row
+            self._mark_needs_replay(portfolio_id, dirty | set(states))
+        
+        self.summary_service.refresh_summary(portfolio_id)
+    
+    def _write_positions_checked(
+        self,
+        portfolio_id: str,
+        states: Dict[str, PositionState],
+        versions: Dict[str, Optional[int]]
+    ) -> List[str]:
+        """
+        Write position state where the stored row still has the expected version.
+        Closed positions are deleted under the same check.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            states: Dictionary of symbol -> PositionState to write
+            versions: Version each row was read with (None = no row)
+            
+        Returns:
+            Symbols that were not written because their row changed
+        """
+        if not states:
+            return []
+        
+        rows = [
+            dict(state.to_row(portfolio_id, symbol), expected_version=versions.get(symbol))
+            for symbol, state in states.items()
+        ]
+        
+        response = self.supabase.rpc("write_positions_checked", {
+            "p_portfolio_id": portfolio_id,
+            "p_rows": rows
+        }).execute()
+        
+        return response.data or []
+    
+    def _mark_needs_replay(self, portfolio_id: str, symbols: Iterable[str]):
+        """Flag stored positions so the next update replays them"""
+        symbols = list(symbols)
+        if not symbols:
+            return
+        
+        try:
+            self.supabase.table("positions")\
+                .update({"needs_replay": True})\
                 .eq("portfolio_id", portfolio_id)\
-                .in_("transaction_type", ["buy", "sell"])\
-                .order("transaction_date", desc=False)\
+                .in_("symbol", symbols)\
                 .execute()
+        except Exception as e:
+            logger.error(f"Error marking positions for replay: {e}")
+    
+    def _update_positions(self, portfolio_id: str, method: str = COST_BASIS_AVERAGE):
+        """
+        Rebuild all positions for a portfolio from its full transaction history.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            method: Cost basis method of the portfolio
+        """
+        try:
+            states = replay(self.fetch_position_transactions(portfolio_id), method)
+            self._write_positions(portfolio_id, states, replace_all=True)
+            self._write_realized_gains(portfolio_id, states, replace_all=True)
             
-            # Calculate positions by symbol
-            positions = {}
+            logger.info(f"Rebuilt positions for portfolio: {portfolio_id}")
             
-            for tx in transactions.data:
-                symbol = tx["symbol"]
-                quantity = Decimal(str(tx["quantity"])) if tx["quantity"] else Decimal("0")
-                price = Decimal(str(tx["price"])) if tx["price"] else Decimal("0")
-                fees = Decimal(str(tx.get("fees", 0)))
-                tx_type = tx["transaction_type"]
-                
-                if symbol not in positions:
-                    positions[symbol] = {
-                        "quantity": Decimal("0"),
-                        "total_cost": Decimal("0")
-                    }
-                
-                if tx_type == "buy":
-                    # Add to position
-                    positions[symbol]["quantity"] += quantity
-                    positions[symbol]["total_cost"] += (quantity * price) + fees
-                elif tx_type == "sell":
-                    # Reduce position
-                    if positions[symbol]["quantity"] > 0:
-                        # Calculate proportion being sold
-                        sell_proportion = quantity / positions[symbol]["quantity"]
-                        # Reduce cost basis proportionally
-                        cost_reduction = positions[symbol]["total_cost"] * sell_proportion
-                        positions[symbol]["total_cost"] -= cost_reduction
-                        # Subtract fees from remaining cost
-                        positions[symbol]["total_cost"] -= fees
-                    positions[symbol]["quantity"] -= quantity
-            
-            # Delete existing positions for this portfolio
+        except Exception as e:
+            logger.error(f"Error updating positions: {e}")
+            # Don't raise exception - this is a background operation
+        
+        self.summary_service.refresh_summary(portfolio_id)
+    
+    def _fetch_position_rows(self, portfolio_id: str, symbols: List[str]) -> Dict[str, dict]:
+        """
+        Get stored position rows for the given symbols.
+        
+        Returns:
+            Dictionary of symbol -> position row
+        """
+        response = self.supabase.table("positions")\
+            .select("*")\
+            .eq("portfolio_id", portfolio_id)\
+            .in_("symbol", symbols)\
+            .execute()
+        
+        return {row["symbol"]: row for row in response.data}
+    
+    def fetch_position_transactions(
+        self,
+        portfolio_id: str,
+        symbols: Optional[List[str]] = None,
+        page_size: int = 1000
+    ) -> List[dict]:
+        """
+        Get all position-affecting transactions in timeline order.
+        Pages through the results so long histories are not truncated.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            symbols: Optional list of symbols to restrict to
+            page_size: Rows per request
+            
+        Returns:
+            List of raw transaction rows
+        """
+        rows = []
+        start = 0
+        
+        while True:
+            query = self.supabase.table("transactions")\
+                .select("id, symbol, transaction_type, quantity, price, fees, transaction_date, lot_selection")\
+                .eq("portfolio_id", portfolio_id)\
+                .in_("transaction_type", POSITION_TRANSACTION_TYPES)
+            
+            if symbols:
+                query = query.in_("symbol", symbols)
+            
+            response = query.order("transaction_date", desc=False)\
+                .order("id", desc=False)\
+                .range(start, start + page_size - 1)\
+                .execute()
+            
+            rows.extend(response.data)
+            
+            if len(response.data) < page_size:
+                break
+            start += page_size
+        
+        return rows
+    
+    def _write_positions(
+        self,
+        portfolio_id: str,
+        states: Dict[str, PositionState],
+        replace_all: bool = False
+    ):
+        """
+        Persist position state with one batched upsert plus one delete.
+        
+        Open positions are upserted on (portfolio_id, symbol), so readers
+        never see an empty portfolio while positions are being rewritten.
+        Closed positions are removed afterwards in a single delete.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            states: Dictionary of symbol -> PositionState to write
+            replace_all: Remove every position not in states as well
+        """
+        open_rows = [
+            dict(state.to_row(portfolio_id, symbol), needs_replay=False)
+            for symbol, state in states.items()
+            if state.is_open
+        ]
+        open_symbols = [row["symbol"] for row in open_rows]
+        closed_symbols = [symbol for symbol, state in states.items() if not state.is_open]
+        
+        if open_rows:
+            self.supabase.table("positions")\
+                .upsert(open_rows, on_conflict="portfolio_id,symbol")\
+                .execute()
+        
+        if replace_all:
+            query = self.supabase.table("positions")\
+                .delete()\
+                .eq("portfolio_id", portfolio_id)
+            
+            if open_symbols:
+                query = query.not_.in_("symbol", open_symbols)
+            
+            query.execute()
+        elif closed_symbols:
             self.supabase.table("positions")\
                 .delete()\
                 .eq("portfolio_id", portfolio_id)\
+                .in_("symbol", closed_symbols)\
                 .execute()
+    
+    def _write_realized_gains(
+        self,
+        portfolio_id: str,
+        states: Dict[str, PositionState],
+        replaced_symbols: Optional[List[str]] = None,
+        replace_all: bool = False,
+        chunk_size: int = 1000
+    ):
+        """
+        Persist the gains realized while building position state.
+        
+        Replayed symbols carry their whole history, so their old rows are
+        deleted first; appended sells only add rows.
+        
+        Args:
+            portfolio_id: Portfolio UUID
+            states: Dictionary of symbol -> PositionState that was written
+            replaced_symbols: Symbols whose realized gains were rebuilt
+            replace_all: All realized gains of the portfolio were rebuilt
+            chunk_size: Rows per insert
+        """
+        if replace_all or replaced_symbols:
+            query = self.supabase.table("realized_gains")\
+                .delete()\
+                .eq("portfolio_id", portfolio_id)
             
-            # Insert updated positions (only if quantity > 0)
-            for symbol, data in positions.items():
-                if data["quantity"] > 0:
-                    average_cost = data["total_cost"] / data["quantity"]
-                    
-                    position_data = {
-                        "portfolio_id": portfolio_id,
-                        "symbol": symbol,
-                        "quantity": float(data["quantity"]),
-                        "average_cost": float(average_cost)
-                    }
-                    
-                    self.supabase.table("positions")\
-                        .insert(position_data)\
-                        .execute()
-            
-            logger.info(f"Updated positions for portfolio: {portfolio_id}")
+            if not replace_all:
+                query = query.in_("symbol", replaced_symbols)
             
-        except Exception as e:
-            logger.error(f"Error updating positions: {e}")
-            # Don't raise exception - this is a background operation
\ No newline at end of file
+            query.execute()
+        
+        rows = [
+            gain.to_row(portfolio_id, symbol, state.method)
+            for symbol, state in states.items()
+            for gain in state.realized
+        ]
+        
+        for start in range(0, len(rows), chunk_size):
+            self.supabase.table("realized_gains")\
+                .insert(rows[start:start + chunk_size])\
+                .execute()
+
+
+# Shared by all TransactionService instances so writes from any router merge
+position_recompute_queue = PositionRecomputeQueue(
+    flush=lambda *args: TransactionService()._flush_positions(*args),
+    delay_seconds=get_settings().position_recompute_delay_ms / 1000
+)
@@ -0,0 +1,112 @@
+"""
+Keyset (cursor) pagination helpers.
+Pages are ordered by (date column, id) descending; the cursor is the sort
+key of the last row returned, so every page costs the same however deep
+into the ledger it is.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+from fastapi import HTTPException
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Kinds of sort values a cursor can carry
+SORT_TIMESTAMP = "timestamp"
+SORT_TEXT = "text"
+
+
+def encode_cursor(sort_value: str, row_id: str) -> str:
+    """Build an opaque cursor from the last row's sort key"""
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_type: str = SORT_TIMESTAMP) -> Tuple[str, str]:
+    """
+    Read the sort key back from a cursor.
+
+    Cursors come from clients and end up in a PostgREST filter, so the id
+    must be a UUID and the sort value an ISO date/timestamp (or, for text
+    sort columns, free of quotes and backslashes).
+
+    Args:
+        cursor: Cursor returned with the previous page
+        sort_type: SORT_TIMESTAMP or SORT_TEXT
+
+    Returns:
+        Tuple of (sort value, row id)
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+        if not isinstance(sort_value, str) or not isinstance(row_id, str):
+            raise ValueError("cursor values must be strings")
+
+        row_id = str(uuid.UUID(row_id))
+
+        if sort_type == SORT_TEXT:
+            if not sort_value or any(c in sort_value for c in '"\\'):
+                raise ValueError("invalid text sort value")
+        else:
+            datetime.fromisoformat(sort_value.replace("Z", "+00:00"))
+
+        return sort_value, row_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def apply_keyset(
+    query,
+    date_column: str,
+    cursor: Optional[str],
+    ascending: bool = False,
+    sort_type: str = SORT_TIMESTAMP
+):
+    """
+    Restrict a query to rows after the cursor and order it by (date, id).
+
+    Works with both the sync and async PostgREST query builders.
+
+    Args:
+        query: Filter builder to extend
+        date_column: Date column the ledger is ordered by
+        cursor: Cursor returned with the previous page (None for the first page)
+        ascending: Oldest first instead of newest first
+        sort_type: Kind of values in date_column (SORT_TEXT for e.g. symbol)
+
+    Returns:
+        Query with keyset filter and ordering applied
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, sort_type)
+        op = "gt" if ascending else "lt"
+        query = query.or_(
+            f'{date_column}.{op}."{sort_value}",'
+            f'and({date_column}.eq."{sort_value}",id.{op}.{row_id})'
+        )
+
+    return query.order(date_column, desc=not ascending).order("id", desc=not ascending)
+
+
+def split_page(rows: List[dict], limit: int, date_column: str) -> Tuple[List[dict], Optional[str]]:
+    """
+    Split the limit + 1 rows fetched for a page into the page and next cursor.
+
+    Returns:
+        Tuple of (rows for this page, cursor for the next page or None)
+    """
+    if len(rows) <= limit:
+        return rows, None
+
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last[date_column], last["id"])
@@ -0,0 +1,11 @@
+-- Running position state used by the incremental position engine.
+-- total_cost is stored exactly instead of being derived from average_cost,
+-- last_transaction_date and last_transaction_id (the replay order key of
+-- the last applied transaction) tell whether a new trade can be appended.
+
+alter table positions add column if not exists total_cost numeric(20, 8);
+alter table positions add column if not exists last_transaction_date timestamptz;
+alter table positions add column if not exists last_transaction_id uuid;
+
+create index if not exists idx_transactions_portfolio_symbol_date
+    on transactions (portfolio_id, symbol, transaction_date);
@@ -0,0 +1,33 @@
+-- One position row per symbol per portfolio.
+-- Required by the batched position upsert (on_conflict=portfolio_id,symbol).
+-- Safe to re-run: duplicates are removed first and the constraint is only
+-- added if it does not exist yet.
+
+-- Keep the most recently updated row of each (portfolio_id, symbol).
+-- Positions are derived from the ledger, so rebuild the affected
+-- portfolios' positions afterwards if any rows were removed.
+delete from positions p
+ using (
+    select ctid,
+           row_number() over (
+               partition by portfolio_id, symbol
+               order by updated_at desc nulls last, ctid desc
+           ) as row_number
+      from positions
+ ) ranked
+ where p.ctid = ranked.ctid
+   and ranked.row_number > 1;
+
+do $$
+begin
+    if not exists (
+        select 1
+          from pg_constraint
+         where conname = 'positions_portfolio_symbol_key'
+           and conrelid = 'positions'::regclass
+    ) then
+        alter table positions
+            add constraint positions_portfolio_symbol_key unique (portfolio_id, symbol);
+    end if;
+end;
+$$;
@@ -0,0 +1,43 @@
+-- Server-side totals for cash movements and dividends.
+-- Only one scalar crosses the wire, however many rows a portfolio has.
+-- Date bounds are optional and inclusive, matching the list endpoints.
+-- The dates are timestamps, so the end bound is "before the next day"
+-- (a plain <= p_end_date would drop rows after midnight on the end date).
+
+create or replace function portfolio_cash_balance(
+    p_portfolio_id uuid,
+    p_start_date date default null,
+    p_end_date date default null
+)
+returns numeric
+language sql
+stable
+as $$
+    select coalesce(sum(case when type = 'deposit' then amount else -amount end), 0)
+    from cash_movements
+    where portfolio_id = p_portfolio_id
+      and (p_start_date is null or movement_date >= p_start_date)
+      and (p_end_date is null or movement_date < p_end_date + 1);
+$$;
+
+create or replace function portfolio_dividend_income(
+    p_portfolio_id uuid,
+    p_start_date date default null,
+    p_end_date date default null
+)
+returns numeric
+language sql
+stable
+as $$
+    select coalesce(sum(amount), 0)
+    from dividends
+    where portfolio_id = p_portfolio_id
+      and (p_start_date is null or dividend_date >= p_start_date)
+      and (p_end_date is null or dividend_date < p_end_date + 1);
+$$;
+
+create index if not exists idx_cash_movements_portfolio_date
+    on cash_movements (portfolio_id, movement_date);
+
+create index if not exists idx_dividends_portfolio_date
+    on dividends (portfolio_id, dividend_date);
@@ -0,0 +1,85 @@
+-- Materialized per-portfolio summary, refreshed by the write paths.
+-- Reads of /portfolios/{id}/summary become a single-row fetch.
+-- version increases on every refresh so clients can detect stale reads.
+
+create table if not exists portfolio_summaries (
+    portfolio_id uuid primary key references portfolios (id) on delete cascade,
+    total_value numeric(20, 8) not null default 0,
+    total_cost numeric(20, 8) not null default 0,
+    total_gain_loss numeric(20, 8) not null default 0,
+    total_gain_loss_percent numeric(20, 8) not null default 0,
+    cash_balance numeric(20, 8) not null default 0,
+    dividend_income numeric(20, 8) not null default 0,
+    position_count integer not null default 0,
+    transaction_count integer not null default 0,
+    version bigint not null default 1,
+    last_updated timestamptz not null default now()
+);
+
+-- Recompute one portfolio's summary with the same rules as
+-- PositionService.get_portfolio_summary (positions without a price are
+-- valued at cost, cash is added to total value).
+create or replace function refresh_portfolio_summary(p_portfolio_id uuid)
+returns portfolio_summaries
+language plpgsql
+as $$
+declare
+    v_total_cost numeric;
+    v_positions_value numeric;
+    v_position_count integer;
+    v_cash_balance numeric;
+    v_dividend_income numeric;
+    v_transaction_count integer;
+    v_summary portfolio_summaries;
+begin
+    select coalesce(sum(quantity * average_cost), 0),
+           coalesce(sum(case
+               when current_price is not null and current_price <> 0 then quantity * current_price
+               else quantity * average_cost
+           end), 0),
+           count(*)
+      into v_total_cost, v_positions_value, v_position_count
+      from positions
+     where portfolio_id = p_portfolio_id;
+
+    v_cash_balance := portfolio_cash_balance(p_portfolio_id);
+    v_dividend_income := portfolio_dividend_income(p_portfolio_id);
+
+    select count(*)
+      into v_transaction_count
+      from transactions
+     where portfolio_id = p_portfolio_id;
+
+    insert into portfolio_summaries as s (
+        portfolio_id, total_value, total_cost, total_gain_loss, total_gain_loss_percent,
+        cash_balance, dividend_income, position_count, transaction_count, version, last_updated
+    )
+    values (
+        p_portfolio_id,
+        v_positions_value + v_cash_balance,
+        v_total_cost,
+        v_positions_value - v_total_cost,
+        case when v_total_cost > 0 then (v_positions_value - v_total_cost) / v_total_cost * 100 else 0 end,
+        v_cash_balance,
+        v_dividend_income,
+        v_position_count,
+        v_transaction_count,
+        1,
+        now()
+    )
+    on conflict (portfolio_id) do update set
+        total_value = excluded.total_value,
+        total_cost = excluded.total_cost,
+        total_gain_loss = excluded.total_gain_loss,
+        total_gain_loss_percent = excluded.total_gain_loss_percent,
+        cash_balance = excluded.cash_balance,
+        dividend_income = excluded.dividend_income,
+        position_count = excluded.position_count,
+        transaction_count = excluded.transaction_count,
+        version = s.version + 1,
+        last_updated = now()
+    returning * into v_summary;
+
+    return v_summary;
+end;
+$$;
@@ -0,0 +1,12 @@
+-- Indexes backing keyset pagination on (date, id).
+-- Each page seeks straight to the cursor position instead of scanning
+-- and discarding the rows of earlier pages.
+
+create index if not exists idx_transactions_portfolio_date_id
+    on transactions (portfolio_id, transaction_date desc, id desc);
+
+create index if not exists idx_cash_movements_portfolio_date_id
+    on cash_movements (portfolio_id, movement_date desc, id desc);
+
+create index if not exists idx_dividends_portfolio_date_id
+    on dividends (portfolio_id, dividend_date desc, id desc);
@@ -0,0 +1,36 @@
+-- Lot-level cost basis.
+-- portfolios.cost_basis_method picks how sells are matched to buys,
+-- positions.lots holds the open lots as [lot_id, acquired_at, quantity, unit_cost],
+-- realized_gains gets one row per lot consumed by a sell.
+
+alter table portfolios add column if not exists cost_basis_method text not null default 'average'
+    check (cost_basis_method in ('average', 'fifo', 'lifo', 'hifo', 'specific_id'));
+
+alter table positions add column if not exists cost_basis_method text not null default 'average';
+alter table positions add column if not exists lots jsonb;
+
+-- Sells in specific-ID portfolios: [{"transaction_id": ..., "quantity": ...}]
+alter table transactions add column if not exists lot_selection jsonb;
+
+create table if not exists realized_gains (
+    id uuid primary key default gen_random_uuid(),
+    portfolio_id uuid not null references portfolios (id) on delete cascade,
+    symbol text not null,
+    sell_transaction_id uuid not null references transactions (id) on delete cascade,
+    lot_transaction_id uuid references transactions (id) on delete set null,
+    cost_basis_method text not null,
+    quantity numeric(20, 8) not null,
+    acquired_at timestamptz,
+    sold_at timestamptz not null,
+    cost_basis numeric(20, 8) not null,
+    proceeds numeric(20, 8) not null,
+    realized_gain numeric(20, 8) not null,
+    holding_period text check (holding_period in ('short', 'long')),
+    created_at timestamptz not null default now()
+);
+
+create index if not exists idx_realized_gains_portfolio_sold_at
+    on realized_gains (portfolio_id, sold_at);
+
+create index if not exists idx_realized_gains_portfolio_symbol
+    on realized_gains (portfolio_id, symbol);
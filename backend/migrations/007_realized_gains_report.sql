@@ -0,0 +1,42 @@
+-- Realized gain totals grouped by symbol, month or year.
+-- Date bounds are optional and inclusive (whole days, UTC).
+
+create or replace function portfolio_realized_gains(
+    p_portfolio_id uuid,
+    p_start_date date default null,
+    p_end_date date default null,
+    p_group_by text default 'symbol'
+)
+returns table (
+    group_key text,
+    quantity numeric,
+    cost_basis numeric,
+    proceeds numeric,
+    realized_gain numeric,
+    short_term_gain numeric,
+    long_term_gain numeric,
+    sell_count bigint
+)
+language sql
+stable
+as $$
+    select
+        case p_group_by
+            when 'month' then to_char(sold_at at time zone 'UTC', 'YYYY-MM')
+            when 'year' then to_char(sold_at at time zone 'UTC', 'YYYY')
+            else symbol
+        end as group_key,
+        sum(quantity),
+        sum(cost_basis),
+        sum(proceeds),
+        sum(realized_gain),
+        coalesce(sum(realized_gain) filter (where holding_period = 'short'), 0),
+        coalesce(sum(realized_gain) filter (where holding_period = 'long'), 0),
+        count(distinct sell_transaction_id)
+    from realized_gains
+    where portfolio_id = p_portfolio_id
+      and (p_start_date is null or sold_at >= p_start_date::timestamp at time zone 'UTC')
+      and (p_end_date is null or sold_at < (p_end_date + 1)::timestamp at time zone 'UTC')
+    group by 1
+    order by 1;
+$$;
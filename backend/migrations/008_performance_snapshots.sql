@@ -0,0 +1,34 @@
+-- Daily performance snapshots, one row per portfolio per day.
+-- Written in bulk by SnapshotService; history endpoints read them directly.
+
+create table if not exists performance_snapshots (
+    id uuid primary key default gen_random_uuid(),
+    portfolio_id uuid not null references portfolios (id) on delete cascade,
+    snapshot_date date not null,
+    total_value numeric(20, 8),
+    total_cost numeric(20, 8),
+    pnl numeric(20, 8),
+    created_at timestamptz not null default now()
+);
+
+-- Required by the batched snapshot upsert (on_conflict=portfolio_id,snapshot_date)
+create unique index if not exists idx_performance_snapshots_portfolio_date
+    on performance_snapshots (portfolio_id, snapshot_date);
+
+-- Last snapshot day of every portfolio, so a run only backfills missing days.
+-- One jsonb object ({portfolio_id: date}) so the API row limit does not
+-- cut it off.
+drop function if exists latest_snapshot_dates();
+
+create or replace function latest_snapshot_dates()
+returns jsonb
+language sql
+stable
+as $$
+    select coalesce(jsonb_object_agg(portfolio_id, last_snapshot_date), '{}'::jsonb)
+    from (
+        select portfolio_id, max(snapshot_date) as last_snapshot_date
+        from performance_snapshots
+        group by portfolio_id
+    ) latest;
+$$;
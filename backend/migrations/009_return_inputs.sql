@@ -0,0 +1,82 @@
+-- Inputs of the returns engine in one call, as parallel arrays.
+-- Returned as a single jsonb value so long daily histories are not cut
+-- off by the API row limit.
+--
+-- values: position value per snapshot day (total_cost + pnl, without cash)
+-- inflows: money put into positions per day (buys and transfers in at cost)
+-- outflows: money taken out of positions per day (sell proceeds and
+--           transfers out; unpriced transfers out at their carried cost)
+-- dividends: dividend income per day
+-- Date bounds are optional and inclusive.
+
+create or replace function portfolio_return_inputs(
+    p_portfolio_id uuid,
+    p_start_date date default null,
+    p_end_date date default null
+)
+returns jsonb
+language sql
+stable
+as $$
+    with snapshots as (
+        select snapshot_date as day,
+               coalesce(total_cost, 0) + coalesce(pnl, 0) as value
+        from performance_snapshots
+        where portfolio_id = p_portfolio_id
+          and (p_start_date is null or snapshot_date >= p_start_date)
+          and (p_end_date is null or snapshot_date <= p_end_date)
+    ),
+    position_transactions as (
+        select t.transaction_date::date as day,
+               t.transaction_type,
+               t.quantity * coalesce(t.price, carried.unit_cost, 0) as gross,
+               coalesce(t.fees, 0) as fees
+        from transactions t
+        -- Carried cost of an unpriced transfer out: average cost of the
+        -- symbol's acquisitions up to the transfer (average cost basis)
+        left join lateral (
+            select sum(a.quantity * a.price + coalesce(a.fees, 0)) / nullif(sum(a.quantity), 0) as unit_cost
+            from transactions a
+            where t.transaction_type = 'transfer_out'
+              and t.price is null
+              and a.portfolio_id = t.portfolio_id
+              and a.symbol = t.symbol
+              and a.transaction_type in ('buy', 'transfer_in')
+              and a.price is not null
+              and a.transaction_date <= t.transaction_date
+        ) carried on true
+        where t.portfolio_id = p_portfolio_id
+          and t.transaction_type in ('buy', 'sell', 'transfer_in', 'transfer_out')
+          and (p_start_date is null or t.transaction_date >= p_start_date)
+          and (p_end_date is null or t.transaction_date < p_end_date + 1)
+    ),
+    flows as (
+        select day,
+               sum(case when transaction_type in ('buy', 'transfer_in') then gross + fees else 0 end) as inflow,
+               sum(case
+                   when transaction_type = 'sell' then gross - fees
+                   when transaction_type = 'transfer_out' then gross
+                   else 0
+               end) as outflow
+        from position_transactions
+        group by 1
+    ),
+    dividend_days as (
+        select dividend_date::date as day,
+               sum(amount) as amount
+        from dividends
+        where portfolio_id = p_portfolio_id
+          and (p_start_date is null or dividend_date >= p_start_date)
+          and (p_end_date is null or dividend_date < p_end_date + 1)
+        group by 1
+    )
+    select jsonb_build_object(
+        'snapshot_dates', coalesce((select jsonb_agg(day order by day) from snapshots), '[]'::jsonb),
+        'values', coalesce((select jsonb_agg(value order by day) from snapshots), '[]'::jsonb),
+        'flow_dates', coalesce((select jsonb_agg(day order by day) from flows), '[]'::jsonb),
+        'inflows', coalesce((select jsonb_agg(inflow order by day) from flows), '[]'::jsonb),
+        'outflows', coalesce((select jsonb_agg(outflow order by day) from flows), '[]'::jsonb),
+        'dividend_dates', coalesce((select jsonb_agg(day order by day) from dividend_days), '[]'::jsonb),
+        'dividends', coalesce((select jsonb_agg(amount order by day) from dividend_days), '[]'::jsonb)
+    );
+$$;
@@ -0,0 +1,93 @@
+-- Bulk price refresh: set current_price on every position holding a quoted
+-- symbol, across all portfolios, in one set-based update, then refresh the
+-- materialized summaries of the portfolios that changed.
+--
+-- A price change only moves the position values, so the summaries are
+-- updated with one aggregate over the affected portfolios' positions; cash,
+-- dividends and transaction counts are kept from the stored summary instead
+-- of being recomputed from the ledger. Portfolios without a summary row yet
+-- get a full refresh_portfolio_summary.
+
+create index if not exists idx_positions_symbol
+    on positions (symbol);
+
+-- p_quotes: [{"symbol": "AAPL", "price": 189.5}, ...] with unique, uppercase symbols
+create or replace function apply_position_prices(
+    p_quotes jsonb,
+    p_priced_at timestamptz default now()
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_portfolio_ids uuid[];
+    v_updated_count integer;
+    v_unmatched text[];
+    v_portfolio_id uuid;
+begin
+    with quotes as (
+        select q.symbol, q.price
+        from jsonb_to_recordset(p_quotes) as q (symbol text, price numeric)
+    ),
+    updated as (
+        update positions p
+           set current_price = quotes.price,
+               last_price_update = p_priced_at
+          from quotes
+         where p.symbol = quotes.symbol
+        returning p.portfolio_id, p.symbol
+    ),
+    matched as (
+        select distinct symbol from updated
+    )
+    select coalesce(array_agg(distinct portfolio_id), '{}'),
+           count(*),
+           coalesce((
+               select array_agg(q.symbol order by q.symbol)
+               from jsonb_to_recordset(p_quotes) as q (symbol text, price numeric)
+               where q.symbol not in (select symbol from matched)
+           ), '{}')
+      into v_portfolio_ids, v_updated_count, v_unmatched
+      from updated;
+
+    with totals as (
+        select portfolio_id,
+               coalesce(sum(quantity * average_cost), 0) as total_cost,
+               coalesce(sum(case
+                   when current_price is not null and current_price <> 0 then quantity * current_price
+                   else quantity * average_cost
+               end), 0) as positions_value,
+               count(*) as position_count
+          from positions
+         where portfolio_id = any(v_portfolio_ids)
+         group by portfolio_id
+    )
+    update portfolio_summaries s
+       set total_value = totals.positions_value + s.cash_balance,
+           total_cost = totals.total_cost,
+           total_gain_loss = totals.positions_value - totals.total_cost,
+           total_gain_loss_percent = case
+               when totals.total_cost > 0 then (totals.positions_value - totals.total_cost) / totals.total_cost * 100
+               else 0
+           end,
+           position_count = totals.position_count,
+           version = s.version + 1,
+           last_updated = now()
+      from totals
+     where s.portfolio_id = totals.portfolio_id;
+
+    for v_portfolio_id in
+        select id
+          from unnest(v_portfolio_ids) as id
+         where not exists (select 1 from portfolio_summaries s where s.portfolio_id = id)
+    loop
+        perform refresh_portfolio_summary(v_portfolio_id);
+    end loop;
+
+    return jsonb_build_object(
+        'updated_positions', v_updated_count,
+        'portfolio_ids', to_jsonb(v_portfolio_ids),
+        'unmatched_symbols', to_jsonb(v_unmatched)
+    );
+end;
+$$;
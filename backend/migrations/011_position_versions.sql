@@ -0,0 +1,113 @@
+-- Optimistic concurrency for incremental position writes.
+-- version changes whenever a position's running state changes (values come
+-- from a sequence, so a deleted and re-created row never reuses one).
+-- The incremental path only writes a row that still has the version it
+-- read; anything else is replayed from the ledger.
+-- needs_replay marks rows whose last write failed, so the next update
+-- replays the symbol instead of appending to stale state.
+
+create sequence if not exists position_version_seq;
+
+alter table positions add column if not exists version bigint not null default nextval('position_version_seq');
+alter table positions add column if not exists needs_replay boolean not null default false;
+
+create or replace function bump_position_version()
+returns trigger
+language plpgsql
+as $$
+begin
+    if (new.quantity, new.total_cost, new.last_transaction_date, new.last_transaction_id,
+        new.cost_basis_method, new.lots, new.needs_replay)
+       is distinct from
+       (old.quantity, old.total_cost, old.last_transaction_date, old.last_transaction_id,
+        old.cost_basis_method, old.lots, old.needs_replay) then
+        new.version := nextval('position_version_seq');
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists positions_bump_version on positions;
+create trigger positions_bump_version
+    before update on positions
+    for each row execute function bump_position_version();
+
+-- Write position rows only where the stored version still matches.
+-- p_rows: positions rows plus expected_version (null = the row must not
+-- exist yet); rows with quantity <= 0 delete the position.
+-- Returns the symbols whose row changed since it was read.
+create or replace function write_positions_checked(p_portfolio_id uuid, p_rows jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    r jsonb;
+    v_expected bigint;
+    v_count integer;
+    v_conflicts text[] := '{}';
+begin
+    for r in select value from jsonb_array_elements(p_rows) loop
+        v_expected := (r->>'expected_version')::bigint;
+
+        if coalesce((r->>'quantity')::numeric, 0) <= 0 then
+            delete from positions
+             where portfolio_id = p_portfolio_id
+               and symbol = r->>'symbol'
+               and version = v_expected;
+            get diagnostics v_count = row_count;
+
+            if v_count = 0 and exists (
+                select 1 from positions
+                 where portfolio_id = p_portfolio_id
+                   and symbol = r->>'symbol'
+            ) then
+                v_conflicts := v_conflicts || (r->>'symbol');
+            end if;
+
+        elsif v_expected is null then
+            insert into positions (
+                portfolio_id, symbol, quantity, average_cost, total_cost,
+                last_transaction_date, last_transaction_id, cost_basis_method, lots
+            )
+            values (
+                p_portfolio_id,
+                r->>'symbol',
+                (r->>'quantity')::numeric,
+                (r->>'average_cost')::numeric,
+                (r->>'total_cost')::numeric,
+                (r->>'last_transaction_date')::timestamptz,
+                (r->>'last_transaction_id')::uuid,
+                r->>'cost_basis_method',
+                nullif(r->'lots', 'null'::jsonb)
+            )
+            on conflict (portfolio_id, symbol) do nothing;
+            get diagnostics v_count = row_count;
+
+            if v_count = 0 then
+                v_conflicts := v_conflicts || (r->>'symbol');
+            end if;
+
+        else
+            update positions
+               set quantity = (r->>'quantity')::numeric,
+                   average_cost = (r->>'average_cost')::numeric,
+                   total_cost = (r->>'total_cost')::numeric,
+                   last_transaction_date = (r->>'last_transaction_date')::timestamptz,
+                   last_transaction_id = (r->>'last_transaction_id')::uuid,
+                   cost_basis_method = r->>'cost_basis_method',
+                   lots = nullif(r->'lots', 'null'::jsonb),
+                   needs_replay = false
+             where portfolio_id = p_portfolio_id
+               and symbol = r->>'symbol'
+               and version = v_expected;
+            get diagnostics v_count = row_count;
+
+            if v_count = 0 then
+                v_conflicts := v_conflicts || (r->>'symbol');
+            end if;
+        end if;
+    end loop;
+
+    return to_jsonb(v_conflicts);
+end;
+$$;
@@ -0,0 +1,10 @@
+"""
+Shared test setup.
+Service modules read settings at import time, so the required Supabase
+settings get placeholder values; the tests never reach the database.
+"""
+
+import os
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
@@ -0,0 +1,216 @@
+"""
+In-memory stand-ins for the Supabase clients' table() query builders.
+They support the filters and writes the services use, and record every
+executed request so tests can count round trips.
+"""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import re
+import uuid
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.operation = "select"
+        self.filters = []
+        self.payload = None
+        self.options = {}
+        self.row_limit = None
+        self.order_column = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, "eq", value))
+        return self
+
+    def neq(self, column, value):
+        self.filters.append((column, "neq", value))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append((column, "in", list(values)))
+        return self
+
+    def order(self, column, desc=False):
+        self.order_column = (column, desc)
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def range(self, start, end):
+        self.options["range"] = (start, end)
+        return self
+
+    def insert(self, rows):
+        self.operation = "insert"
+        self.payload = rows
+        return self
+
+    def update(self, data):
+        self.operation = "update"
+        self.payload = data
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        self.operation = "upsert"
+        self.payload = rows
+        self.options.update(on_conflict=on_conflict, ignore_duplicates=ignore_duplicates)
+        return self
+
+    def delete(self):
+        self.operation = "delete"
+        return self
+
+    def _matches(self, row):
+        for column, op, value in self.filters:
+            if op == "eq" and row.get(column) != value:
+                return False
+            if op == "neq" and row.get(column) == value:
+                return False
+            if op == "in" and row.get(column) not in value:
+                return False
+        return True
+
+    def execute(self):
+        self.client.requests.append((self.table, self.operation, list(self.filters), self.payload))
+        rows = self.client.tables.setdefault(self.table, [])
+
+        if self.operation == "select":
+            data = [dict(row) for row in rows if self._matches(row)]
+            if self.order_column:
+                column, desc = self.order_column
+                data.sort(key=lambda row: row[column], reverse=desc)
+            if "range" in self.options:
+                start, end = self.options["range"]
+                data = data[start:end + 1]
+            if self.row_limit is not None:
+                data = data[:self.row_limit]
+            return SimpleNamespace(data=data)
+
+        if self.operation in ("insert", "upsert"):
+            new_rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            key = self.options.get("on_conflict")
+            data = []
+            for new_row in new_rows:
+                if key and any(row[key] == new_row[key] for row in rows):
+                    if self.options.get("ignore_duplicates"):
+                        continue
+                    raise AssertionError("duplicate upsert without ignore_duplicates is not faked")
+                row = self.client.new_row(self.table, new_row)
+                rows.append(row)
+                data.append(dict(row))
+            return SimpleNamespace(data=data)
+
+        if self.operation == "update":
+            data = []
+            for row in rows:
+                if self._matches(row):
+                    row.update(self.payload, updated_at=self.client.now())
+                    data.append(dict(row))
+            return SimpleNamespace(data=data)
+
+        if self.operation == "delete":
+            data = [dict(row) for row in rows if self._matches(row)]
+            rows[:] = [row for row in rows if not self._matches(row)]
+            return SimpleNamespace(data=data)
+
+        raise AssertionError(f"unsupported operation {self.operation}")
+
+
+class FakeSupabase:
+    """Tables are lists of row dicts; requests lists (table, operation, filters, payload)"""
+
+    def __init__(self, tables=None):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in (tables or {}).items()}
+        self.requests = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def now(self):
+        return datetime.now(timezone.utc).isoformat()
+
+    def new_row(self, table, values):
+        row = {"created_at": self.now(), "updated_at": self.now()}
+        if table != "assets":
+            row["id"] = str(uuid.uuid4())
+        row.update(values)
+        return row
+
+    def count(self, table, operation=None):
+        return sum(
+            1 for name, op, _, _ in self.requests
+            if name == table and (operation is None or op == operation)
+        )
+
+
+class FakeKeysetQuery:
+    """Async read-only query over one table, understanding apply_keyset's filters"""
+
+    KEYSET = re.compile(r'^(\w+)\.(gt|lt)\."([^"]*)",and\(\w+\.eq\."[^"]*",id\.(?:gt|lt)\.([\w-]+)\)$')
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.filters = []
+        self.after = None
+        self.orders = []
+        self.row_limit = None
+
+    def select(self, columns="*"):
+        self.columns = None if columns == "*" else columns.split(",")
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def or_(self, filters):
+        column, op, value, row_id = self.KEYSET.match(filters).groups()
+        self.after = (column, op, value, row_id)
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    async def execute(self):
+        self.client.requests.append((self.table, "select", list(self.filters), self.after))
+        rows = [row for row in self.client.tables.get(self.table, []) if all(row.get(c) == v for c, v in self.filters)]
+
+        if self.orders:
+            desc = self.orders[0][1]
+            rows.sort(key=lambda row: tuple(row[column] for column, _ in self.orders), reverse=desc)
+        if self.after:
+            column, op, value, row_id = self.after
+            if op == "gt":
+                rows = [row for row in rows if (row[column], row["id"]) > (value, row_id)]
+            else:
+                rows = [row for row in rows if (row[column], row["id"]) < (value, row_id)]
+        if self.row_limit is not None:
+            rows = rows[:self.row_limit]
+        if self.columns:
+            rows = [{column: row.get(column) for column in self.columns} for row in rows]
+        return SimpleNamespace(data=[dict(row) for row in rows])
+
+
+class FakeAsyncSupabase:
+    """Async client stand-in for keyset-paged reads"""
+
+    def __init__(self, tables=None):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in (tables or {}).items()}
+        self.requests = []
+
+    def table(self, name):
+        return FakeKeysetQuery(self, name)
@@ -0,0 +1,26 @@
+"""API smoke tests through the ASGI test client (no database calls)"""
+
+from app.main import app
+from fastapi.testclient import TestClient
+
+client = TestClient(app)
+
+
+def test_root():
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "running"
+
+
+def test_health():
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+
+
+def test_request_validation_error():
+    response = client.post("/prices/bulk", json={"quotes": {"AAPL": -1}})
+
+    assert response.status_code == 422
@@ -0,0 +1,115 @@
+"""Tests for the in-process asset search index"""
+
+from app.models.schemas import Asset
+from app.services.asset_search_index import AssetSearchIndex
+from datetime import datetime
+import threading
+import pytest
+
+NOW = datetime(2024, 1, 1)
+
+
+def asset(ticker, name=None):
+    return Asset(ticker=ticker, name=name, created_at=NOW, updated_at=NOW)
+
+
+def tickers(results):
+    return [a.ticker for a in results]
+
+
+@pytest.fixture
+def index():
+    index = AssetSearchIndex(refresh_interval_seconds=3600)
+    index.load([
+        asset("AAPL", "Apple Inc."),
+        asset("AA", "Alcoa Corporation"),
+        asset("MSFT", "Microsoft Corporation"),
+        asset("PAAS", "Pan American Silver")
+    ])
+    return index
+
+
+def test_ranking(index):
+    assert tickers(index.search("aa")) == ["AA", "AAPL"]
+    assert tickers(index.search("corp")) == ["AA", "MSFT"]
+    assert tickers(index.search("aas")) == ["PAAS"]
+    assert index.search("  ") == []
+
+
+def test_upsert_replaces_asset(index):
+    index.upsert(asset("MSFT", "Macrosoft"))
+
+    assert tickers(index.search("micro")) == []
+    assert tickers(index.search("macro")) == ["MSFT"]
+
+
+def test_upsert_before_load_is_ignored():
+    index = AssetSearchIndex(refresh_interval_seconds=3600)
+    index.upsert(asset("AAPL", "Apple Inc."))
+
+    assert not index.is_loaded
+    index.load([])
+    assert index.search("aapl") == []
+
+
+def test_needs_load_after_refresh_interval():
+    index = AssetSearchIndex(refresh_interval_seconds=0)
+    assert index.needs_load
+    index.load([])
+    assert index.is_loaded
+
+
+def test_background_reload_serves_old_index_and_keeps_upserts(index):
+    fetch_started = threading.Event()
+    finish_fetch = threading.Event()
+
+    def fetch_assets():
+        fetch_started.set()
+        finish_fetch.wait(5)
+        # Snapshot taken before the upsert below
+        return [asset("AAPL", "Apple Inc."), asset("NVDA", "NVIDIA Corporation")]
+
+    assert index.reload(fetch_assets)
+    assert fetch_started.wait(5)
+
+    # The running reload is not started twice, and searches use the old index
+    assert not index.reload(fetch_assets)
+    assert tickers(index.search("msft")) == ["MSFT"]
+
+    index.upsert(asset("TSLA", "Tesla Inc."))
+    assert tickers(index.search("tsla")) == ["TSLA"]
+
+    finish_fetch.set()
+    for thread in threading.enumerate():
+        if thread.name == "asset-search-reload":
+            thread.join(5)
+
+    assert tickers(index.search("msft")) == []
+    assert tickers(index.search("nvda")) == ["NVDA"]
+    assert tickers(index.search("tsla")) == ["TSLA"]
+
+
+def test_upsert_during_first_load_is_kept():
+    index = AssetSearchIndex(refresh_interval_seconds=3600)
+
+    def fetch_assets():
+        index.upsert(asset("TSLA", "Tesla Inc."))
+        return [asset("AAPL", "Apple Inc.")]
+
+    index.reload(fetch_assets, background=False)
+
+    assert tickers(index.search("tsla")) == ["TSLA"]
+    assert tickers(index.search("aapl")) == ["AAPL"]
+
+
+def test_failed_reload_can_be_retried(index):
+    def failing_fetch():
+        raise RuntimeError("database unavailable")
+
+    with pytest.raises(RuntimeError):
+        index.reload(failing_fetch, background=False)
+
+    # Old index still serves, and the next reload starts
+    assert tickers(index.search("msft")) == ["MSFT"]
+    assert index.reload(lambda: [asset("NVDA")], background=False)
+    assert tickers(index.search("nvda")) == ["NVDA"]
@@ -0,0 +1,109 @@
+"""Tests for asset lookups and their caches (database replaced by an in-memory fake)"""
+
+from app.models.schemas import AssetUpdate
+from app.services import asset_service
+from app.services.asset_service import AssetService
+from tests.fake_supabase import FakeSupabase
+import pytest
+
+
+def asset_row(ticker, name=None):
+    return {
+        "ticker": ticker,
+        "name": name,
+        "created_at": "2024-01-01T00:00:00+00:00",
+        "updated_at": "2024-01-01T00:00:00+00:00"
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    asset_service._asset_cache.clear()
+    asset_service._asset_list_cache.clear()
+    yield
+    asset_service._asset_cache.clear()
+    asset_service._asset_list_cache.clear()
+
+
+def make_service(*rows):
+    service = AssetService()
+    service.supabase = FakeSupabase({"assets": list(rows)})
+    return service
+
+
+def test_get_asset_is_cached():
+    service = make_service(asset_row("AAPL", "Apple Inc."))
+
+    assert service.get_asset("aapl").name == "Apple Inc."
+    assert service.get_asset("AAPL ").name == "Apple Inc."
+
+    assert service.supabase.count("assets", "select") == 1
+
+
+def test_update_asset_invalidates_the_caches():
+    service = make_service(asset_row("AAPL", "Apple Inc."), asset_row("MSFT", "Microsoft"))
+    service.get_asset("AAPL")
+    assert [a.name for a in service.get_all_assets()] == ["Apple Inc.", "Microsoft"]
+
+    updated = service.update_asset("aapl", AssetUpdate(name="Apple"))
+
+    assert updated.name == "Apple"
+    selects = service.supabase.count("assets", "select")
+    # The ticker is served from the refreshed cache, the list is re-read
+    assert service.get_asset("AAPL").name == "Apple"
+    assert service.supabase.count("assets", "select") == selects
+    assert [a.name for a in service.get_all_assets()] == ["Apple", "Microsoft"]
+    assert service.supabase.count("assets", "select") == selects + 1
+
+
+def test_batch_resolve_reuses_existing_and_inserts_missing():
+    service = make_service(asset_row("AAPL", "Apple Inc."), asset_row("MSFT", "Microsoft"))
+
+    assets = service.get_or_create_assets(["aapl", "NVDA", " msft", "nvda", "Tsla", "", "AAPL"])
+
+    assert [a.ticker for a in assets] == ["AAPL", "NVDA", "MSFT", "TSLA"]
+    assert [a.name for a in assets] == ["Apple Inc.", None, "Microsoft", None]
+
+    # One `in` lookup for all tickers, one insert of only the missing ones
+    requests = service.supabase.requests
+    assert [(table, operation) for table, operation, _, _ in requests] == [("assets", "select"), ("assets", "upsert")]
+    assert requests[0][2] == [("ticker", "in", ["AAPL", "NVDA", "MSFT", "TSLA"])]
+    assert requests[1][3] == [{"ticker": "NVDA"}, {"ticker": "TSLA"}]
+    assert sorted(row["ticker"] for row in service.supabase.tables["assets"]) == ["AAPL", "MSFT", "NVDA", "TSLA"]
+
+
+def test_batch_resolve_uses_the_cache():
+    service = make_service(asset_row("AAPL", "Apple Inc."))
+    service.get_or_create_assets(["AAPL", "NVDA"])
+    request_count = len(service.supabase.requests)
+
+    assets = service.get_or_create_assets(["nvda", "aapl"])
+
+    assert [a.ticker for a in assets] == ["NVDA", "AAPL"]
+    assert len(service.supabase.requests) == request_count
+
+
+class RacingSupabase(FakeSupabase):
+    """Another process creates NVDA between the lookup and the insert"""
+
+    def table(self, name):
+        query = super().table(name)
+        upsert = query.upsert
+
+        def racing_upsert(rows, **kwargs):
+            if not any(row["ticker"] == "NVDA" for row in self.tables["assets"]):
+                self.tables["assets"].append(asset_row("NVDA", "NVIDIA"))
+            return upsert(rows, **kwargs)
+
+        query.upsert = racing_upsert
+        return query
+
+
+def test_batch_resolve_picks_up_concurrently_created_assets():
+    service = AssetService()
+    service.supabase = RacingSupabase({"assets": []})
+
+    assets = service.get_or_create_assets(["NVDA", "TSLA"])
+
+    assert [(a.ticker, a.name) for a in assets] == [("NVDA", "NVIDIA"), ("TSLA", None)]
+    assert len(service.supabase.tables["assets"]) == 2
@@ -0,0 +1,113 @@
+"""Tests for the process-local TTL/LRU cache"""
+
+from app.utils import cache
+from app.utils.cache import TTLCache
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def test_get_and_set():
+    ttl_cache = TTLCache(maxsize=10, ttl_seconds=60)
+
+    assert ttl_cache.get("AAPL") is None
+    assert ttl_cache.get("AAPL", "default") == "default"
+    ttl_cache.set("AAPL", "Apple")
+    assert ttl_cache.get("AAPL") == "Apple"
+    assert len(ttl_cache) == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    ttl_cache = TTLCache(maxsize=10, ttl_seconds=60)
+    ttl_cache.set("AAPL", "Apple")
+
+    clock.now += 59.9
+    assert ttl_cache.get("AAPL") == "Apple"
+
+    clock.now += 0.2
+    assert ttl_cache.get("AAPL") is None
+    # Expired entries are dropped on lookup
+    assert len(ttl_cache) == 0
+
+
+def test_set_restarts_the_ttl(clock):
+    ttl_cache = TTLCache(maxsize=10, ttl_seconds=60)
+    ttl_cache.set("AAPL", "Apple")
+
+    clock.now += 50
+    ttl_cache.set("AAPL", "Apple Inc.")
+    clock.now += 50
+
+    assert ttl_cache.get("AAPL") == "Apple Inc."
+
+
+def test_least_recently_used_entry_is_evicted():
+    ttl_cache = TTLCache(maxsize=2, ttl_seconds=60)
+    ttl_cache.set("AAPL", 1)
+    ttl_cache.set("MSFT", 2)
+
+    # Reading AAPL makes MSFT the least recently used
+    assert ttl_cache.get("AAPL") == 1
+    ttl_cache.set("NVDA", 3)
+
+    assert ttl_cache.get("MSFT") is None
+    assert ttl_cache.get("AAPL") == 1
+    assert ttl_cache.get("NVDA") == 3
+    assert len(ttl_cache) == 2
+
+
+def test_overwriting_a_key_does_not_evict():
+    ttl_cache = TTLCache(maxsize=2, ttl_seconds=60)
+    ttl_cache.set("AAPL", 1)
+    ttl_cache.set("MSFT", 2)
+    ttl_cache.set("AAPL", 3)
+
+    assert ttl_cache.get("MSFT") == 2
+    assert ttl_cache.get("AAPL") == 3
+
+
+def test_invalidate_and_clear():
+    ttl_cache = TTLCache(maxsize=10, ttl_seconds=60)
+    ttl_cache.set("AAPL", 1)
+    ttl_cache.set("MSFT", 2)
+
+    ttl_cache.invalidate("AAPL")
+    ttl_cache.invalidate("GOOG")
+    assert ttl_cache.get("AAPL") is None
+    assert ttl_cache.get("MSFT") == 2
+
+    ttl_cache.clear()
+    assert len(ttl_cache) == 0
+
+
+def test_stats(clock):
+    ttl_cache = TTLCache(maxsize=10, ttl_seconds=60)
+    ttl_cache.set("AAPL", 1)
+    ttl_cache.get("AAPL")
+    ttl_cache.get("AAPL")
+    ttl_cache.get("MSFT")
+    clock.now += 61
+    ttl_cache.get("AAPL")
+
+    assert ttl_cache.stats() == {
+        "hits": 2,
+        "misses": 2,
+        "hit_rate": 0.5,
+        "size": 0,
+        "maxsize": 10,
+        "ttl_seconds": 60
+    }
+    assert TTLCache(maxsize=1, ttl_seconds=1).stats()["hit_rate"] == 0.0
@@ -0,0 +1,154 @@
+"""Tests for Arrow IPC / Parquet dataset exports (database replaced by an in-memory fake)"""
+
+from app.services import export_service
+from app.services.columnar_export_service import DATASETS, ColumnarExportService
+from tests.fake_supabase import FakeAsyncSupabase
+from datetime import date, datetime, timezone
+import asyncio
+import io
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+PORTFOLIO_ID = "11111111-1111-1111-1111-111111111111"
+TIMESTAMP = "2024-01-01T00:00:00+00:00"
+
+
+def row_id(number):
+    return f"00000000-0000-0000-0000-{number:012d}"
+
+
+def transaction(number, day, price="101.5"):
+    return {
+        "id": row_id(number),
+        "portfolio_id": PORTFOLIO_ID,
+        "symbol": "AAPL",
+        "transaction_type": "buy",
+        # PostgREST returns numerics as JSON numbers or strings
+        "quantity": 2,
+        "price": price,
+        "fees": None,
+        "transaction_date": f"{day}T10:00:00.123456+00:00",
+        "notes": None,
+        "created_at": TIMESTAMP,
+        "updated_at": TIMESTAMP
+    }
+
+
+def position(number, symbol):
+    return {
+        "id": row_id(number),
+        "portfolio_id": PORTFOLIO_ID,
+        "symbol": symbol,
+        "quantity": "10",
+        "average_cost": "100",
+        "total_cost": "1000",
+        "current_price": None,
+        "last_price_update": None,
+        "last_transaction_date": "2024-01-02T10:00:00+00:00",
+        "created_at": TIMESTAMP,
+        "updated_at": TIMESTAMP
+    }
+
+
+TABLES = {
+    "transactions": [
+        transaction(1, "2024-01-01"),
+        transaction(2, "2024-01-02", price=99),
+        transaction(3, "2024-01-03")
+    ],
+    "positions": [position(13, "MSFT"), position(11, "AAPL"), position(12, "GOOG")],
+    "performance_snapshots": []
+}
+
+
+@pytest.fixture(autouse=True)
+def supabase(monkeypatch):
+    client = FakeAsyncSupabase(TABLES)
+
+    async def get_client():
+        return client
+
+    monkeypatch.setattr(export_service, "get_async_supabase_client", get_client)
+    return client
+
+
+def export(dataset, export_format, page_size=2):
+    service = ColumnarExportService()
+    service.export_service.page_size = page_size
+
+    async def run():
+        return [chunk async for chunk in service.stream_dataset(PORTFOLIO_ID, dataset, export_format)]
+
+    return asyncio.run(run())
+
+
+def test_arrow_stream():
+    chunks = export("transactions", "arrow")
+
+    # Schema with the first batch, one batch per page (2), end-of-stream marker
+    assert len(chunks) == 3
+    reader = pa.ipc.open_stream(b"".join(chunks))
+    assert reader.schema == DATASETS["transactions"][3]
+    table = reader.read_all()
+
+    assert table.column("id").to_pylist() == [row_id(1), row_id(2), row_id(3)]
+    assert table.column("price").to_pylist() == [101.5, 99.0, 101.5]
+    assert table.column("fees").to_pylist() == [None, None, None]
+    assert table.column("transaction_date")[0].as_py() == datetime(2024, 1, 1, 10, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+def test_arrow_stream_is_readable_page_by_page():
+    chunks = export("transactions", "arrow")
+
+    # A client can decode the first page before the rest arrives
+    reader = pa.ipc.open_stream(io.BytesIO(chunks[0]))
+    assert reader.read_next_batch().num_rows == 2
+
+
+def test_parquet_magic_is_sent_first():
+    chunks = export("transactions", "parquet")
+
+    assert chunks[0] == b"PAR1"
+
+
+def test_parquet_file_has_one_row_group_per_page():
+    chunks = export("transactions", "parquet")
+
+    parquet_file = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+    assert parquet_file.num_row_groups == 2
+    table = parquet_file.read()
+    assert table.schema.equals(DATASETS["transactions"][3])
+    assert table.num_rows == 3
+
+
+def test_positions_page_by_symbol():
+    table = pa.ipc.open_stream(b"".join(export("positions", "arrow", page_size=1))).read_all()
+
+    assert table.column("symbol").to_pylist() == ["AAPL", "GOOG", "MSFT"]
+    assert table.column("total_cost").to_pylist() == [1000.0] * 3
+    assert table.column("current_price").null_count == 3
+
+
+def test_empty_dataset_is_a_valid_file():
+    table = pq.read_table(io.BytesIO(b"".join(export("snapshots", "parquet"))))
+
+    assert table.num_rows == 0
+    assert table.schema.field("snapshot_date").type == pa.date32()
+
+
+def test_snapshot_dates(supabase):
+    supabase.tables["performance_snapshots"] = [{
+        "id": row_id(30),
+        "portfolio_id": PORTFOLIO_ID,
+        "snapshot_date": "2024-01-05",
+        "total_value": "1234.5",
+        "total_cost": "1000",
+        "pnl": "234.5",
+        "created_at": TIMESTAMP
+    }]
+
+    table = pa.ipc.open_stream(b"".join(export("snapshots", "arrow"))).read_all()
+
+    assert table.column("snapshot_date").to_pylist() == [date(2024, 1, 5)]
+    assert table.column("pnl").to_pylist() == [234.5]
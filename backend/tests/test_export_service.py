@@ -0,0 +1,176 @@
+"""Tests for streamed ledger exports (database replaced by an in-memory fake)"""
+
+from app.api import exports
+from app.main import app
+from app.services import export_service
+from app.services.export_service import CSV_COLUMNS, ExportService
+from tests.fake_supabase import FakeAsyncSupabase
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+import asyncio
+import csv
+import io
+import json
+import pytest
+
+PORTFOLIO_ID = "11111111-1111-1111-1111-111111111111"
+OTHER_ID = "22222222-2222-2222-2222-222222222222"
+EMPTY_ID = "33333333-3333-3333-3333-333333333333"
+
+
+def row_id(number):
+    return f"00000000-0000-0000-0000-{number:012d}"
+
+
+def transaction(number, day, portfolio_id=PORTFOLIO_ID):
+    return {
+        "id": row_id(number),
+        "portfolio_id": portfolio_id,
+        "symbol": "AAPL",
+        "transaction_type": "buy",
+        "quantity": 1,
+        "price": 100 + number,
+        "fees": 0,
+        "transaction_date": f"{day}T10:00:00+00:00",
+        "notes": None
+    }
+
+
+LEDGER = {
+    "transactions": [
+        transaction(3, "2024-01-02"),
+        transaction(1, "2024-01-02"),  # same timestamp: ordered by id
+        transaction(2, "2024-01-01"),
+        transaction(5, "2024-01-04"),
+        transaction(4, "2024-01-03"),
+        transaction(6, "2024-01-01", portfolio_id=OTHER_ID)
+    ],
+    "cash_movements": [{
+        "id": row_id(10),
+        "portfolio_id": PORTFOLIO_ID,
+        "type": "deposit",
+        "amount": 1000,
+        "movement_date": "2024-01-01T09:00:00+00:00",
+        "notes": "Opening, \"quoted\" balance"
+    }],
+    "dividends": [{
+        "id": row_id(20),
+        "portfolio_id": PORTFOLIO_ID,
+        "symbol": "AAPL",
+        "dividend_type": "cash",
+        "amount": 1.25,
+        "dividend_date": "2024-02-01T00:00:00+00:00",
+        "notes": None
+    }]
+}
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    client = FakeAsyncSupabase(LEDGER)
+
+    async def get_client():
+        return client
+
+    monkeypatch.setattr(export_service, "get_async_supabase_client", get_client)
+    return client
+
+
+def collect(chunks):
+    async def run():
+        return [chunk async for chunk in chunks]
+    return asyncio.run(run())
+
+
+def make_service(page_size=2):
+    service = ExportService()
+    service.page_size = page_size
+    return service
+
+
+def test_csv_export(supabase):
+    chunks = collect(make_service().stream_ledger(PORTFOLIO_ID, "csv"))
+
+    # Header, then one chunk per page: 3 transaction pages, 1 cash, 1 dividend
+    assert len(chunks) == 6
+    assert chunks[0] == ",".join(CSV_COLUMNS) + "\r\n"
+
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0] == CSV_COLUMNS
+    assert [(r[0], r[1]) for r in rows[1:]] == [
+        ("transaction", row_id(2)),
+        ("transaction", row_id(1)),
+        ("transaction", row_id(3)),
+        ("transaction", row_id(4)),
+        ("transaction", row_id(5)),
+        ("cash_movement", row_id(10)),
+        ("dividend", row_id(20))
+    ]
+    assert rows[1] == ["transaction", row_id(2), "2024-01-01T10:00:00+00:00", "AAPL", "buy", "1", "102", "0", "", ""]
+    assert rows[6] == ["cash_movement", row_id(10), "2024-01-01T09:00:00+00:00", "", "deposit", "", "", "", "1000", "Opening, \"quoted\" balance"]
+    assert rows[7][4] == "cash"
+
+
+def test_header_is_sent_before_the_first_query(supabase):
+    async def first_chunk():
+        chunks = make_service().stream_ledger(PORTFOLIO_ID, "csv")
+        return await chunks.__anext__()
+
+    assert asyncio.run(first_chunk()).startswith("record_type,")
+    assert supabase.requests == []
+
+
+def test_ndjson_export(supabase):
+    chunks = collect(make_service(page_size=10).stream_ledger(PORTFOLIO_ID, "ndjson"))
+
+    records = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert [r["record_type"] for r in records] == ["transaction"] * 5 + ["cash_movement", "dividend"]
+    assert records[0] == {"record_type": "transaction", **LEDGER["transactions"][2]}
+    assert all(r["portfolio_id"] == PORTFOLIO_ID for r in records)
+
+
+def test_pages_follow_the_keyset_cursor(supabase):
+    pages = collect(make_service().iter_pages("transactions", "transaction_date", PORTFOLIO_ID))
+
+    assert [[row["id"] for row in page] for page in pages] == [
+        [row_id(2), row_id(1)],
+        [row_id(3), row_id(4)],
+        [row_id(5)]
+    ]
+    # Every page after the first continues after the previous page's last row
+    assert [request[3] for request in supabase.requests] == [
+        None,
+        ("transaction_date", "gt", "2024-01-02T10:00:00+00:00", row_id(1)),
+        ("transaction_date", "gt", "2024-01-03T10:00:00+00:00", row_id(4))
+    ]
+
+
+def test_empty_ledger_is_only_a_header(supabase):
+    chunks = collect(make_service().stream_ledger(EMPTY_ID, "csv"))
+
+    assert "".join(chunks) == ",".join(CSV_COLUMNS) + "\r\n"
+
+
+def test_export_endpoint_streams_with_download_headers(supabase, monkeypatch):
+    async def get_portfolio(portfolio_id):
+        return {"id": portfolio_id}
+
+    monkeypatch.setattr(exports.portfolio_service, "get_portfolio", get_portfolio)
+    response = TestClient(app).get(f"/portfolios/{PORTFOLIO_ID}/export?format=ndjson")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == f'attachment; filename="portfolio-{PORTFOLIO_ID}-ledger.ndjson"'
+    assert len(response.text.splitlines()) == 7
+
+
+def test_export_endpoint_404_before_streaming(supabase, monkeypatch):
+    async def get_portfolio(portfolio_id):
+        raise HTTPException(status_code=404, detail=f"Portfolio with id '{portfolio_id}' not found")
+
+    monkeypatch.setattr(exports.portfolio_service, "get_portfolio", get_portfolio)
+    client = TestClient(app)
+
+    assert client.get(f"/portfolios/{PORTFOLIO_ID}/export").status_code == 404
+    assert client.get(f"/portfolios/{PORTFOLIO_ID}/export?format=xml").status_code == 422
+    assert supabase.requests == []
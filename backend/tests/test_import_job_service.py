@@ -0,0 +1,240 @@
+"""Tests for background CSV import jobs (database calls replaced by a fake)"""
+
+from app.services import import_job_service
+from app.services.import_job_service import ImportJobService, _jobs, _jobs_lock
+from fastapi import HTTPException
+from datetime import datetime
+import csv
+import io
+import os
+import pytest
+import tempfile
+import uuid
+
+CSV_TEXT = (
+    "date,symbol,type,quantity,price\n"
+    "2024-01-02,AAPL,buy,1,100\n"
+    "\n"
+    "2024-01-03,MSFT,buy,2,200\n"
+    "\n"
+)
+
+
+class FakeTransactionService:
+    """Records writes instead of inserting rows"""
+
+    def __init__(self):
+        self.created = []
+        self.recomputed = []
+
+    def create_transactions_bulk(self, portfolio_id, transactions, recompute_positions=True):
+        self.created.extend(transactions)
+        return transactions
+
+    def recompute_positions(self, portfolio_id, symbols=None):
+        self.recomputed.append(set(symbols))
+
+
+def make_job(service, text=CSV_TEXT, cancel_requested=False):
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as tmp:
+        tmp.write(text)
+        path = tmp.name
+
+    job_id = str(uuid.uuid4())
+    with _jobs_lock:
+        _jobs[job_id] = {
+            "id": job_id,
+            "portfolio_id": str(uuid.uuid4()),
+            "broker_format": "generic",
+            "status": "queued",
+            "total_rows": None,
+            "rows_processed": 0,
+            "imported_count": 0,
+            "failed_count": 0,
+            "errors": [],
+            "error": None,
+            "created_at": datetime.now(),
+            "started_at": None,
+            "finished_at": None,
+            "cancel_requested": cancel_requested
+        }
+    return job_id, path
+
+
+def make_service():
+    service = ImportJobService()
+    service.csv_import_service.transaction_service = FakeTransactionService()
+    return service
+
+
+def test_total_rows_skip_blank_lines():
+    service = make_service()
+    job_id, path = make_job(service)
+
+    service._run_job(job_id, path, chunk_size=1)
+
+    job = service.get_job(job_id)
+    assert job.status == "completed"
+    assert job.total_rows == 2
+    assert job.rows_processed == 2
+    assert job.rows_remaining == 0
+
+
+def test_cancel_during_row_count_ends_cancelled(monkeypatch):
+    service = make_service()
+    job_id, path = make_job(service)
+
+    class CancellingReader(csv.DictReader):
+        def __next__(self):
+            with _jobs_lock:
+                _jobs[job_id]["cancel_requested"] = True
+            return super().__next__()
+
+    monkeypatch.setattr(import_job_service.csv, "DictReader", CancellingReader)
+    service._run_job(job_id, path, chunk_size=1)
+
+    job = service.get_job(job_id)
+    assert job.status == "cancelled"
+    assert job.error is None
+    assert service.csv_import_service.transaction_service.created == []
+
+
+def test_cancel_before_first_chunk_is_not_empty_file():
+    service = make_service()
+    job_id, path = make_job(service)
+
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        result = service.csv_import_service.import_stream(
+            portfolio_id=_jobs[job_id]["portfolio_id"],
+            broker_format="generic",
+            stream=f,
+            should_cancel=lambda: True
+        )
+    os.remove(path)
+
+    assert result.imported_count == 0
+
+
+def test_file_without_rows_fails_as_empty():
+    service = make_service()
+    job_id, path = make_job(service, text="date,symbol,type,quantity,price\n\n")
+
+    service._run_job(job_id, path, chunk_size=1)
+
+    job = service.get_job(job_id)
+    assert job.status == "failed"
+    assert job.error == "CSV file is empty"
+
+
+class FailingTransactionService(FakeTransactionService):
+    """Fails the write of every chunk that contains a given symbol"""
+
+    def __init__(self, failing_symbol):
+        super().__init__()
+        self.failing_symbol = failing_symbol
+
+    def create_transactions_bulk(self, portfolio_id, transactions, recompute_positions=True):
+        if any(t.symbol == self.failing_symbol for t in transactions):
+            raise HTTPException(status_code=500, detail="connection reset")
+        return super().create_transactions_bulk(portfolio_id, transactions, recompute_positions)
+
+
+def test_failed_chunk_is_reported_and_its_symbols_recomputed():
+    service = make_service()
+    transaction_service = FailingTransactionService("MSFT")
+    service.csv_import_service.transaction_service = transaction_service
+
+    result = service.csv_import_service.import_stream(
+        portfolio_id=str(uuid.uuid4()),
+        broker_format="generic",
+        stream=io.StringIO(CSV_TEXT),
+        chunk_size=1
+    )
+
+    assert result.imported_count == 1
+    assert result.failed_count == 1
+    assert result.errors == ["Rows 2-2: failed to write 1 transactions: connection reset"]
+    assert transaction_service.recomputed == [{"AAPL", "MSFT"}]
+
+
+
+def test_decode_error_after_first_chunk_is_400():
+    service = make_service()
+    transaction_service = service.csv_import_service.transaction_service
+    data = (
+        b"date,symbol,type,quantity,price\n"
+        b"2024-01-02,AAPL,buy,1,100\n"
+        + b"2024-01-03,MSFT,buy,1,100\n" * 2000
+        + b"2024-01-04,\xff\xfe,buy,1,100\n"
+    )
+    stream = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", newline="")
+
+    with pytest.raises(HTTPException) as error:
+        service.csv_import_service.import_stream(
+            portfolio_id=str(uuid.uuid4()),
+            broker_format="generic",
+            stream=stream,
+            chunk_size=100
+        )
+
+    assert error.value.status_code == 400
+    assert "Could not read CSV at line" in error.value.detail
+    # Rows written before the bad line are kept, reported and recomputed
+    assert len(transaction_service.created) > 0
+    assert f"{len(transaction_service.created)} transactions from earlier rows were imported" in error.value.detail
+    assert transaction_service.recomputed == [{"AAPL", "MSFT"}]
+
+
+def test_malformed_row_is_400():
+    service = make_service()
+    text = "date,symbol,type,quantity,price\n2024-01-02,AAPL,buy,1,100\n2024-01-03," + "x" * (csv.field_size_limit() + 1) + ",buy,1,100\n"
+
+    with pytest.raises(HTTPException) as error:
+        service.csv_import_service.import_stream(
+            portfolio_id=str(uuid.uuid4()),
+            broker_format="generic",
+            stream=io.StringIO(text, newline=""),
+            chunk_size=1
+        )
+
+    assert error.value.status_code == 400
+    assert "at line 3 (after row 1)" in error.value.detail
+    assert "1 transactions from earlier rows were imported" in error.value.detail
+
+
+class FakePortfolioService:
+    def __init__(self, existing):
+        self.existing = existing
+
+    def ensure_portfolio_exists(self, portfolio_id, user_id=None):
+        if portfolio_id not in self.existing:
+            raise HTTPException(status_code=404, detail=f"Portfolio with id '{portfolio_id}' not found")
+
+
+def test_submit_job_rejects_unknown_portfolio():
+    service = make_service()
+    service.portfolio_service = FakePortfolioService(existing=set())
+    with _jobs_lock:
+        job_count = len(_jobs)
+
+    with pytest.raises(HTTPException) as error:
+        service.submit_job(str(uuid.uuid4()), "generic", io.BytesIO(CSV_TEXT.encode()))
+
+    assert error.value.status_code == 404
+    with _jobs_lock:
+        assert len(_jobs) == job_count
+
+
+def test_submit_job_queues_known_portfolio(monkeypatch):
+    service = make_service()
+    portfolio_id = str(uuid.uuid4())
+    service.portfolio_service = FakePortfolioService(existing={portfolio_id})
+    queued = []
+    monkeypatch.setattr(import_job_service._executor, "submit", lambda *args: queued.append(args))
+
+    job = service.submit_job(portfolio_id, "generic", io.BytesIO(CSV_TEXT.encode()))
+
+    assert job.status == "queued"
+    assert job.portfolio_id == portfolio_id
+    assert len(queued) == 1
+    os.remove(queued[0][2])
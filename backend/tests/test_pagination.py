@@ -0,0 +1,97 @@
+"""Tests for keyset pagination cursors"""
+
+from app.utils.pagination import (
+    SORT_TEXT,
+    apply_keyset,
+    decode_cursor,
+    encode_cursor,
+    split_page
+)
+from fastapi import HTTPException
+import base64
+import json
+import pytest
+
+ROW_ID = "3f2b8c1e-9d4a-4e6f-8a7b-1c2d3e4f5a6b"
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+class RecordingQuery:
+    def __init__(self):
+        self.calls = []
+
+    def or_(self, filters):
+        self.calls.append(("or", filters))
+        return self
+
+    def order(self, column, desc=False):
+        self.calls.append(("order", column, desc))
+        return self
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("2024-03-01T10:00:00+00:00", ROW_ID)
+    assert decode_cursor(cursor) == ("2024-03-01T10:00:00+00:00", ROW_ID)
+
+
+def test_date_sort_values_are_accepted():
+    assert decode_cursor(encode_cursor("2024-03-01", ROW_ID)) == ("2024-03-01", ROW_ID)
+
+
+@pytest.mark.parametrize("value", [
+    ["2024-03-01T10:00:00+00:00", "1),id.gt.(0"],
+    ["2024-03-01T10:00:00+00:00", 'x",id.gt."'],
+    ['2024-03-01",id.gt."', ROW_ID],
+    ["yesterday", ROW_ID],
+    [20240301, ROW_ID],
+    ["2024-03-01"],
+    {"date": "2024-03-01", "id": ROW_ID}
+])
+def test_tampered_cursors_are_rejected(value):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(raw_cursor(value))
+    assert error.value.status_code == 400
+
+
+def test_garbage_cursor_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("not a cursor!")
+    assert error.value.status_code == 400
+
+
+def test_text_sort_values():
+    assert decode_cursor(encode_cursor("BRK.B", ROW_ID), SORT_TEXT) == ("BRK.B", ROW_ID)
+    with pytest.raises(HTTPException):
+        decode_cursor(encode_cursor('A"B', ROW_ID), SORT_TEXT)
+
+
+def test_apply_keyset_filter_and_order():
+    query = RecordingQuery()
+    apply_keyset(query, "transaction_date", encode_cursor("2024-03-01T10:00:00+00:00", ROW_ID))
+
+    assert query.calls == [
+        ("or", 'transaction_date.lt."2024-03-01T10:00:00+00:00",'
+               f'and(transaction_date.eq."2024-03-01T10:00:00+00:00",id.lt.{ROW_ID})'),
+        ("order", "transaction_date", True),
+        ("order", "id", True)
+    ]
+
+
+def test_first_page_has_no_filter():
+    query = RecordingQuery()
+    apply_keyset(query, "movement_date", None, ascending=True)
+
+    assert query.calls == [("order", "movement_date", False), ("order", "id", False)]
+
+
+def test_split_page():
+    rows = [{"id": ROW_ID, "dividend_date": f"2024-03-0{i}"} for i in range(1, 4)]
+
+    page, cursor = split_page(rows, 2, "dividend_date")
+    assert page == rows[:2]
+    assert decode_cursor(cursor) == ("2024-03-02", ROW_ID)
+
+    assert split_page(rows, 3, "dividend_date") == (rows, None)
@@ -0,0 +1,101 @@
+"""Tests for portfolio writes and the portfolio existence cache (in-memory database fake)"""
+
+from app.config import TEST_USER_ID
+from app.models.schemas import PortfolioCreate
+from app.services import portfolio_service
+from app.services.portfolio_service import PortfolioService
+from tests.fake_supabase import FakeSupabase
+from fastapi import HTTPException
+import pytest
+
+PORTFOLIO_ID = "11111111-1111-1111-1111-111111111111"
+OTHER_ID = "22222222-2222-2222-2222-222222222222"
+
+
+def portfolio_row(portfolio_id, name="Main", user_id=TEST_USER_ID, cost_basis_method="average"):
+    return {
+        "id": portfolio_id,
+        "user_id": user_id,
+        "name": name,
+        "description": None,
+        "currency": "USD",
+        "cost_basis_method": cost_basis_method,
+        "created_at": "2024-01-01T00:00:00+00:00",
+        "updated_at": "2024-01-01T00:00:00+00:00"
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    portfolio_service._portfolio_cache.clear()
+    yield
+    portfolio_service._portfolio_cache.clear()
+
+
+def make_service(*rows):
+    service = PortfolioService()
+    service.supabase = FakeSupabase({"portfolios": list(rows)})
+    return service
+
+
+def test_existence_checks_are_cached():
+    service = make_service(portfolio_row(PORTFOLIO_ID), portfolio_row(OTHER_ID, name="Other"))
+
+    service.ensure_portfolios_exist([PORTFOLIO_ID, OTHER_ID, PORTFOLIO_ID])
+    service.ensure_portfolio_exists(PORTFOLIO_ID)
+    service.ensure_portfolio_exists(OTHER_ID, user_id=TEST_USER_ID)
+
+    assert service.supabase.count("portfolios", "select") == 1
+
+
+def test_missing_portfolios_are_not_cached():
+    service = make_service(portfolio_row(PORTFOLIO_ID))
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as error:
+            service.ensure_portfolios_exist([PORTFOLIO_ID, OTHER_ID])
+        assert error.value.status_code == 404
+        assert OTHER_ID in error.value.detail
+
+    assert service.supabase.count("portfolios", "select") == 2
+
+
+def test_foreign_portfolio_is_not_found():
+    service = make_service(portfolio_row(PORTFOLIO_ID, user_id="someone-else"))
+
+    service.ensure_portfolio_exists(PORTFOLIO_ID)
+    with pytest.raises(HTTPException) as error:
+        service.ensure_portfolio_exists(PORTFOLIO_ID, user_id=TEST_USER_ID)
+    assert error.value.status_code == 404
+
+
+def test_create_seeds_the_cache():
+    service = make_service()
+
+    portfolio = service.create_portfolio(PortfolioCreate(name="New"))
+    selects = service.supabase.count("portfolios", "select")
+    service.ensure_portfolio_exists(portfolio.id)
+
+    assert service.supabase.count("portfolios", "select") == selects
+
+
+def test_delete_invalidates_the_cache():
+    service = make_service(portfolio_row(PORTFOLIO_ID))
+    service.ensure_portfolio_exists(PORTFOLIO_ID)
+
+    service.delete_portfolio(PORTFOLIO_ID)
+
+    with pytest.raises(HTTPException) as error:
+        service.ensure_portfolio_exists(PORTFOLIO_ID)
+    assert error.value.status_code == 404
+
+
+def test_cost_basis_method_is_read_fresh():
+    service = make_service(portfolio_row(PORTFOLIO_ID, cost_basis_method="fifo"))
+    assert service.get_cost_basis_method(PORTFOLIO_ID) == "fifo"
+
+    # Changed through another worker
+    service.supabase.tables["portfolios"][0]["cost_basis_method"] = "hifo"
+
+    assert service.get_cost_basis_method(PORTFOLIO_ID) == "hifo"
+    assert service.get_cost_basis_method(OTHER_ID) == "average"
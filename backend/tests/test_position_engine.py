@@ -0,0 +1,303 @@
+"""Tests for the running position state and tax lot matching"""
+
+from app.models.cost_basis import (
+    COST_BASIS_AVERAGE,
+    COST_BASIS_FIFO,
+    COST_BASIS_HIFO,
+    COST_BASIS_LIFO,
+    COST_BASIS_SPECIFIC_ID
+)
+from app.services.position_engine import PositionState, replay
+from decimal import Decimal
+import pytest
+
+
+def tx(number, transaction_type, quantity, price=None, day="2024-01-01", fees=0, lot_selection=None, time="10:00:00"):
+    return {
+        "id": f"00000000-0000-0000-0000-{number:012d}",
+        "symbol": "AAPL",
+        "transaction_type": transaction_type,
+        "quantity": quantity,
+        "price": price,
+        "fees": fees,
+        "transaction_date": f"{day}T{time}+00:00",
+        "lot_selection": lot_selection
+    }
+
+
+def run(method, transactions):
+    return replay(transactions, method)["AAPL"]
+
+
+def gains(state):
+    return [(g.lot_transaction_id and int(g.lot_transaction_id[-12:]), g.quantity, g.cost_basis) for g in state.realized]
+
+
+def test_average_cost_sell():
+    state = run(COST_BASIS_AVERAGE, [
+        tx(1, "buy", 10, 10),
+        tx(2, "buy", 10, 20, day="2024-01-02"),
+        tx(3, "sell", 5, 30, day="2024-01-03")
+    ])
+
+    assert state.quantity == 15
+    assert state.total_cost == 225
+    assert state.average_cost == 15
+    assert state.lots is None
+    assert [g.realized_gain for g in state.realized] == [Decimal("75")]
+
+
+def test_fifo_sells_oldest_lots_first():
+    state = run(COST_BASIS_FIFO, [
+        tx(1, "buy", 10, 10),
+        tx(2, "buy", 10, 20, day="2024-01-02"),
+        tx(3, "sell", 15, 30, day="2024-01-03")
+    ])
+
+    assert gains(state) == [(1, 10, 100), (2, 5, 100)]
+    assert state.quantity == 5
+    assert state.total_cost == 100
+
+
+def test_lifo_sells_newest_lots_first():
+    state = run(COST_BASIS_LIFO, [
+        tx(1, "buy", 10, 10),
+        tx(2, "buy", 10, 20, day="2024-01-02"),
+        tx(3, "sell", 15, 30, day="2024-01-03")
+    ])
+
+    assert gains(state) == [(2, 10, 200), (1, 5, 50)]
+    assert state.total_cost == 50
+
+
+def test_hifo_sells_most_expensive_lots_first():
+    state = run(COST_BASIS_HIFO, [
+        tx(1, "buy", 10, 20),
+        tx(2, "buy", 10, 30, day="2024-01-02"),
+        tx(3, "buy", 10, 10, day="2024-01-03"),
+        tx(4, "sell", 15, 30, day="2024-01-04")
+    ])
+
+    assert gains(state) == [(2, 10, 300), (1, 5, 100)]
+    assert state.total_cost == 200
+
+
+def test_specific_id_takes_selected_lots_then_oldest():
+    state = run(COST_BASIS_SPECIFIC_ID, [
+        tx(1, "buy", 10, 10),
+        tx(2, "buy", 10, 20, day="2024-01-02"),
+        tx(3, "buy", 10, 30, day="2024-01-03"),
+        tx(4, "sell", 8, 40, day="2024-01-04", lot_selection=[
+            {"transaction_id": "00000000-0000-0000-0000-000000000003", "quantity": 5}
+        ])
+    ])
+
+    assert gains(state) == [(3, 5, 150), (1, 3, 30)]
+    assert state.quantity == 22
+
+
+def test_sell_fees_are_spread_over_lots():
+    state = run(COST_BASIS_FIFO, [
+        tx(1, "buy", 10, 10),
+        tx(2, "buy", 10, 10),
+        tx(3, "sell", 20, 10, day="2024-01-02", fees=4)
+    ])
+
+    assert [g.proceeds for g in state.realized] == [Decimal("98"), Decimal("98")]
+
+
+def test_split_rescales_lots_and_keeps_cost():
+    state = run(COST_BASIS_FIFO, [
+        tx(1, "buy", 10, 10),
+        tx(2, "split", 2, day="2024-01-02"),
+        tx(3, "sell", 20, 6, day="2024-01-03")
+    ])
+
+    assert gains(state) == [(1, 20, 100)]
+    assert state.realized[0].realized_gain == 20
+    assert not state.is_open
+
+
+def test_split_under_average_cost():
+    state = run(COST_BASIS_AVERAGE, [tx(1, "buy", 10, 10), tx(2, "split", 3, day="2024-01-02")])
+
+    assert state.quantity == 30
+    assert state.total_cost == 100
+
+
+def test_transfer_out_moves_cost_without_gain():
+    fifo = run(COST_BASIS_FIFO, [tx(1, "buy", 10, 10), tx(2, "transfer_out", 4, day="2024-01-02")])
+    average = run(COST_BASIS_AVERAGE, [tx(1, "buy", 10, 10), tx(2, "transfer_out", 5, day="2024-01-02")])
+
+    assert fifo.realized == [] and fifo.quantity == 6 and fifo.total_cost == 60
+    assert average.realized == [] and average.quantity == 5 and average.total_cost == 50
+
+
+def test_transfer_in_adds_a_lot_at_carried_cost():
+    state = run(COST_BASIS_FIFO, [
+        tx(1, "transfer_in", 10, 7),
+        tx(2, "sell", 10, 9, day="2024-01-02")
+    ])
+
+    assert state.realized[0].realized_gain == 20
+
+
+def test_split_keeps_acquisition_dates_and_hifo_order():
+    state = run(COST_BASIS_HIFO, [
+        tx(1, "buy", 10, 30, day="2023-01-02"),
+        tx(2, "buy", 10, 20, day="2024-03-01"),
+        tx(3, "split", 2, day="2024-04-01"),
+        tx(4, "sell", 25, 12, day="2024-06-03")
+    ])
+
+    # The lot bought at 30 costs 15 after the split and is still sold first
+    assert [
+        (int(g.lot_transaction_id[-12:]), g.quantity, g.cost_basis, g.realized_gain, g.holding_period)
+        for g in state.realized
+    ] == [(1, 20, 300, -60, "long"), (2, 5, 50, 10, "short")]
+    assert state.quantity == 15
+    assert state.total_cost == 150
+
+
+@pytest.mark.parametrize("method, sold_lot", [(COST_BASIS_FIFO, 2), (COST_BASIS_LIFO, 1), (COST_BASIS_HIFO, 2)])
+def test_transfer_out_takes_lots_like_a_sell(method, sold_lot):
+    state = run(method, [
+        tx(1, "buy", 10, 10, day="2023-01-02"),
+        tx(2, "buy", 10, 5, day="2024-03-01"),
+        tx(3, "transfer_out", 10, day="2024-04-01"),
+        tx(4, "sell", 10, 20, day="2024-06-03")
+    ])
+
+    # The sell realizes a gain only on the lot the transfer left behind
+    assert [int(g.lot_transaction_id[-12:]) for g in state.realized] == [sold_lot]
+    assert not state.is_open and state.total_cost == 0
+
+
+def test_transfer_in_lot_is_held_from_the_transfer():
+    state = run(COST_BASIS_FIFO, [
+        tx(1, "transfer_in", 10, 7, day="2024-01-02"),
+        tx(2, "sell", 10, 9, day="2024-06-03")
+    ])
+
+    assert state.realized[0].acquired_at.date().isoformat() == "2024-01-02"
+    assert state.realized[0].holding_period == "short"
+
+
+def test_holding_period():
+    state = run(COST_BASIS_FIFO, [
+        tx(1, "buy", 1, 10, day="2023-01-01"),
+        tx(2, "buy", 1, 10, day="2024-01-01"),
+        tx(3, "sell", 2, 10, day="2024-06-01")
+    ])
+
+    assert [g.holding_period for g in state.realized] == ["long", "short"]
+    assert run(COST_BASIS_AVERAGE, [tx(1, "buy", 1, 10), tx(2, "sell", 1, 10)]).realized[0].holding_period is None
+
+
+def test_holding_period_boundary():
+    def held_until(day):
+        return run(COST_BASIS_FIFO, [tx(1, "buy", 1, 10, day="2023-01-01"), tx(2, "sell", 1, 10, day=day)]).realized[0]
+
+    assert held_until("2024-01-01").holding_period == "short"  # exactly 365 days
+    assert held_until("2024-01-02").holding_period == "long"
+
+
+LOT_HISTORY = [
+    tx(1, "buy", 10, 10, day="2022-01-03"),
+    tx(2, "buy", 10, 30, day="2023-06-01"),
+    tx(3, "buy", 10, 20, day="2024-03-01"),
+    tx(4, "sell", 15, 25, day="2024-06-03")
+]
+
+
+@pytest.mark.parametrize("method, expected", [
+    # (lot, quantity, cost basis, proceeds, holding period)
+    (COST_BASIS_FIFO, [(1, 10, 100, 250, "long"), (2, 5, 150, 125, "long")]),
+    (COST_BASIS_LIFO, [(3, 10, 200, 250, "short"), (2, 5, 150, 125, "long")]),
+    (COST_BASIS_HIFO, [(2, 10, 300, 250, "long"), (3, 5, 100, 125, "short")])
+])
+def test_realized_gain_per_lot(method, expected):
+    state = run(method, LOT_HISTORY)
+
+    assert [
+        (int(g.lot_transaction_id[-12:]), g.quantity, g.cost_basis, g.proceeds, g.holding_period)
+        for g in state.realized
+    ] == expected
+    assert {g.sell_transaction_id for g in state.realized} == {"00000000-0000-0000-0000-000000000004"}
+    assert state.quantity == 15
+    assert state.total_cost == 600 - sum(cost for _, _, cost, _, _ in expected)
+
+
+@pytest.mark.parametrize("method, short_term, long_term", [
+    (COST_BASIS_FIFO, 0, 125),
+    (COST_BASIS_LIFO, 50, -25),
+    (COST_BASIS_HIFO, 25, -50)
+])
+def test_short_and_long_term_split(method, short_term, long_term):
+    realized = run(method, LOT_HISTORY).realized
+
+    assert sum(g.realized_gain for g in realized if g.holding_period == "short") == short_term
+    assert sum(g.realized_gain for g in realized if g.holding_period == "long") == long_term
+
+
+def test_realized_gain_row():
+    gain = run(COST_BASIS_LIFO, LOT_HISTORY).realized[0]
+
+    assert gain.to_row("portfolio", "AAPL", COST_BASIS_LIFO) == {
+        "portfolio_id": "portfolio",
+        "symbol": "AAPL",
+        "sell_transaction_id": "00000000-0000-0000-0000-000000000004",
+        "lot_transaction_id": "00000000-0000-0000-0000-000000000003",
+        "cost_basis_method": COST_BASIS_LIFO,
+        "quantity": 10.0,
+        "acquired_at": "2024-03-01T10:00:00+00:00",
+        "sold_at": "2024-06-03T10:00:00+00:00",
+        "cost_basis": 200.0,
+        "proceeds": 250.0,
+        "realized_gain": 50.0,
+        "holding_period": "short"
+    }
+
+
+@pytest.mark.parametrize("method", [COST_BASIS_AVERAGE, COST_BASIS_FIFO, COST_BASIS_HIFO])
+def test_row_round_trip_then_append_matches_replay(method):
+    history = [
+        tx(1, "buy", 10, 10),
+        tx(2, "buy", 5, 30, day="2024-01-02"),
+        tx(3, "sell", 3, 25, day="2024-01-03")
+    ]
+    appended = [tx(4, "buy", 2, 12, day="2024-01-04"), tx(5, "sell", 6, 20, day="2024-01-05")]
+
+    stored = PositionState.from_row(run(method, history).to_row("p", "AAPL"))
+    assert stored.can_append(appended[0])
+    for t in appended:
+        stored.apply(t)
+
+    expected = run(method, history + appended)
+    assert stored.quantity == expected.quantity
+    assert stored.total_cost == expected.total_cost
+    assert stored.to_row("p", "AAPL") == expected.to_row("p", "AAPL")
+
+
+def test_can_append_uses_replay_order():
+    state = run(COST_BASIS_FIFO, [tx(5, "buy", 10, 10)])
+
+    assert not state.can_append(tx(3, "sell", 1, 10))  # same time, earlier id
+    assert not state.can_append(tx(5, "sell", 1, 10))  # the applied transaction itself
+    assert state.can_append(tx(7, "sell", 1, 10))  # same time, later id
+    assert state.can_append(tx(1, "sell", 1, 10, time="10:00:01"))
+    assert not state.can_append(tx(9, "sell", 1, 10, time="09:59:59"))
+
+
+def test_can_append_without_stored_id_needs_a_later_time():
+    row = run(COST_BASIS_AVERAGE, [tx(5, "buy", 10, 10)]).to_row("p", "AAPL")
+    row["last_transaction_id"] = None
+    state = PositionState.from_row(row)
+
+    assert not state.can_append(tx(7, "sell", 1, 10))
+    assert state.can_append(tx(7, "sell", 1, 10, time="10:00:01"))
+
+
+def test_closed_position_only_accepts_appends_when_empty():
+    assert PositionState().can_append(tx(1, "buy", 1, 10))
+    assert not PositionState(quantity=Decimal("1")).can_append(tx(1, "buy", 1, 10))
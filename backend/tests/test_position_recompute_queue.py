@@ -0,0 +1,171 @@
+"""Tests for coalescing position recomputes (flush replaced by a recorder)"""
+
+from app.services import transaction_service
+from app.services.position_recompute_queue import PositionRecomputeQueue
+from app.services.transaction_service import TransactionService
+import threading
+import time
+
+
+class RecordingFlush:
+    """Records flush calls; optionally blocks until released or raises"""
+
+    def __init__(self, block=False, fail=False):
+        self.calls = []
+        self.threads = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.block = block
+        self.fail = fail
+        self.active = {}
+        self.max_active = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, portfolio_id, appended, dirty_symbols, rebuild_all):
+        with self._lock:
+            self.calls.append((portfolio_id, list(appended), sorted(dirty_symbols), rebuild_all))
+            self.threads.append(threading.current_thread())
+            self.active[portfolio_id] = self.active.get(portfolio_id, 0) + 1
+            self.max_active[portfolio_id] = max(self.max_active.get(portfolio_id, 0), self.active[portfolio_id])
+        self.started.set()
+        try:
+            if self.block:
+                assert self.release.wait(5)
+            if self.fail:
+                raise RuntimeError("database unavailable")
+        finally:
+            with self._lock:
+                self.active[portfolio_id] -= 1
+
+
+def test_requests_within_the_window_are_merged():
+    flush = RecordingFlush()
+    queue = PositionRecomputeQueue(flush, delay_seconds=0.05)
+
+    first = queue.schedule("p1", appended=[{"id": "t1"}])
+    second = queue.schedule("p1", appended=[{"id": "t2"}], dirty_symbols=["MSFT"])
+    third = queue.schedule("p1", dirty_symbols=["AAPL", "MSFT"], rebuild_all=True)
+
+    # All requests share one pending recompute
+    assert first is second is third
+    assert flush.calls == []
+
+    assert first.wait(5)
+    assert flush.calls == [("p1", [{"id": "t1"}, {"id": "t2"}], ["AAPL", "MSFT"], True)]
+
+
+def test_timer_path_runs_in_the_background():
+    flush = RecordingFlush()
+    queue = PositionRecomputeQueue(flush, delay_seconds=0.01)
+
+    done = queue.schedule("p1", appended=[{"id": "t1"}])
+
+    assert done.wait(5)
+    assert flush.threads[0] is not threading.current_thread()
+
+
+def test_zero_delay_runs_in_the_callers_thread():
+    flush = RecordingFlush()
+    queue = PositionRecomputeQueue(flush, delay_seconds=0)
+
+    done = queue.schedule("p1", appended=[{"id": "t1"}])
+
+    # Already finished when schedule returns
+    assert done.is_set()
+    assert flush.threads == [threading.current_thread()]
+
+
+def test_wait_covers_running_and_pending_recomputes():
+    flush = RecordingFlush(block=True)
+    queue = PositionRecomputeQueue(flush, delay_seconds=0.01)
+
+    running = queue.schedule("p1", appended=[{"id": "t1"}])
+    assert flush.started.wait(5)
+    pending = queue.schedule("p1", appended=[{"id": "t2"}])
+
+    assert running is not pending
+    assert not queue.wait("p1", timeout=0.05)
+
+    flush.release.set()
+    assert queue.wait("p1", timeout=5)
+    assert running.is_set() and pending.is_set()
+    assert [call[1] for call in flush.calls] == [[{"id": "t1"}], [{"id": "t2"}]]
+
+
+def test_wait_without_pending_work_returns_immediately():
+    queue = PositionRecomputeQueue(RecordingFlush(), delay_seconds=0.01)
+
+    assert queue.wait("p1", timeout=0)
+
+
+def test_one_portfolio_never_recomputes_concurrently():
+    flush = RecordingFlush(block=True)
+    queue = PositionRecomputeQueue(flush, delay_seconds=0)
+    threads = [
+        threading.Thread(target=queue.schedule, args=("p1",), kwargs={"appended": [{"id": f"t{i}"}]})
+        for i in range(4)
+    ]
+
+    for thread in threads:
+        thread.start()
+    assert flush.started.wait(5)
+    time.sleep(0.05)
+    flush.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert flush.max_active["p1"] == 1
+    assert sorted(t["id"] for call in flush.calls for t in call[1]) == ["t0", "t1", "t2", "t3"]
+
+
+def test_portfolios_recompute_independently():
+    flush = RecordingFlush(block=True)
+    queue = PositionRecomputeQueue(flush, delay_seconds=0.01)
+
+    first = queue.schedule("p1")
+    second = queue.schedule("p2")
+
+    # Both flushes start while neither has been released
+    deadline = time.monotonic() + 5
+    while len(flush.calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(call[0] for call in flush.calls) == ["p1", "p2"]
+
+    flush.release.set()
+    assert first.wait(5) and second.wait(5)
+
+
+def test_failed_flush_releases_waiters():
+    flush = RecordingFlush(fail=True)
+    queue = PositionRecomputeQueue(flush, delay_seconds=0.01)
+
+    done = queue.schedule("p1", appended=[{"id": "t1"}])
+
+    assert done.wait(5)
+    assert queue.wait("p1", timeout=5)
+
+    # The queue keeps working for the portfolio afterwards
+    flush.fail = False
+    assert queue.schedule("p1", appended=[{"id": "t2"}]).wait(5)
+    assert len(flush.calls) == 2
+
+
+def test_schedule_positions_wait_blocks_until_the_recompute_is_written(monkeypatch):
+    flush = RecordingFlush(block=True)
+    monkeypatch.setattr(transaction_service, "position_recompute_queue", PositionRecomputeQueue(flush, delay_seconds=0.01))
+    service = TransactionService()
+
+    # Without wait the write returns while the recompute is still running
+    service._schedule_positions("p1", appended=[{"id": "t1"}])
+    assert flush.started.wait(5)
+    assert transaction_service.position_recompute_queue.wait("p1", timeout=0) is False
+
+    waiter = threading.Thread(target=service._schedule_positions, args=("p1",), kwargs={"dirty_symbols": ["AAPL"], "wait": True})
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()
+
+    flush.release.set()
+    waiter.join(5)
+    assert not waiter.is_alive()
+    assert [call[2] for call in flush.calls] == [[], ["AAPL"]]
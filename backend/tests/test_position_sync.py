@@ -0,0 +1,256 @@
+"""Tests for incremental position writes (database calls replaced by fakes)"""
+
+from app.models.cost_basis import COST_BASIS_AVERAGE, COST_BASIS_FIFO, COST_BASIS_HIFO
+from app.services.position_engine import replay
+from app.services.transaction_service import POSITION_WRITE_ATTEMPTS, TransactionService
+from tests.fake_supabase import FakeSupabase
+from types import SimpleNamespace
+import pytest
+
+PORTFOLIO_ID = "11111111-1111-1111-1111-111111111111"
+
+
+def tx(number, transaction_type, quantity, price, day):
+    return {
+        "id": f"00000000-0000-0000-0000-{number:012d}",
+        "symbol": "AAPL",
+        "transaction_type": transaction_type,
+        "quantity": quantity,
+        "price": price,
+        "fees": 0,
+        "transaction_date": f"{day}T10:00:00+00:00",
+        "lot_selection": None
+    }
+
+
+class FakeTransactionService(TransactionService):
+    """Keeps positions and the ledger in memory; conflicts can be injected"""
+
+    def __init__(self, ledger, conflicts_per_write=(), fail_writes=False):
+        super().__init__()
+        self.summary_service = SimpleNamespace(refresh_summary=lambda portfolio_id: None)
+        self.ledger = ledger
+        self.rows = {}
+        self.next_version = 1
+        self.conflicts_per_write = list(conflicts_per_write)
+        self.fail_writes = fail_writes
+        self.writes = []
+        self.gain_writes = []
+        self.marked = set()
+
+    def store(self, states):
+        for symbol, state in states.items():
+            self.rows[symbol] = dict(state.to_row(PORTFOLIO_ID, symbol), version=self.next_version, needs_replay=False)
+            self.next_version += 1
+
+    def _fetch_position_rows(self, portfolio_id, symbols):
+        return {symbol: dict(self.rows[symbol]) for symbol in symbols if symbol in self.rows}
+
+    def fetch_position_transactions(self, portfolio_id, symbols=None, page_size=1000):
+        return [t for t in self.ledger if symbols is None or t["symbol"] in symbols]
+
+    def _write_positions_checked(self, portfolio_id, states, versions):
+        if self.fail_writes:
+            raise RuntimeError("statement timeout")
+        self.writes.append({symbol: versions.get(symbol) for symbol in states})
+        conflicts = self.conflicts_per_write.pop(0) if self.conflicts_per_write else []
+        self.store({symbol: state for symbol, state in states.items() if symbol not in conflicts})
+        return conflicts
+
+    def _write_realized_gains(self, portfolio_id, states, replaced_symbols=None, replace_all=False, chunk_size=1000):
+        self.gain_writes.append((sorted(states), sorted(replaced_symbols or [])))
+
+    def _mark_needs_replay(self, portfolio_id, symbols):
+        self.marked.update(symbols)
+
+
+def make_service(**kwargs):
+    history = [tx(1, "buy", 10, 10, "2024-01-01")]
+    service = FakeTransactionService(list(history), **kwargs)
+    service.store(replay(history, COST_BASIS_FIFO))
+    return service
+
+
+def test_append_writes_with_the_version_it_read():
+    service = make_service()
+    new_tx = tx(2, "sell", 4, 12, "2024-01-02")
+    service.ledger.append(new_tx)
+
+    service._sync_positions(PORTFOLIO_ID, appended=[new_tx], method=COST_BASIS_FIFO)
+
+    assert service.writes == [{"AAPL": 1}]
+    assert service.rows["AAPL"]["quantity"] == 6
+    assert service.gain_writes == [(["AAPL"], [])]
+
+
+def test_conflicting_append_is_replayed():
+    service = make_service(conflicts_per_write=[["AAPL"]])
+    new_tx = tx(2, "sell", 4, 12, "2024-01-02")
+    service.ledger.append(new_tx)
+
+    service._sync_positions(PORTFOLIO_ID, appended=[new_tx], method=COST_BASIS_FIFO)
+
+    assert len(service.writes) == 2
+    # Gains of the rejected state are not written; the replay replaces them
+    assert service.gain_writes == [([], []), (["AAPL"], ["AAPL"])]
+    assert service.rows["AAPL"]["quantity"] == 6
+    assert service.marked == set()
+
+
+def test_persistent_conflicts_mark_the_symbol_for_replay():
+    service = make_service(conflicts_per_write=[["AAPL"]] * POSITION_WRITE_ATTEMPTS)
+    new_tx = tx(2, "buy", 1, 12, "2024-01-02")
+
+    service._sync_positions(PORTFOLIO_ID, appended=[new_tx], method=COST_BASIS_FIFO)
+
+    assert len(service.writes) == POSITION_WRITE_ATTEMPTS
+    assert service.marked == {"AAPL"}
+
+
+def test_failed_write_marks_the_symbol_for_replay():
+    service = make_service(fail_writes=True)
+    new_tx = tx(2, "buy", 1, 12, "2024-01-02")
+
+    service._sync_positions(PORTFOLIO_ID, appended=[new_tx], method=COST_BASIS_FIFO)
+
+    assert service.marked == {"AAPL"}
+
+
+@pytest.mark.parametrize("row_change", [{"needs_replay": True}, {"last_transaction_date": "2024-01-03T00:00:00+00:00"}])
+def test_marked_or_back_dated_rows_are_replayed(row_change):
+    service = make_service()
+    service.rows["AAPL"].update(row_change)
+    new_tx = tx(2, "buy", 1, 12, "2024-01-02")
+    service.ledger.append(new_tx)
+
+    service._sync_positions(PORTFOLIO_ID, appended=[new_tx], method=COST_BASIS_FIFO)
+
+    assert service.gain_writes == [(["AAPL"], ["AAPL"])]
+    assert service.rows["AAPL"]["quantity"] == 11
+
+
+class MethodSequence:
+    """Portfolio service whose cost basis method changes between reads"""
+
+    def __init__(self, methods):
+        self.methods = list(methods)
+        self.reads = 0
+
+    def get_cost_basis_method(self, portfolio_id):
+        method = self.methods[min(self.reads, len(self.methods) - 1)]
+        self.reads += 1
+        return method
+
+
+def record_rebuilds(service):
+    rebuilds = []
+    service._update_positions = lambda portfolio_id, method: rebuilds.append(method)
+    return rebuilds
+
+
+def test_flush_uses_the_current_method():
+    service = make_service()
+    service.portfolio_service = MethodSequence([COST_BASIS_FIFO])
+    rebuilds = record_rebuilds(service)
+    new_tx = tx(2, "sell", 4, 12, "2024-01-02")
+    service.ledger.append(new_tx)
+
+    service._flush_positions(PORTFOLIO_ID, [new_tx], [], False)
+
+    assert service.writes == [{"AAPL": 1}]
+    assert rebuilds == []
+
+
+def test_method_change_during_flush_rebuilds_with_the_new_method():
+    service = make_service()
+    # fifo when the recompute starts, hifo once its rows are written
+    service.portfolio_service = MethodSequence([COST_BASIS_FIFO, COST_BASIS_HIFO])
+    rebuilds = record_rebuilds(service)
+    new_tx = tx(2, "sell", 4, 12, "2024-01-02")
+    service.ledger.append(new_tx)
+
+    service._flush_positions(PORTFOLIO_ID, [new_tx], [], False)
+
+    assert rebuilds == [COST_BASIS_HIFO]
+
+
+def test_method_change_during_rebuild_rebuilds_again():
+    service = make_service()
+    service.portfolio_service = MethodSequence([COST_BASIS_AVERAGE, COST_BASIS_FIFO, COST_BASIS_FIFO])
+    rebuilds = record_rebuilds(service)
+
+    service._flush_positions(PORTFOLIO_ID, [], [], True)
+
+    assert rebuilds == [COST_BASIS_AVERAGE, COST_BASIS_FIFO]
+
+
+OTHER_ID = "22222222-2222-2222-2222-222222222222"
+
+
+def stored_gain(portfolio_id, symbol, sell_number):
+    return {"portfolio_id": portfolio_id, "symbol": symbol, "sell_transaction_id": f"00000000-0000-0000-0000-{sell_number:012d}"}
+
+
+def gain_service():
+    service = TransactionService()
+    service.supabase = FakeSupabase({"realized_gains": [
+        stored_gain(PORTFOLIO_ID, "AAPL", 90),
+        stored_gain(PORTFOLIO_ID, "MSFT", 91),
+        stored_gain(OTHER_ID, "AAPL", 92)
+    ]})
+    return service
+
+
+def sold_state():
+    return replay([
+        tx(1, "buy", 10, 10, "2024-01-01"),
+        tx(2, "buy", 10, 20, "2024-01-02"),
+        tx(3, "sell", 15, 30, "2024-01-03")
+    ], COST_BASIS_FIFO)
+
+
+def stored_gains(service):
+    return sorted(
+        (row["portfolio_id"] == PORTFOLIO_ID, row["symbol"], row["sell_transaction_id"][-2:], row.get("lot_transaction_id", "")[-2:])
+        for row in service.supabase.tables["realized_gains"]
+    )
+
+
+def test_replayed_symbols_replace_their_realized_gains():
+    service = gain_service()
+
+    service._write_realized_gains(PORTFOLIO_ID, sold_state(), replaced_symbols=["AAPL"])
+
+    assert stored_gains(service) == [
+        (False, "AAPL", "92", ""),
+        (True, "AAPL", "03", "01"),
+        (True, "AAPL", "03", "02"),
+        (True, "MSFT", "91", "")
+    ]
+    assert service.supabase.requests[0][:3] == ("realized_gains", "delete", [
+        ("portfolio_id", "eq", PORTFOLIO_ID),
+        ("symbol", "in", ["AAPL"])
+    ])
+
+
+def test_appended_sells_only_insert():
+    service = gain_service()
+
+    service._write_realized_gains(PORTFOLIO_ID, sold_state(), replaced_symbols=[])
+
+    assert service.supabase.count("realized_gains", "delete") == 0
+    assert len(service.supabase.tables["realized_gains"]) == 5
+
+
+def test_rebuild_replaces_all_realized_gains_in_chunks():
+    service = gain_service()
+
+    service._write_realized_gains(PORTFOLIO_ID, sold_state(), replace_all=True, chunk_size=1)
+
+    assert stored_gains(service) == [
+        (False, "AAPL", "92", ""),
+        (True, "AAPL", "03", "01"),
+        (True, "AAPL", "03", "02")
+    ]
+    assert service.supabase.count("realized_gains", "insert") == 2
+    assert [row["cost_basis_method"] for row in service.supabase.tables["realized_gains"][1:]] == [COST_BASIS_FIFO] * 2
@@ -0,0 +1,79 @@
+"""Tests for bulk price updates (database calls replaced by fakes)"""
+
+from app.models.schemas import BulkPriceUpdate
+from app.services.price_service import PriceService
+from fastapi import HTTPException
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+import pydantic
+import pytest
+
+
+class FakeSupabase:
+    """Answers apply_position_prices like the 010 function, from in-memory positions"""
+
+    def __init__(self, positions):
+        self.positions = positions
+        self.calls = []
+
+    def rpc(self, name, params):
+        assert name == "apply_position_prices"
+        self.calls.append(params)
+        prices = {quote["symbol"]: quote["price"] for quote in params["p_quotes"]}
+        updated = [position for position in self.positions if position["symbol"] in prices]
+        held = {position["symbol"] for position in updated}
+        result = {
+            "updated_positions": len(updated),
+            "portfolio_ids": sorted({position["portfolio_id"] for position in updated}),
+            "unmatched_symbols": sorted(set(prices) - held)
+        }
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=result))
+
+
+def make_service(positions):
+    service = PriceService()
+    service.supabase = FakeSupabase(positions)
+    return service
+
+
+def test_large_quote_batch_is_one_call():
+    # 5,000 quotes against 2,000 portfolios holding 10 symbols each
+    symbols = [f"T{i:04d}" for i in range(5000)]
+    positions = [
+        {"portfolio_id": f"p{p:04d}", "symbol": symbols[(p * 10 + i) % 4000]}
+        for p in range(2000)
+        for i in range(10)
+    ]
+    service = make_service(positions)
+    priced_at = datetime(2024, 1, 5, 21, tzinfo=timezone.utc)
+
+    result = service.apply_quotes(BulkPriceUpdate(
+        quotes={symbol.lower(): Decimal("10.5") for symbol in symbols},
+        priced_at=priced_at
+    ))
+
+    assert len(service.supabase.calls) == 1
+    call = service.supabase.calls[0]
+    assert len(call["p_quotes"]) == 5000
+    assert call["p_quotes"][0] == {"symbol": "T0000", "price": "10.5"}
+    assert call["p_priced_at"] == priced_at.isoformat()
+    assert result.quote_count == 5000
+    assert result.updated_positions == 20000
+    assert result.portfolio_count == 2000
+    assert result.unmatched_symbols == symbols[4000:]
+
+
+def test_rpc_failure_is_500():
+    service = make_service([])
+    service.supabase.rpc = lambda name, params: SimpleNamespace(execute=lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+
+    with pytest.raises(HTTPException) as error:
+        service.apply_quotes(BulkPriceUpdate(quotes={"AAPL": 1}))
+    assert error.value.status_code == 500
+
+
+@pytest.mark.parametrize("quotes", [{}, {"AAPL": 0}, {"AAPL": -1}, {" ": 1}])
+def test_invalid_quotes(quotes):
+    with pytest.raises(pydantic.ValidationError):
+        BulkPriceUpdate(quotes=quotes)
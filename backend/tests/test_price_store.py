@@ -0,0 +1,150 @@
+"""Tests for the memory-mapped price store"""
+
+from app.services.price_store import PriceStore, build_price_store, forward_fill
+from datetime import date
+from decimal import Decimal
+import numpy as np
+import pytest
+import threading
+
+
+def write_prices(directory, ticker, rows):
+    directory.mkdir(exist_ok=True)
+    lines = ["Date,Open,High,Low,Close"] + [
+        f"{day},{close - 1},{close + 1},{close - 2},{close}" for day, close in rows
+    ]
+    (directory / f"{ticker}.csv").write_text("\n".join(lines) + "\n")
+
+
+@pytest.fixture
+def store(tmp_path):
+    csv_dir = tmp_path / "csv"
+    # 2024-01-06/07 is a weekend
+    write_prices(csv_dir, "aapl", [("2024-01-04", 10.0), ("2024-01-05", 11.0), ("2024-01-08", 12.0)])
+    write_prices(csv_dir, "MSFT", [("2024-01-05", 20.0), ("2024-01-09", 21.0)])
+    build_price_store(str(csv_dir), str(tmp_path / "store"))
+    return PriceStore(str(tmp_path / "store"))
+
+
+def test_forward_fill():
+    values = np.array([
+        [np.nan, 1.0, np.nan, np.nan, 2.0],
+        [3.0, np.nan, 4.0, np.nan, np.nan]
+    ])
+
+    forward_fill(values)
+
+    np.testing.assert_array_equal(values[0, 1:], [1.0, 1.0, 1.0, 2.0])
+    assert np.isnan(values[0, 0])
+    np.testing.assert_array_equal(values[1], [3.0, 3.0, 4.0, 4.0, 4.0])
+
+
+def test_info(store):
+    assert store.info() == {
+        "available": True,
+        "ticker_count": 2,
+        "first_day": date(2024, 1, 4),
+        "last_day": date(2024, 1, 9)
+    }
+    assert store.has_ticker("aapl")
+    assert not store.has_ticker("GOOG")
+
+
+def test_missing_store(tmp_path):
+    store = PriceStore(str(tmp_path / "missing"))
+
+    assert not store.available
+    assert store.get_closes(["AAPL"], date(2024, 1, 5)) == {}
+
+
+def test_get_closes_forward_fills_weekends(store):
+    assert store.get_closes(["AAPL", "msft", "GOOG"], date(2024, 1, 7)) == {
+        "AAPL": Decimal("11.0"),
+        "MSFT": Decimal("20.0")
+    }
+
+
+def test_get_closes_before_first_price(store):
+    assert store.get_closes(["AAPL", "MSFT"], date(2024, 1, 4)) == {"AAPL": Decimal("10.0")}
+    assert store.get_closes(["AAPL"], date(2024, 1, 1)) == {}
+
+
+def test_get_closes_after_last_day_uses_last_close(store):
+    assert store.get_closes(["AAPL"], date(2024, 2, 1)) == {"AAPL": Decimal("12.0")}
+
+
+def test_get_closes_on(store):
+    days = np.array(["2024-01-03", "2024-01-06", "2024-01-09", "2024-03-01"], dtype="datetime64[D]")
+
+    closes = store.get_closes_on("AAPL", days)
+
+    assert np.isnan(closes[0])
+    np.testing.assert_array_equal(closes[1:], [11.0, 12.0, 12.0])
+    assert np.isnan(store.get_closes_on("GOOG", days)).all()
+
+
+def test_get_series(store):
+    days, series = store.get_series("MSFT", start=date(2024, 1, 6), fields=("close", "open"))
+
+    np.testing.assert_array_equal(days, np.array(["2024-01-06", "2024-01-07", "2024-01-08", "2024-01-09"], dtype="datetime64[D]"))
+    np.testing.assert_array_equal(series["close"], [20.0, 20.0, 20.0, 21.0])
+    # Only closes are forward-filled
+    assert np.isnan(series["open"][:3]).all()
+    assert series["open"][3] == 20.0
+
+
+def test_get_series_unknown_ticker_or_empty_range(store):
+    days, series = store.get_series("GOOG")
+    assert len(days) == 0 and len(series["close"]) == 0
+
+    days, series = store.get_series("AAPL", start=date(2024, 1, 9), end=date(2024, 1, 5))
+    assert len(days) == 0
+
+
+def test_reload_picks_up_rebuilt_store(store, tmp_path):
+    assert store.get_closes(["AAPL"], date(2024, 1, 8)) == {"AAPL": Decimal("12.0")}
+
+    write_prices(tmp_path / "csv", "GOOG", [("2024-01-10", 30.0)])
+    build_price_store(str(tmp_path / "csv"), store.path)
+    store.reload()
+
+    assert store.info()["ticker_count"] == 3
+    assert store.get_closes(["GOOG"], date(2024, 1, 10)) == {"GOOG": Decimal("30.0")}
+
+
+def test_reads_during_reload_use_the_previous_store(store, tmp_path, monkeypatch):
+    assert store.info()["ticker_count"] == 2
+    write_prices(tmp_path / "csv", "GOOG", [("2024-01-10", 30.0)])
+    build_price_store(str(tmp_path / "csv"), store.path)
+
+    opening, release = threading.Event(), threading.Event()
+    open_store = store._open
+
+    def slow_open():
+        opening.set()
+        release.wait(5)
+        return open_store()
+
+    monkeypatch.setattr(store, "_open", slow_open)
+    reload = threading.Thread(target=store.reload)
+    reload.start()
+    assert opening.wait(5)
+
+    # The old state stays whole until the new one is swapped in
+    assert store.info()["ticker_count"] == 2
+    assert store.get_closes(["AAPL", "GOOG"], date(2024, 1, 8)) == {"AAPL": Decimal("12.0")}
+
+    release.set()
+    reload.join(5)
+
+    assert store.info()["ticker_count"] == 3
+    assert store.get_closes(["GOOG"], date(2024, 1, 10)) == {"GOOG": Decimal("30.0")}
+
+
+def test_build_requires_close_column(tmp_path):
+    csv_dir = tmp_path / "csv"
+    csv_dir.mkdir()
+    (csv_dir / "BAD.csv").write_text("Date,Open\n2024-01-01,1\n")
+
+    with pytest.raises(ValueError):
+        build_price_store(str(csv_dir), str(tmp_path / "store"))
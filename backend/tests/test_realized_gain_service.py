@@ -0,0 +1,143 @@
+"""Tests for the realized gain report (database replaced by fakes)"""
+
+from app.api import analytics
+from app.main import app
+from app.services import realized_gain_service
+from app.services.realized_gain_service import RealizedGainService
+from datetime import date
+from decimal import Decimal
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from types import SimpleNamespace
+import asyncio
+import pytest
+
+PORTFOLIO_ID = "11111111-1111-1111-1111-111111111111"
+
+
+def group_row(key, cost_basis, proceeds, short_term, long_term, sell_count=1):
+    return {
+        "group_key": key,
+        "quantity": 10,
+        "cost_basis": cost_basis,
+        "proceeds": proceeds,
+        "realized_gain": proceeds - cost_basis,
+        "short_term_gain": short_term,
+        "long_term_gain": long_term,
+        "sell_count": sell_count
+    }
+
+
+class FakeRpcClient:
+    """Answers the portfolio_realized_gains RPC with canned group rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+
+        async def execute():
+            return SimpleNamespace(data=self.rows)
+
+        return SimpleNamespace(execute=execute)
+
+
+class FakePortfolioService:
+    def __init__(self, exists=True):
+        self.exists = exists
+
+    async def get_portfolio(self, portfolio_id):
+        if not self.exists:
+            raise HTTPException(status_code=404, detail="Portfolio not found")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeRpcClient([
+        group_row("AAPL", 250, 400, 50, 100, sell_count=2),
+        group_row("MSFT", 300, 250, -50, 0)
+    ])
+
+    async def get_client():
+        return client
+
+    monkeypatch.setattr(realized_gain_service, "get_async_supabase_client", get_client)
+    return client
+
+
+def make_service(exists=True):
+    service = RealizedGainService()
+    service.portfolio_service = FakePortfolioService(exists)
+    return service
+
+
+def test_groups_and_totals(client):
+    report = asyncio.run(make_service().get_realized_gains(
+        PORTFOLIO_ID,
+        start_date=date(2024, 1, 1),
+        end_date=date(2024, 12, 31),
+        group_by="symbol"
+    ))
+
+    assert client.calls == [("portfolio_realized_gains", {
+        "p_portfolio_id": PORTFOLIO_ID,
+        "p_start_date": "2024-01-01",
+        "p_end_date": "2024-12-31",
+        "p_group_by": "symbol"
+    })]
+    assert [(g.key, g.realized_gain, g.short_term_gain, g.long_term_gain, g.sell_count) for g in report.groups] == [
+        ("AAPL", Decimal("150"), Decimal("50"), Decimal("100"), 2),
+        ("MSFT", Decimal("-50"), Decimal("-50"), Decimal("0"), 1)
+    ]
+    assert report.total_cost_basis == 550
+    assert report.total_proceeds == 650
+    assert report.total_realized_gain == 100
+
+
+def test_open_range_is_passed_as_null(client):
+    client.rows = []
+
+    report = asyncio.run(make_service().get_realized_gains(PORTFOLIO_ID, group_by="month"))
+
+    assert client.calls[0][1]["p_start_date"] is None
+    assert client.calls[0][1]["p_end_date"] is None
+    assert client.calls[0][1]["p_group_by"] == "month"
+    assert report.groups == []
+    assert report.total_realized_gain == 0
+
+
+def test_unknown_portfolio_is_404(client):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(make_service(exists=False).get_realized_gains(PORTFOLIO_ID))
+
+    assert error.value.status_code == 404
+
+
+def test_endpoint_passes_range_and_grouping(client, monkeypatch):
+    monkeypatch.setattr(analytics, "realized_gain_service", make_service())
+
+    response = TestClient(app).get(
+        f"/portfolios/{PORTFOLIO_ID}/realized-gains",
+        params={"from": "2024-01-01", "to": "2024-01-01", "group_by": "year"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["group_by"] == "year"
+    assert response.json()["start_date"] == response.json()["end_date"] == "2024-01-01"
+    assert [g["key"] for g in response.json()["groups"]] == ["AAPL", "MSFT"]
+
+
+@pytest.mark.parametrize("params, status_code", [
+    ({"from": "2024-02-01", "to": "2024-01-31"}, 400),
+    ({"from": "not-a-date"}, 422),
+    ({"group_by": "week"}, 422)
+])
+def test_endpoint_rejects_bad_parameters(client, monkeypatch, params, status_code):
+    monkeypatch.setattr(analytics, "realized_gain_service", make_service())
+
+    response = TestClient(app).get(f"/portfolios/{PORTFOLIO_ID}/realized-gains", params=params)
+
+    assert response.status_code == status_code
+    assert client.calls == []
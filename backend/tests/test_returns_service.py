@@ -0,0 +1,85 @@
+"""Tests for the vectorized TWR and XIRR calculations"""
+
+from app.services.returns_service import (
+    ReturnSeries,
+    annualize,
+    money_weighted_return,
+    time_weighted_return,
+    xirr
+)
+import numpy as np
+import pytest
+
+
+def make_series(values, inflows=None, outflows=None, dividends=None, start="2024-01-01"):
+    count = len(values)
+    zeros = [0.0] * count
+    return ReturnSeries(
+        dates=np.datetime64(start, "D") + np.arange(count),
+        values=np.array(values, dtype=float),
+        inflows=np.array(inflows or zeros, dtype=float),
+        outflows=np.array(outflows or zeros, dtype=float),
+        dividends=np.array(dividends or zeros, dtype=float)
+    )
+
+
+def test_daily_returns_without_flows():
+    series = make_series([100, 110, 99])
+    np.testing.assert_allclose(series.daily_returns, [0.1, -0.1])
+    assert time_weighted_return(series) == pytest.approx(-0.01)
+
+
+def test_full_liquidation_below_previous_close():
+    # Everything sold for 109 after closing at 110
+    series = make_series([100, 110, 0, 0], outflows=[0, 0, 109, 0])
+    np.testing.assert_allclose(series.daily_returns, [0.1, 109 / 110 - 1, 0.0])
+    assert time_weighted_return(series) == pytest.approx(0.09)
+
+
+def test_full_liquidation_above_previous_close():
+    series = make_series([100, 110, 0], outflows=[0, 0, 111])
+    assert time_weighted_return(series) == pytest.approx(0.11)
+
+
+def test_partial_liquidation():
+    # Half sold at the previous close, the rest unchanged
+    series = make_series([100, 110, 55], outflows=[0, 0, 55])
+    np.testing.assert_allclose(series.daily_returns, [0.1, 0.0])
+    assert time_weighted_return(series) == pytest.approx(0.1)
+
+
+def test_inflow_is_not_a_gain():
+    series = make_series([100, 200], inflows=[0, 100])
+    assert time_weighted_return(series) == pytest.approx(0.0)
+
+
+def test_dividends_count_as_return():
+    series = make_series([100, 100], dividends=[0, 5])
+    assert time_weighted_return(series) == pytest.approx(0.05)
+
+
+def test_days_with_nothing_invested_are_zero():
+    series = make_series([0, 0, 100, 110], inflows=[0, 0, 100, 0])
+    np.testing.assert_allclose(series.daily_returns, [0.0, 0.0, 0.1])
+
+
+def test_xirr_one_year():
+    rate = xirr(np.array([-100.0, 110.0]), np.array([0.0, 1.0]))
+    assert rate == pytest.approx(0.1)
+
+
+def test_xirr_needs_a_sign_change():
+    assert xirr(np.array([-100.0, -10.0]), np.array([0.0, 1.0])) is None
+
+
+def test_money_weighted_return_with_liquidation():
+    # Bought for 100, sold for 110 a year later
+    values = [100.0] + [100.0] * 364 + [0.0]
+    outflows = [0.0] * 365 + [110.0]
+    series = make_series(values, outflows=outflows)
+    assert money_weighted_return(series) == pytest.approx(0.1, rel=1e-6)
+
+
+def test_annualize():
+    assert annualize(0.21, 730) == pytest.approx(0.1)
+    assert annualize(0.05, 100) is None
@@ -0,0 +1,139 @@
+"""Tests for the vectorized risk metrics"""
+
+from app.services import risk_service
+from app.services.price_store import PriceStore, build_price_store
+from app.services.returns_service import ReturnSeries
+from app.services.risk_service import (
+    RiskService,
+    aligned_returns,
+    beta,
+    closes_aligned_returns,
+    historical_var,
+    max_drawdown,
+    parametric_var
+)
+from fastapi import HTTPException
+from statistics import NormalDist
+import asyncio
+import numpy as np
+import pytest
+
+
+def make_series(values, start="2024-01-01"):
+    count = len(values)
+    return ReturnSeries(
+        dates=np.datetime64(start, "D") + np.arange(count),
+        values=np.array(values, dtype=float),
+        inflows=np.zeros(count),
+        outflows=np.zeros(count),
+        dividends=np.zeros(count)
+    )
+
+
+def test_max_drawdown():
+    drawdown, peak, trough = max_drawdown(np.array([0.1, -0.5, 0.2]))
+
+    assert drawdown == pytest.approx(-0.5)
+    assert (peak, trough) == (1, 2)
+
+
+def test_max_drawdown_without_losses():
+    assert max_drawdown(np.array([0.01, 0.02]))[0] == 0.0
+
+
+def test_historical_var():
+    var, cvar = historical_var(np.array([-0.1, -0.05, 0.0, 0.05, 0.1]), 0.8)
+
+    assert var == pytest.approx(0.06)
+    assert cvar == pytest.approx(0.1)
+
+
+def test_parametric_var():
+    returns = np.array([-0.02, 0.02] * 500)
+    std = returns.std(ddof=1)
+    var, cvar = parametric_var(returns, 0.95)
+
+    assert var == pytest.approx(NormalDist().inv_cdf(0.95) * std)
+    assert cvar > var
+
+
+def test_beta():
+    benchmark = np.array([0.01, -0.02, 0.03, 0.0, -0.01])
+
+    assert beta(2 * benchmark + 0.001, benchmark) == pytest.approx(2.0)
+    assert beta(benchmark, np.zeros(5)) is None
+    assert beta(benchmark[:1], benchmark[:1]) is None
+
+
+def test_aligned_returns_uses_common_days():
+    series = make_series([100, 110, 121, 133.1])
+    benchmark = make_series([50, 55, 66], start="2024-01-02")
+
+    returns, benchmark_returns = aligned_returns(series, benchmark)
+
+    np.testing.assert_allclose(returns, [0.1, 0.1])
+    np.testing.assert_allclose(benchmark_returns, [0.1, 0.2])
+
+
+def test_closes_aligned_returns_skips_days_without_prices():
+    series = make_series([100, 110, 121, 121])
+    closes = np.array([np.nan, 50.0, 55.0, 55.0])
+
+    returns, benchmark_returns = closes_aligned_returns(series, closes)
+
+    np.testing.assert_allclose(returns, [0.1, 0.0])
+    np.testing.assert_allclose(benchmark_returns, [0.1, 0.0])
+
+
+def write_prices(directory, ticker, rows):
+    directory.mkdir(exist_ok=True)
+    lines = ["Date,Close"] + [f"{day},{close}" for day, close in rows]
+    (directory / f"{ticker}.csv").write_text("\n".join(lines) + "\n")
+
+
+class FakeReturnsService:
+    def __init__(self, series):
+        self.series = series
+
+    async def load_series(self, portfolio_id, start, end):
+        return self.series
+
+
+class FakePortfolioService:
+    async def get_portfolio(self, portfolio_id):
+        return {"id": portfolio_id}
+
+
+def make_risk_service(series, store, monkeypatch):
+    monkeypatch.setattr(risk_service, "price_store", store)
+    service = RiskService()
+    service.returns_service = FakeReturnsService(series)
+    service.portfolio_service = FakePortfolioService()
+    return service
+
+
+def test_beta_against_benchmark_ticker(tmp_path, monkeypatch):
+    benchmark = [100.0, 102.0, 99.96, 104.958, 104.958, 101.8093]
+    # No close on 2024-01-05: forward-filled from the day before
+    write_prices(tmp_path / "csv", "SPY", [
+        (f"2024-01-0{day}", close) for day, close in zip(range(1, 7), benchmark) if day != 5
+    ])
+    build_price_store(str(tmp_path / "csv"), str(tmp_path / "store"))
+
+    closes = np.array(benchmark)
+    portfolio_returns = 1.5 * (closes[1:] / closes[:-1] - 1.0)
+    series = make_series(100 * np.concatenate(([1.0], np.cumprod(1 + portfolio_returns))))
+    service = make_risk_service(series, PriceStore(str(tmp_path / "store")), monkeypatch)
+
+    metrics = asyncio.run(service.get_risk_metrics("p", period="all", benchmark="spy"))
+
+    assert metrics["benchmark"] == "SPY"
+    assert metrics["beta"] == pytest.approx(1.5)
+
+
+def test_unknown_benchmark_ticker(tmp_path, monkeypatch):
+    service = make_risk_service(make_series([100, 101, 102]), PriceStore(str(tmp_path / "missing")), monkeypatch)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(service.get_risk_metrics("p", benchmark="SPY"))
+    assert error.value.status_code == 404
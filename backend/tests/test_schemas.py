@@ -0,0 +1,23 @@
+"""Tests for request schema validation"""
+
+from app.models.schemas import PortfolioCreate, PortfolioUpdate
+from app.models.cost_basis import COST_BASIS_METHODS
+import pydantic
+import pytest
+
+
+@pytest.mark.parametrize("method", COST_BASIS_METHODS)
+def test_known_cost_basis_methods(method):
+    assert PortfolioCreate(name="Main", cost_basis_method=method.upper()).cost_basis_method == method
+    assert PortfolioUpdate(cost_basis_method=method.upper()).cost_basis_method == method
+
+
+def test_cost_basis_method_defaults():
+    assert PortfolioCreate(name="Main").cost_basis_method == "average"
+    assert PortfolioUpdate().cost_basis_method is None
+
+
+@pytest.mark.parametrize("schema", [PortfolioCreate, PortfolioUpdate])
+def test_unknown_cost_basis_method(schema):
+    with pytest.raises(pydantic.ValidationError):
+        schema(name="Main", cost_basis_method="newest")
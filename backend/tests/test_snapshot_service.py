@@ -0,0 +1,115 @@
+"""Tests for snapshot runs (database calls replaced by fakes)"""
+
+from app.services.snapshot_service import SnapshotService
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+
+
+class FakeQuery:
+    """Minimal PostgREST builder: select/order/range over an in-memory table"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.bounds = (0, len(rows) - 1)
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def execute(self):
+        start, end = self.bounds
+        return SimpleNamespace(data=self.rows[start:end + 1])
+
+
+class FakeSupabase:
+    def __init__(self, portfolio_ids, last_dates=None):
+        self.portfolios = [{"id": portfolio_id} for portfolio_id in portfolio_ids]
+        self.last_dates = last_dates or {}
+
+    def table(self, name):
+        assert name == "portfolios"
+        return FakeQuery(self.portfolios)
+
+    def rpc(self, name, params):
+        assert name == "latest_snapshot_dates"
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=self.last_dates))
+
+
+class RecordingSnapshotService(SnapshotService):
+    """Backfills a fixed number of days per portfolio and records the writes"""
+
+    def __init__(self, supabase, days_per_portfolio):
+        super().__init__(price_lookup=lambda symbols, day: {})
+        self.supabase = supabase
+        self.days_per_portfolio = days_per_portfolio
+        self.writes = []
+        self.paths = []
+
+    def _current_snapshot(self, portfolio_id, day):
+        self.paths.append(("current", portfolio_id))
+        return {"portfolio_id": portfolio_id, "snapshot_date": day.isoformat()}
+
+    def _backfill_snapshots(self, portfolio_id, last_date, through):
+        self.paths.append(("replay", portfolio_id))
+        return [
+            {"portfolio_id": portfolio_id, "snapshot_date": (through - timedelta(days=i)).isoformat()}
+            for i in range(self.days_per_portfolio)
+        ]
+
+    def _write_snapshots(self, rows):
+        self.writes.append(list(rows))
+
+
+def test_portfolio_ids_are_paged_past_the_row_limit():
+    ids = [f"p{i:05d}" for i in range(2500)]
+    service = RecordingSnapshotService(FakeSupabase(ids), days_per_portfolio=1)
+
+    assert list(service._fetch_portfolio_ids(page_size=1000)) == ids
+
+
+def test_rows_are_written_in_chunks_as_they_are_built():
+    ids = [f"p{i}" for i in range(5)]
+    service = RecordingSnapshotService(FakeSupabase(ids), days_per_portfolio=3)
+
+    result = service.run_snapshots(through=date(2024, 1, 10), chunk_size=4)
+
+    assert result["portfolio_count"] == 5
+    assert result["snapshot_count"] == 15
+    assert [len(rows) for rows in service.writes] == [4, 4, 4, 3]
+
+
+def test_up_to_date_portfolios_are_skipped():
+    service = RecordingSnapshotService(
+        FakeSupabase(["a", "b"], last_dates={"a": "2024-01-10"}),
+        days_per_portfolio=1
+    )
+
+    result = service.run_snapshots(through=date(2024, 1, 10))
+
+    assert result["portfolio_count"] == 1
+    assert service.writes == [[{"portfolio_id": "b", "snapshot_date": "2024-01-10"}]]
+
+
+@pytest.mark.parametrize("days_behind, through_days_ago, path", [
+    (1, 0, "current"),  # daily run
+    (2, 0, "replay"),   # a missed day is rebuilt from the ledger
+    (1, 1, "replay")    # past days have no stored state
+])
+def test_only_a_one_day_gap_uses_the_stored_positions(days_behind, through_days_ago, path):
+    through = datetime.now(timezone.utc).date() - timedelta(days=through_days_ago)
+    last_date = through - timedelta(days=days_behind)
+    service = RecordingSnapshotService(
+        FakeSupabase(["a"], last_dates={"a": last_date.isoformat()}),
+        days_per_portfolio=days_behind
+    )
+
+    service.run_snapshots(through=through)
+
+    assert service.paths == [(path, "a")]